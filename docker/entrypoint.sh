@@ -4,4 +4,4 @@
 alembic upgrade head
 
 # Run tool
-python3 -m main
\ No newline at end of file
+python3 -m main "$@"
\ No newline at end of file
@@ -3,6 +3,10 @@ from logging.config import fileConfig
 from alembic import context
 from clients.db import DB_SYNC_URL
 from db_models.meta import Base
+import db_models.summary  # noqa: F401 - registers summary table
+import db_models.symbols  # noqa: F401 - registers symbol tables in metadata
+import db_models.work_queue  # noqa: F401 - registers work queue table
+import db_models.watermark  # noqa: F401 - registers ingest watermark table
 from sqlalchemy import engine_from_config, pool
 
 # this is the Alembic Config object, which provides
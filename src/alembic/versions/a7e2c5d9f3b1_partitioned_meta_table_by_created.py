@@ -0,0 +1,59 @@
+"""Partitioned Meta table by 'created' month
+
+Revision ID: a7e2c5d9f3b1
+Revises: f4a8d2b6c1e9
+Create Date: 2026-10-19 20:03:51.117482
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e2c5d9f3b1'
+down_revision = 'f4a8d2b6c1e9'
+branch_labels = None
+depends_on = None
+
+# future months partitioned up front, then kept by maintenance mode
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f('ix_meta_created'), 'meta', ['created'], unique=False
+        )
+    # every unique key of partitioned table must contain partitioning column
+    op.execute(
+        "alter table meta drop primary key, add primary key (id, created)"
+        )
+    oldest = op.get_bind().execute(
+        sa.text("select min(created) from meta")
+        ).scalar()
+    current = datetime.datetime.utcnow().date().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    partitions = []
+    while month <= add_months(current, PARTITIONS_AHEAD):
+        partitions.append(
+            f"partition p{month:%Y%m} "
+            f"values less than ('{add_months(month, 1):%Y-%m-%d}')"
+            )
+        month = add_months(month, 1)
+    partitions.append("partition pmax values less than (maxvalue)")
+    op.execute(
+        "alter table meta partition by range columns(created) ("
+        + ", ".join(partitions) + ")"
+        )
+
+
+def downgrade() -> None:
+    op.execute("alter table meta remove partitioning")
+    op.execute("alter table meta drop primary key, add primary key (id)")
+    op.drop_index(op.f('ix_meta_created'), table_name='meta')
@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# processor attributes tuned by default and their (min, max) values
+TUNED_SETTINGS_BOUNDS = {
+    "concurrency": (1, 64),
+    "batch_size": (10, 2000),
+}
+STEP_FACTOR = 2.0
+# relative throughput gain needed to accept a move, filters out noise
+MIN_GAIN = 0.05
+WARMUP_ROUNDS = 1
+HOLD_ROUNDS = 3
+# extra measurements of a gaining move before it is accepted
+CONFIRM_ROUNDS = 1
+
+Settings = Dict[str, int]
+# (setting name, multiplier)
+Move = Tuple[str, float]
+
+
+class Autotuner:
+    """Hill climbing search of settings maximising items per second.
+
+    Rounds alternate between measuring current best settings (warm-up,
+    then `hold_rounds` after every search cycle, smoothing its rate) and
+    trying a single move - one setting multiplied or divided by `factor`.
+    A move gaining at least `min_gain` in `confirm_rounds` more rounds
+    too (a single noisy round is not enough) is accepted and repeated,
+    otherwise the next move is tried. When no move improves, best settings
+    are held and search starts again, so the tuner follows throughput
+    changes during the run.
+
+    Usage: `settings = tuner.propose()`, process round with them, then
+    `tuner.record(settings, items, seconds)`.
+    """
+
+    def __init__(
+            self, settings: Settings,
+            bounds: Dict[str, Tuple[int, int]] = TUNED_SETTINGS_BOUNDS,
+            factor: float = STEP_FACTOR, min_gain: float = MIN_GAIN,
+            warmup_rounds: int = WARMUP_ROUNDS,
+            hold_rounds: int = HOLD_ROUNDS,
+            confirm_rounds: int = CONFIRM_ROUNDS
+    ) -> None:
+        self.bounds = bounds
+        self.factor = factor
+        self.min_gain = min_gain
+        self.hold_rounds = hold_rounds
+        self.confirm_rounds = confirm_rounds
+        self.best = {
+            name: self.clamp(name, value) for name, value in settings.items()
+        }
+        self.best_rate: Optional[float] = None
+        self.moves: List[Move] = [
+            (name, multiplier)
+            for name in self.best
+            for multiplier in (factor, 1 / factor)
+        ]
+        self.history: List[Dict[str, Any]] = []
+        self._hold = max(1, warmup_rounds)
+        self._pending: List[Move] = list(self.moves)
+        self._trial: Optional[Move] = None
+        # rates of the trial move measured so far
+        self._trial_rates: List[float] = []
+
+    def clamp(self, name: str, value: int) -> int:
+        low, high = self.bounds.get(name, (1, value))
+        return max(low, min(high, value))
+
+    def apply(self, settings: Settings, move: Move) -> Settings:
+        """Returns settings changed by the move (at least by one, within
+        bounds).
+        """
+        name, multiplier = move
+        value = settings[name]
+        if multiplier > 1:
+            moved = max(value + 1, round(value * multiplier))
+        else:
+            moved = min(value - 1, round(value * multiplier))
+        return dict(settings, **{name: self.clamp(name, moved)})
+
+    def propose(self) -> Settings:
+        """Returns settings for the next round.
+
+        Returns:
+            Settings: setting name -> value
+        """
+        if self._trial is not None and self._trial_rates:
+            # measuring gaining move again
+            return self.apply(self.best, self._trial)
+        self._trial = None
+        if self._hold:
+            return dict(self.best)
+        while self._pending:
+            settings = self.apply(self.best, self._pending[0])
+            if settings != self.best:
+                self._trial = self._pending[0]
+                return settings
+            # already at bound
+            self._pending.pop(0)
+        logger.info(
+            f"Autotune converged at {self.best} "
+            f"({self.best_rate or 0:.1f} items/s)"
+            )
+        self._hold = self.hold_rounds
+        self._pending = list(self.moves)
+        return dict(self.best)
+
+    def record(
+            self, settings: Settings, items: int, seconds: float,
+            **details: Any
+    ) -> None:
+        """Registers result of round processed with proposed settings.
+
+        Args:
+            settings (Settings): settings returned by `propose`
+            items (int): number of processed items
+            seconds (float): round duration
+            details (Any): extra round information kept in history
+        """
+        rate = items / seconds if seconds > 0 else 0.0
+        self.history.append(dict(
+            settings=dict(settings), items=items, seconds=seconds,
+            items_per_second=rate, **details
+        ))
+        logger.info(f"Autotune round {settings}: {rate:.1f} items/s")
+        if self._trial is None:
+            self.best_rate = (
+                rate if self.best_rate is None
+                else (self.best_rate + rate) / 2
+            )
+            self._hold = max(0, self._hold - 1)
+            return
+        move = self._trial
+        self._trial_rates.append(rate)
+        if rate <= (self.best_rate or 0.0) * (1 + self.min_gain):
+            self._trial, self._trial_rates = None, []
+            self._pending.pop(0)
+            return
+        if len(self._trial_rates) <= self.confirm_rounds:
+            return
+        self.best = dict(settings)
+        self.best_rate = sum(self._trial_rates) / len(self._trial_rates)
+        self._trial, self._trial_rates = None, []
+        name, multiplier = move
+        # repeat the move, then retry other settings from new position
+        self._pending = [move] + [
+            other for other in self.moves
+            if other != move and other != (name, 1 / multiplier)
+        ]
+
+    def report(self) -> Dict[str, Any]:
+        """Returns chosen settings with measured rates of all rounds.
+
+        Returns:
+            Dict[str, Any]: run report
+        """
+        return {
+            "settings": dict(self.best),
+            "items_per_second": self.best_rate,
+            "rounds": self.history,
+        }
+
+
+def get_round_bounds(
+        items_per_partition: int,
+        bounds: Dict[str, Tuple[int, int]] = TUNED_SETTINGS_BOUNDS
+) -> Dict[str, Tuple[int, int]]:
+    """Limits `batch_size` bounds to items a partition gets in a round -
+    larger batches would not change anything, so their measured "gains"
+    would be just noise.
+
+    Args:
+        items_per_partition (int): max items of partition in a round
+        bounds (Dict[str, Tuple[int, int]], optional): setting bounds.
+            Defaults to TUNED_SETTINGS_BOUNDS.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: limited bounds
+    """
+    if "batch_size" not in bounds:
+        return bounds
+    per_partition = max(1, items_per_partition)
+    low, high = bounds["batch_size"]
+    low = min(low, per_partition)
+    return dict(bounds, batch_size=(low, max(low, min(high, per_partition))))
+
+
+def load_tuned_settings(path: str) -> Optional[Settings]:
+    """Reads settings chosen by previous run from its report.
+
+    Args:
+        path (str): report path
+
+    Returns:
+        Optional[Settings]: settings, None when there is no report
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["settings"]
+
+
+def write_report(path: str, report: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Autotune settings {report['settings']} written to {path}")
@@ -1,10 +1,26 @@
+import datetime
 import logging
+import random
+import re
 from abc import abstractmethod
-from typing import Sequence, Tuple
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore import UNSIGNED
 from botocore.client import Config
+from botocore.exceptions import (ClientError, ConnectionClosedError,
+                                 ConnectTimeoutError, EndpointConnectionError,
+                                 ReadTimeoutError)
+
+from s3transfer.manager import TransferManager
+from s3transfer.subscribers import BaseSubscriber
+
+from clients.retry import Retrier, RetryPolicy
 
 logger = logging.getLogger()
 
@@ -12,30 +28,241 @@ DELIMITER = "/"
 S3_MALICIOUS_PREFIX = "0/"
 S3_CLEAN_PREFIX = "1/"
 
+# s3 lists keys in utf-8 binary order; sample keys are random base62 strings
+KEY_ALPHABET = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+)
+# number of leading key characters used to split key space
+KEY_RANGE_DEPTH = 2
+# min key space positions per sampled key (sampling resolution)
+SAMPLE_POSITIONS_PER_KEY = 64
+
+# (key, size, etag) of listed object
+ObjectEntry = Tuple[str, Optional[int], Optional[str]]
+
+# md5 hex digest, "-<parts count>" suffix for multipart uploads
+ETAG_RE = re.compile(r"([0-9a-f]{32})(?:-([1-9][0-9]*))?")
+ETAG_DIGEST_SIZE = 16
+UNKNOWN_DIGEST = bytes(ETAG_DIGEST_SIZE)
+# packed etag parts count of unknown (or irregular) etag
+UNKNOWN_PARTS = -1
+
+S3_THROTTLE_CODES = frozenset((
+    "SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded",
+    "TooManyRequestsException", "503"
+))
+S3_TRANSIENT_CODES = frozenset((
+    "InternalError", "ServiceUnavailable", "RequestTimeout", "500", "502",
+    "504"
+))
+# object deleted (or never existed) - retrying won't help
+S3_MISSING_CODES = frozenset(("NoSuchKey", "NotFound", "404"))
+S3_CONNECTION_ERRORS = (
+    EndpointConnectionError, ConnectionClosedError, ConnectTimeoutError,
+    ReadTimeoutError
+)
+
+S3_THROTTLE_POLICY = RetryPolicy(
+    "s3-throttle", max_attempts=8, base_delay=0.5, max_delay=20.0
+    )
+S3_TRANSIENT_POLICY = RetryPolicy(
+    "s3-transient", max_attempts=5, base_delay=0.2, max_delay=5.0
+    )
+S3_CONNECTION_POLICY = RetryPolicy(
+    "s3-connection", max_attempts=5, base_delay=0.2, max_delay=5.0
+    )
+
+
+def classify_s3_error(error: BaseException) -> Optional[RetryPolicy]:
+    """Maps S3 related error to retry policy.
+
+    Args:
+        error (BaseException): raised error
+
+    Returns:
+        Optional[RetryPolicy]: policy to apply, None if error is permanent
+    """
+    if isinstance(error, ClientError):
+        code = str(error.response.get("Error", {}).get("Code"))
+        if code in S3_THROTTLE_CODES:
+            return S3_THROTTLE_POLICY
+        if code in S3_TRANSIENT_CODES:
+            return S3_TRANSIENT_POLICY
+        return None
+    if isinstance(error, S3_CONNECTION_ERRORS):
+        return S3_CONNECTION_POLICY
+    return None
+
+
+def is_missing_s3_object(error: BaseException) -> bool:
+    return isinstance(error, ClientError) and str(
+        error.response.get("Error", {}).get("Code")
+        ) in S3_MISSING_CODES
+
+
+def encode_key_position(position: int, depth: int = KEY_RANGE_DEPTH) -> str:
+    """Converts key space position to fixed length key fragment.
+
+    Args:
+        position (int): position in range [0, len(KEY_ALPHABET) ** depth)
+        depth (int, optional): fragment length. Defaults to KEY_RANGE_DEPTH.
+
+    Returns:
+        str: key fragment, e.g. 0 -> "00", 62 -> "10"
+    """
+    chars = []
+    for _ in range(depth):
+        position, idx = divmod(position, len(KEY_ALPHABET))
+        chars.append(KEY_ALPHABET[idx])
+    return "".join(reversed(chars))
+
+
+def get_shard_boundaries(prefix: str, shards: int) -> List[str]:
+    """Splits key space under prefix into `shards` contiguous ranges.
+
+    Boundaries depend only on prefix and number of shards, so the split is
+    stable across runs and instances. Keys are assumed to be spread evenly
+    over KEY_ALPHABET (true for random base62 sample names); keys with
+    other characters still fall into exactly one range.
+
+    Args:
+        prefix (str): s3 prefix
+        shards (int): number of shards
+
+    Returns:
+        List[str]: `shards - 1` boundary keys, range i is
+            [boundaries[i - 1], boundaries[i])
+    """
+    positions_cnt = len(KEY_ALPHABET) ** KEY_RANGE_DEPTH
+    return [
+        prefix + encode_key_position(shard * positions_cnt // shards)
+        for shard in range(1, shards)
+    ]
+
+
+def get_shard_key_range(
+        prefix: str, shard: int, shards: int
+) -> Tuple[Optional[str], Optional[str]]:
+    """Returns key range owned by shard.
+
+    Args:
+        prefix (str): s3 prefix
+        shard (int): shard index (0-based)
+        shards (int): number of shards
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: (start_at, end_before) keys -
+            start is included, end is not, None means unbounded
+    """
+    boundaries = [None] + get_shard_boundaries(prefix, shards) + [None]
+    return boundaries[shard], boundaries[shard + 1]
+
+
+def get_key_shard(key: str, prefix: str, shards: int) -> int:
+    """Returns index of shard owning given key.
 
-def get_bucket_and_boto3_from_url(url):
+    Args:
+        key (str): s3 key
+        prefix (str): s3 prefix the key belongs to
+        shards (int): number of shards
+
+    Returns:
+        int: shard index (0-based)
+    """
+    return bisect_right(get_shard_boundaries(prefix, shards), key)
+
+
+def get_shard_cnt(total: int, shard: int, shards: int) -> int:
+    """Returns shard's part of total count (remainder goes to first
+    shards).
+
+    Args:
+        total (int): total count
+        shard (int): shard index (0-based)
+        shards (int): number of shards
+
+    Returns:
+        int: shard's count
+    """
+    return total // shards + (1 if shard < total % shards else 0)
+
+
+def get_bucket_and_boto3_from_url(url, max_pool_connections=10):
     bucket, region = get_client_data_from_s3_url(url)
     return (
         bucket,
         boto3.client(
             's3', region_name=region,
-            config=Config(signature_version=UNSIGNED)
+            config=Config(
+                signature_version=UNSIGNED,
+                max_pool_connections=max_pool_connections
+                )
             )
         )
 
 
+def get_transfer_manager(
+        boto3_client, max_concurrency: int, multipart_threshold: int,
+        multipart_chunksize: int
+) -> TransferManager:
+    """Creates transfer manager sharing one thread budget between all files
+    transferred through it.
+
+    Unlike `boto3_client.download_file` (new manager and thread pool per
+    call), single manager spreads `max_concurrency` GET requests over all
+    in-flight files - objects above `multipart_threshold` are downloaded as
+    concurrent ranged GETs of `multipart_chunksize` bytes while small ones
+    take single request. Client's `max_pool_connections` should be at
+    least `max_concurrency`.
+
+    Args:
+        boto3_client: S3 client
+        max_concurrency (int): max concurrent requests of all transfers
+        multipart_threshold (int): min object size for ranged GETs
+        multipart_chunksize (int): size of single ranged GET
+
+    Returns:
+        TransferManager: transfer manager
+    """
+    return create_transfer_manager(
+        boto3_client,
+        TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency
+            )
+        )
+
+
+class ProvideSizeSubscriber(BaseSubscriber):
+    """Passes object size known from listing to transfer, which spares
+    HEAD request transfer manager otherwise makes before download.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def on_queued(self, future, **kwargs) -> None:
+        future.meta.provide_transfer_size(self.size)
+
+
 class FileUrl:
-    __slots__ = ('root_url', 'path')
+    __slots__ = ('root_url', 'path', 'size', 'etag')
 
-    def __init__(self, root_url, path) -> None:
+    def __init__(self, root_url, path, size=None, etag=None) -> None:
         self.root_url = root_url
         self.path = path
+        # optional object metadata, known when listed
+        self.size = size
+        self.etag = etag
 
     def __repr__(self) -> str:
         return (
             f"{self.__class__.__name__}("
             f"root_url={repr(self.root_url)}, "
-            f"path={repr(self.path)}"
+            f"path={repr(self.path)}, "
+            f"size={repr(self.size)}, "
+            f"etag={repr(self.etag)}"
             ")"
         )
 
@@ -43,6 +270,98 @@ class FileUrl:
         return f"{self.root_url}/{self.path}"
 
 
+class UrlChunk:
+    """Compact batch of FileUrls sharing root url - work item passed to
+    processing engines.
+
+    Root url is stored once, keys as one utf-8 buffer with end offsets,
+    sizes and ETags (binary md5 digest plus parts count) in typed arrays,
+    so a url costs its key length plus 32 bytes, in memory and pickled.
+    ETags not in S3 md5 format are kept as strings.
+    """
+    __slots__ = (
+        'root_url', 'keys', 'key_ends', 'sizes', 'etag_digests',
+        'etag_parts', 'irregular_etags'
+    )
+
+    def __init__(self, root_url: str) -> None:
+        self.root_url = root_url
+        self.keys = bytearray()
+        self.key_ends = array("I")
+        self.sizes = array("q")
+        self.etag_digests = bytearray()
+        self.etag_parts = array("i")
+        self.irregular_etags: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.key_ends)
+
+    def append(self, url: FileUrl) -> None:
+        """Adds url (with the same root url) to the chunk.
+
+        Args:
+            url (FileUrl): url to add
+        """
+        self.keys += url.path.encode("utf-8", errors="surrogatepass")
+        self.key_ends.append(len(self.keys))
+        self.sizes.append(-1 if url.size is None else url.size)
+        match = None if url.etag is None else ETAG_RE.fullmatch(url.etag)
+        if match is None:
+            if url.etag is not None:
+                self.irregular_etags[len(self) - 1] = url.etag
+            self.etag_digests += UNKNOWN_DIGEST
+            self.etag_parts.append(UNKNOWN_PARTS)
+        else:
+            digest, parts = match.groups()
+            self.etag_digests += bytes.fromhex(digest)
+            self.etag_parts.append(int(parts or 0))
+
+    def get_etag(self, i: int) -> Optional[str]:
+        parts = self.etag_parts[i]
+        if parts == UNKNOWN_PARTS:
+            return self.irregular_etags.get(i)
+        digest = self.etag_digests[
+            i * ETAG_DIGEST_SIZE:(i + 1) * ETAG_DIGEST_SIZE
+            ].hex()
+        return f"{digest}-{parts}" if parts else digest
+
+    def __iter__(self) -> Iterator[FileUrl]:
+        start = 0
+        for i, end in enumerate(self.key_ends):
+            size = self.sizes[i]
+            yield FileUrl(
+                self.root_url,
+                self.keys[start:end].decode(
+                    "utf-8", errors="surrogatepass"
+                    ),
+                None if size < 0 else size, self.get_etag(i)
+            )
+            start = end
+
+
+def pack_urls(urls: Iterable[FileUrl], chunk_size: int) -> Iterator[UrlChunk]:
+    """Packs urls into chunks of at most `chunk_size` urls sharing root url.
+
+    Args:
+        urls (Iterable[FileUrl]): urls to pack, consumed lazily
+        chunk_size (int): max urls per chunk
+
+    Yields:
+        UrlChunk: packed urls in input order
+    """
+    chunk = None
+    for url in urls:
+        if chunk is None or len(chunk) >= chunk_size or (
+                chunk.root_url != url.root_url
+        ):
+            if chunk:
+                yield chunk
+            chunk = UrlChunk(url.root_url)
+        chunk.append(url)
+    if chunk:
+        yield chunk
+
+
 def get_client_data_from_s3_url(url: str) -> Tuple[str, str]:
     """Extract bucket and region information from s3 url.
 
@@ -62,7 +381,7 @@ class URLScrapper:
     malicious and clean files urls for further processing
     """
     @abstractmethod
-    def list_malicious_files(self, n: int) -> Sequence[FileUrl]:
+    def list_malicious_files_urls(self, n: int) -> Sequence[FileUrl]:
         """Returns urls of malicious files.
 
         Args:
@@ -73,7 +392,7 @@ class URLScrapper:
         pass
 
     @abstractmethod
-    def list_clean_files(self, n: int) -> Sequence[FileUrl]:
+    def list_clean_files_urls(self, n: int) -> Sequence[FileUrl]:
         """Returns urls of clean files.
 
         Args:
@@ -84,14 +403,42 @@ class URLScrapper:
         """
         pass
 
+    def list_files_urls(
+            self, malicious_cnt: int, clean_cnt: int
+    ) -> Iterable[FileUrl]:
+        """Returns urls of malicious files followed by urls of clean files.
+        Scrappers able to list both at once override it.
+
+        Args:
+            malicious_cnt (int): max malicious urls to return
+            clean_cnt (int): max clean urls to return
+
+        Returns:
+            Iterable[FileUrl]: urls of 'malicious' and 'clean' files
+        """
+        return chain(
+            self.list_malicious_files_urls(malicious_cnt),
+            self.list_clean_files_urls(clean_cnt)
+            )
+
 
 class S3Scrapper(URLScrapper):
     """Class that scraps urls for malicious and clean files from aws s3.
     """
-    def __init__(self, bucket, boto3_client, root_url) -> None:
+    def __init__(
+            self, bucket, boto3_client, root_url,
+            retrier: Optional[Retrier] = None,
+            shard: Optional[Tuple[int, int]] = None,
+            sample_seed: Optional[int] = None,
+            list_concurrency: int = 1
+    ) -> None:
         self.bucket = bucket
         self.boto3_client = boto3_client
         self.root_url = root_url
+        self.retrier = retrier or Retrier(classify_s3_error)
+        self.shard = shard
+        self.sample_seed = sample_seed
+        self.list_concurrency = list_concurrency
 
     @classmethod
     def from_root_url(cls, root_url: str):
@@ -107,10 +454,11 @@ class S3Scrapper(URLScrapper):
         bucket, region = get_client_data_from_s3_url(root_url)
         return cls(bucket, region, root_url)
 
-    def get_keys(
+    def get_objects(
             self, max_cnt: int, prefix: str, delimiter: str = DELIMITER,
-            max_keys: int = 1000
-    ) -> Sequence:
+            max_keys: int = 1000, start_after: Optional[str] = None,
+            end_before: Optional[str] = None, start_at: Optional[str] = None
+    ) -> Iterator[ObjectEntry]:
         """Lists meta data of task related files in the bucket.
 
         Args:
@@ -120,50 +468,47 @@ class S3Scrapper(URLScrapper):
                 Defaults to "/".
             max_keys (int, optional): number of files to return in single
                 response. Defaults to 1000.
-
-        Returns:
-            Sequence: keys of files
+            start_after (Optional[str], optional): list keys after this one.
+                Defaults to None.
+            end_before (Optional[str], optional): stop listing at first key
+                greater or equal to this one. Defaults to None.
+            start_at (Optional[str], optional): list keys from this one on,
+                including it. Defaults to None.
 
         Yields:
-            Iterator[Sequence]: file key
+            Iterator[ObjectEntry]: (key, size, etag) of files
         """
-
-        # TODO: simplify
-
         cnt_left = max_cnt
-        rsp = None
-        data = None
         list_objects_kwargs = {}
-        is_trucated = True
+        if start_after:
+            list_objects_kwargs = {"StartAfter": start_after}
+        if start_at:
+            list_objects_kwargs = {"StartAfter": start_at}
+            if cnt_left > 0 and (end_before is None or start_at < end_before):
+                # StartAfter skips the key itself, it is the first key
+                # listed under itself as a prefix
+                rsp = self.retrier.call(
+                    self.boto3_client.list_objects_v2,
+                    Bucket=self.bucket, Prefix=start_at, Delimiter=delimiter,
+                    MaxKeys=1
+                    )
+                for item in rsp.get("Contents", ()):
+                    if item["Key"] == start_at:
+                        etag = item.get("ETag")
+                        cnt_left -= 1
+                        yield (
+                            start_at, item.get("Size"),
+                            etag.strip('"') if etag else None
+                        )
         iter = 0
 
-        while is_trucated and cnt_left:
-            if rsp:
-                cnt_returned = len(data) if data else 0
-                logger.debug(f"Aquired {cnt_returned}")
-                cnt_left -= cnt_returned
-                is_trucated = rsp["IsTruncated"]
-                if is_trucated:
-                    continuation_token = rsp["NextContinuationToken"]
-                    list_objects_kwargs = {
-                        "ContinuationToken": continuation_token
-                        }
+        while cnt_left > 0:
             logger.debug(f"Left to be aquired: {cnt_left}")
-            if cnt_left and cnt_left < max_keys:
-                logger.debug(
-                    f"max keys ({max_keys}) < left to aquire ({cnt_left}."
-                    f"Set new value max_keys={cnt_left}"
-                    )
-                # don't fetch more then needed
-                max_keys = cnt_left
-            elif cnt_left <= 0:
-                logger.debug(
-                    f"Already reached desired limit {max_cnt}. "
-                    f"{cnt_left} left to be listed."
-                )
-                break
+            # don't fetch more then needed
+            max_keys = min(max_keys, cnt_left)
             logger.debug(f"Iteration: {iter}")
-            rsp = self.boto3_client.list_objects_v2(
+            rsp = self.retrier.call(
+                self.boto3_client.list_objects_v2,
                 Bucket=self.bucket, Prefix=prefix, Delimiter=delimiter,
                 MaxKeys=max_keys, **list_objects_kwargs
                 )
@@ -171,15 +516,239 @@ class S3Scrapper(URLScrapper):
                 f"Prefix {prefix}, delimiter {delimiter}, response {rsp}"
                 )
             iter += 1
-            # filter out files and data that are not "interesting"
-            data = [
-                item["Key"]
-                for item in rsp["Contents"] if "00Tree.html" not in item['Key']
-                ]
+            reached_end = False
+            data = []
+            for item in rsp.get("Contents", ()):
+                key = item["Key"]
+                if end_before is not None and key >= end_before:
+                    reached_end = True
+                    break
+                # filter out files and data that are not "interesting"
+                if "00Tree.html" not in key:
+                    etag = item.get("ETag")
+                    data.append((
+                        key, item.get("Size"),
+                        etag.strip('"') if etag else None
+                    ))
+            logger.debug(f"Aquired {len(data)}")
+            cnt_left -= len(data)
             yield from data
+            if reached_end or not rsp["IsTruncated"]:
+                break
+            list_objects_kwargs = {
+                "ContinuationToken": rsp["NextContinuationToken"]
+                }
+
+    def list_new_objects(
+            self, prefix: str,
+            watermark: Tuple[Optional[datetime.datetime], Optional[str]],
+            keys_ordered: bool = False,
+            modified_before: Optional[datetime.datetime] = None,
+            page_size: int = 1000
+    ) -> Iterator[Tuple[FileUrl, datetime.datetime]]:
+        """Lists objects newer than the watermark - ordered by
+        (LastModified, key).
+
+        When keys grow with upload time (`keys_ordered`), listing starts
+        after watermark key, so only new keys are listed. Otherwise whole
+        prefix is listed and filtered by LastModified.
+
+        Args:
+            prefix (str): s3 prefix to list
+            watermark (Tuple[Optional[datetime.datetime], Optional[str]]):
+                (last modified, key) of the newest already seen object
+            keys_ordered (bool, optional): keys of new objects sort after
+                keys of older ones. Defaults to False.
+            modified_before (Optional[datetime.datetime], optional): skip
+                objects modified at or after this (naive UTC) time - still
+                uploading ones would get older LastModified than newer
+                objects already past the watermark. Defaults to None.
+            page_size (int, optional): keys per listing request.
+                Defaults to 1000.
+
+        Yields:
+            Iterator[Tuple[FileUrl, datetime.datetime]]: urls of new files
+                with their naive UTC LastModified, in key order
+        """
+        last_modified, last_key = watermark
+        list_objects_kwargs = {}
+        if keys_ordered and last_key:
+            list_objects_kwargs = {"StartAfter": last_key}
+        while True:
+            rsp = self.retrier.call(
+                self.boto3_client.list_objects_v2,
+                Bucket=self.bucket, Prefix=prefix, Delimiter=DELIMITER,
+                MaxKeys=page_size, **list_objects_kwargs
+                )
+            for item in rsp.get("Contents", ()):
+                key = item["Key"]
+                if "00Tree.html" in key:
+                    continue
+                modified = item["LastModified"]
+                if modified.tzinfo is not None:
+                    modified = modified.astimezone(
+                        datetime.timezone.utc
+                        ).replace(tzinfo=None)
+                if modified_before is not None and modified >= modified_before:
+                    if keys_ordered:
+                        # watermark must not get past it
+                        return
+                    continue
+                if not keys_ordered and last_modified is not None and (
+                        (modified, key) <= (last_modified, last_key or "")
+                ):
+                    continue
+                etag = item.get("ETag")
+                yield FileUrl(
+                    self.root_url, key, item.get("Size"),
+                    etag.strip('"') if etag else None
+                    ), modified
+            if not rsp["IsTruncated"]:
+                break
+            list_objects_kwargs = {
+                "ContinuationToken": rsp["NextContinuationToken"]
+                }
+
+    def get_keys(self, max_cnt: int, prefix: str, **kwargs) -> Sequence:
+        """Lists keys of task related files in the bucket. Accepts same
+        arguments as `get_objects`.
+
+        Yields:
+            Iterator[Sequence]: file key
+        """
+        for key, _, _ in self.get_objects(max_cnt, prefix, **kwargs):
+            yield key
+
+    def sample_objects(self, n: int, prefix: str) -> Iterator[ObjectEntry]:
+        """Draws up to `n` objects spread evenly across the key space.
+
+        Key space (of the shard) is split into `n` equal strata. In every
+        stratum one key is listed starting at seeded random position
+        within the stratum (or from stratum start when the random position
+        is past its last key). Strata are listed concurrently with
+        `StartAfter`, so cost depends on `n`, not on bucket size. Shortfall
+        of empty strata is filled with further keys of strata that have
+        them, so fewer than `n` keys are returned only when the prefix
+        (shard) has fewer keys. Keys with characters outside KEY_ALPHABET
+        are not sampled.
+
+        Args:
+            n (int): max entries to return
+            prefix (str): s3 prefix to filter s3 keys
+
+        Yields:
+            Iterator[ObjectEntry]: (key, size, etag) of sampled S3 files,
+                in key order
+        """
+        shard, shards = self.shard or (0, 1)
+        depth = KEY_RANGE_DEPTH
+        while (
+            len(KEY_ALPHABET) ** depth // shards
+            < n * SAMPLE_POSITIONS_PER_KEY
+        ):
+            depth += 1
+        positions_cnt = len(KEY_ALPHABET) ** depth
+        # same boundaries as get_shard_boundaries, in deeper key space
+        scale = len(KEY_ALPHABET) ** (depth - KEY_RANGE_DEPTH)
+        shard_positions_cnt = len(KEY_ALPHABET) ** KEY_RANGE_DEPTH
+        lo = shard * shard_positions_cnt // shards * scale
+        hi = (shard + 1) * shard_positions_cnt // shards * scale
+        strata = [
+            (lo + j * (hi - lo) // n, lo + (j + 1) * (hi - lo) // n)
+            for j in range(n)
+        ]
+        logger.debug(
+            f"Sampling {n} keys of {prefix} from positions [{lo}, {hi}) "
+            f"of {positions_cnt}"
+            )
+
+        def get_start_at(position: int) -> Optional[str]:
+            return (
+                prefix + encode_key_position(position, depth)
+                if position else None
+            )
+
+        def get_end_before(position: int) -> Optional[str]:
+            return (
+                prefix + encode_key_position(position, depth)
+                if position < positions_cnt else None
+            )
+
+        def sample_stratum(
+                stratum: Tuple[int, int]
+        ) -> Optional[ObjectEntry]:
+            start, end = stratum
+            rnd = random.Random(f"{self.sample_seed}:{prefix}:{start}")
+            for position in (rnd.randrange(start, end), start):
+                for entry in self.get_objects(
+                        1, prefix, start_at=get_start_at(position),
+                        end_before=get_end_before(end)
+                ):
+                    return entry
+            return None
+
+        with ThreadPoolExecutor(self.list_concurrency) as executor:
+            sampled = list(executor.map(sample_stratum, strata))
+            entries = [entry for entry in sampled if entry is not None]
+            # [stratum end, sampled key, listing cursor kwargs]
+            fillable = [
+                [end, entry[0], {"start_at": get_start_at(start)}]
+                for (start, end), entry in zip(strata, sampled)
+                if entry is not None
+            ]
+            while len(entries) < n and fillable:
+                # spread the shortfall over strata that still have keys
+                quota = -(-(n - len(entries)) // len(fillable))
+
+                def list_more(stratum: list) -> List[ObjectEntry]:
+                    end, _, cursor = stratum
+                    # one more, the sampled key may be among them
+                    return list(self.get_objects(
+                        quota + 1, prefix, end_before=get_end_before(end),
+                        **cursor
+                    ))
+
+                still_fillable = []
+                for stratum, listed in zip(
+                        fillable, executor.map(list_more, fillable)
+                ):
+                    entries.extend(
+                        entry for entry in listed if entry[0] != stratum[1]
+                    )
+                    if len(listed) > quota:
+                        stratum[2] = {"start_after": listed[-1][0]}
+                        still_fillable.append(stratum)
+                fillable = still_fillable
+        # the last fill round may overshoot, strata samples are kept
+        yield from sorted(entries[:n])
+
+    def list_objects(self, n: int, prefix: str) -> Iterator[ObjectEntry]:
+        """Returns S3 files. When scrapper is sharded, only the
+        shard's part of the key space is listed. When sampling seed is set,
+        keys are sampled across the key space instead of taking first `n`.
+
+        Args:
+            n (int): max entries to return
+            prefix (str): s3 prefix to filter s3 keys
+
+        Returns:
+            Iterator[ObjectEntry]: (key, size, etag) of S3 files
+        """
+        if self.sample_seed is not None:
+            if self.shard is not None:
+                n = get_shard_cnt(n, *self.shard)
+            return self.sample_objects(n, prefix)
+        if self.shard is None:
+            return self.get_objects(n, prefix)
+        shard, shards = self.shard
+        start_at, end_before = get_shard_key_range(prefix, shard, shards)
+        return self.get_objects(
+            get_shard_cnt(n, shard, shards), prefix,
+            start_at=start_at, end_before=end_before
+            )
 
     def list_keys(self, n: int, prefix: str) -> Sequence:
-        """Returns keys of S3 files.
+        """Returns keys of S3 files (see `list_objects`).
 
         Args:
             n (int): max entries to return
@@ -188,12 +757,13 @@ class S3Scrapper(URLScrapper):
         Returns:
             Sequence: keys of S3 files
         """
-        return self.get_keys(n, prefix)
+        return (key for key, _, _ in self.list_objects(n, prefix))
 
     def urls_from_keys(self, n: int, prefix: str) -> Sequence:
+        # size and etag from the listing spare a HEAD request per file
         return (
-            FileUrl(self.root_url, key)
-            for key in self.list_keys(n, prefix)
+            FileUrl(self.root_url, key, size, etag)
+            for key, size, etag in self.list_objects(n, prefix)
             )
 
     def list_malicious_files_urls(self, n: int) -> Sequence:
@@ -1,11 +1,15 @@
 import logging
 import socket
 from contextlib import contextmanager
+from typing import Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session, sessionmaker
 
-from envs import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+from clients.retry import AdaptiveLimiter, Retrier, RetryPolicy
+from envs import (DB_HOST, DB_LATENCY_TARGET, DB_MAX_CONCURRENCY, DB_NAME,
+                  DB_PASSWORD, DB_PORT, DB_USER)
 
 logger = logging.getLogger()
 
@@ -28,12 +32,62 @@ SYNC_SESSION = sessionmaker(
     )
 
 
+# MySQL server error codes
+MYSQL_DEADLOCK_CODES = frozenset((
+    1205,  # ER_LOCK_WAIT_TIMEOUT
+    1213,  # ER_LOCK_DEADLOCK
+))
+MYSQL_CONNECTION_CODES = frozenset((
+    2003,  # CR_CONN_HOST_ERROR
+    2006,  # CR_SERVER_GONE_ERROR
+    2013,  # CR_SERVER_LOST
+    2055,  # CR_SERVER_LOST_EXTENDED
+))
+
+DB_DEADLOCK_POLICY = RetryPolicy(
+    "db-deadlock", max_attempts=6, base_delay=0.05, max_delay=2.0
+    )
+DB_CONNECTION_POLICY = RetryPolicy(
+    "db-connection", max_attempts=5, base_delay=0.5, max_delay=10.0
+    )
+
+
 class DbClientError(Exception):
     """Generic db client related error
     """
     pass
 
 
+def classify_db_error(error: BaseException) -> Optional[RetryPolicy]:
+    """Maps db related error to retry policy.
+
+    Args:
+        error (BaseException): raised error
+
+    Returns:
+        Optional[RetryPolicy]: policy to apply, None if error is permanent
+    """
+    if isinstance(error, DbClientError):
+        return DB_CONNECTION_POLICY
+    if isinstance(error, DBAPIError):
+        if error.connection_invalidated:
+            return DB_CONNECTION_POLICY
+        orig_args = getattr(error.orig, "args", None) or (None,)
+        if orig_args[0] in MYSQL_DEADLOCK_CODES:
+            return DB_DEADLOCK_POLICY
+        if orig_args[0] in MYSQL_CONNECTION_CODES:
+            return DB_CONNECTION_POLICY
+    return None
+
+
+# shared by all db writes of single process
+DB_LIMITER = AdaptiveLimiter(
+    initial=max(1, DB_MAX_CONCURRENCY // 4), max_limit=DB_MAX_CONCURRENCY,
+    latency_target=DB_LATENCY_TARGET
+    )
+DB_RETRIER = Retrier(classify_db_error, limiter=DB_LIMITER)
+
+
 @contextmanager
 def get_db_session() -> Session:
     """Common session context to operate async db sessions.
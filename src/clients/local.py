@@ -0,0 +1,134 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from clients.aws import (S3_CLEAN_PREFIX, S3_MALICIOUS_PREFIX, FileUrl,
+                         URLScrapper, get_key_shard, get_shard_cnt)
+
+logger = logging.getLogger()
+
+WALK_CONCURRENCY = 16
+
+
+def scan_dir(path: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """Lists single directory level.
+
+    Args:
+        path (str): directory path
+
+    Returns:
+        Tuple[List[Tuple[str, int]], List[str]]: sorted (file path, size)
+            pairs and sorted subdirectories paths
+    """
+    files = []
+    dirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                files.append((entry.path, entry.stat().st_size))
+    return sorted(files), sorted(dirs)
+
+
+def walk_files(path: str) -> List[Tuple[str, int]]:
+    """Lists all files under directory (recursively).
+
+    Args:
+        path (str): directory path
+
+    Returns:
+        List[Tuple[str, int]]: (file path, size) pairs in path order
+    """
+    files, dirs = scan_dir(path)
+    for dir in dirs:
+        files.extend(walk_files(dir))
+    return files
+
+
+class LocalDirScrapper(URLScrapper):
+    """Class that lists malicious and clean files from local (or network
+    mounted) directory laid out like the bucket - '0/' subdirectory for
+    malicious and '1/' for clean files.
+
+    Top level subdirectories of every label directory are walked
+    concurrently, results are yielded in path order as soon as preceding
+    subdirectories are done.
+    """
+
+    def __init__(
+            self, root_dir: str, shard: Optional[Tuple[int, int]] = None,
+            walk_concurrency: int = WALK_CONCURRENCY
+    ) -> None:
+        self.root_dir = os.path.abspath(root_dir)
+        self.shard = shard
+        self.walk_concurrency = walk_concurrency
+
+    def iter_files(self, prefix: str) -> Iterator[Tuple[str, int]]:
+        """Streams files of given label directory.
+
+        Args:
+            prefix (str): label prefix, e.g. "0/"
+
+        Yields:
+            Iterator[Tuple[str, int]]: (file path, size) pairs
+        """
+        label_dir = os.path.join(self.root_dir, prefix)
+        if not os.path.isdir(label_dir):
+            logger.warning(f"Directory {label_dir} does not exist")
+            return
+        files, dirs = scan_dir(label_dir)
+        yield from files
+        with ThreadPoolExecutor(self.walk_concurrency) as executor:
+            for dir_files in executor.map(walk_files, dirs):
+                yield from dir_files
+
+    def urls_from_dir(self, n: int, prefix: str) -> Iterator[FileUrl]:
+        """Returns urls of files with given label prefix.
+
+        Args:
+            n (int): max entries to return
+            prefix (str): label prefix, e.g. "0/"
+
+        Yields:
+            Iterator[FileUrl]: urls with size, relative to root directory
+        """
+        if self.shard is not None:
+            n = get_shard_cnt(n, *self.shard)
+        if n <= 0:
+            return
+        cnt = 0
+        for file_path, size in self.iter_files(prefix):
+            path = os.path.relpath(file_path, self.root_dir).replace(
+                os.sep, "/"
+                )
+            if self.shard is not None:
+                shard, shards = self.shard
+                if get_key_shard(path, prefix, shards) != shard:
+                    continue
+            yield FileUrl(self.root_dir, path, size)
+            cnt += 1
+            if cnt >= n:
+                return
+
+    def list_malicious_files_urls(self, n: int) -> Iterator[FileUrl]:
+        """Returns urls of malicious files.
+
+        Args:
+            n (int): max urls to return
+        Returns:
+            Sequence: urls of malicious files
+        """
+        return self.urls_from_dir(n, S3_MALICIOUS_PREFIX)
+
+    def list_clean_files_urls(self, n: int) -> Iterator[FileUrl]:
+        """Returns urls of clean files.
+
+        Args:
+            n (int): max entries to return
+
+        Returns:
+            Sequence: urls of clean files
+        """
+        return self.urls_from_dir(n, S3_CLEAN_PREFIX)
@@ -0,0 +1,249 @@
+import csv
+import gzip
+import json
+import logging
+import os
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from clients.aws import (S3_CLEAN_PREFIX, S3_MALICIOUS_PREFIX, FileUrl,
+                         URLScrapper, get_key_shard, get_shard_cnt)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, needed only for parquet manifests
+    pq = None
+
+logger = logging.getLogger()
+
+# S3 Inventory CSV files have no header, columns are described by
+# 'fileSchema' of manifest.json
+DEFAULT_CSV_SCHEMA = ("Bucket", "Key", "Size", "LastModifiedDate", "ETag")
+PARQUET_COLUMNS = ("key", "size", "e_tag")
+PARQUET_BATCH_SIZE = 10000
+
+# (key, size, etag)
+ManifestEntry = Tuple[str, Optional[int], Optional[str]]
+
+
+class ManifestError(Exception):
+    """Generic manifest related error
+    """
+    pass
+
+
+def parse_csv_schema(file_schema: str) -> Tuple[str, ...]:
+    """Parses S3 Inventory 'fileSchema' (e.g. "Bucket, Key, Size").
+
+    Args:
+        file_schema (str): comma separated column names
+
+    Returns:
+        Tuple[str, ...]: column names
+    """
+    return tuple(column.strip() for column in file_schema.split(","))
+
+
+def iter_csv_entries(
+        path: str, schema: Sequence[str] = DEFAULT_CSV_SCHEMA
+) -> Iterator[ManifestEntry]:
+    """Streams entries of (optionally gzipped) S3 Inventory CSV file.
+
+    Keys are URL-decoded. Header row (first row containing "Key" column)
+    is detected and used instead of `schema`.
+
+    Args:
+        path (str): path to .csv or .csv.gz file
+        schema (Sequence[str], optional): column names.
+            Defaults to DEFAULT_CSV_SCHEMA.
+
+    Yields:
+        Iterator[ManifestEntry]: (key, size, etag)
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, mode="rt", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        first_row = next(reader, None)
+        if first_row is None:
+            return
+        columns = [column.strip().lower() for column in first_row]
+        if "key" in columns:
+            rows = reader
+        else:
+            columns = [column.lower() for column in schema]
+            rows = chain([first_row], reader)
+        key_idx = columns.index("key")
+        size_idx = columns.index("size") if "size" in columns else None
+        etag_idx = columns.index("etag") if "etag" in columns else None
+        for row in rows:
+            size = row[size_idx] if size_idx is not None else None
+            etag = row[etag_idx] if etag_idx is not None else None
+            yield (
+                unquote(row[key_idx]),
+                int(size) if size else None,
+                etag.strip('"') if etag else None
+            )
+
+
+def iter_parquet_entries(path: str) -> Iterator[ManifestEntry]:
+    """Streams entries of S3 Inventory Parquet file batch by batch.
+
+    Args:
+        path (str): path to .parquet file
+
+    Yields:
+        Iterator[ManifestEntry]: (key, size, etag)
+    """
+    if pq is None:
+        raise ManifestError("Parquet manifests require 'pyarrow' package")
+    parquet_file = pq.ParquetFile(path)
+    columns = [
+        column for column in PARQUET_COLUMNS
+        if column in parquet_file.schema_arrow.names
+    ]
+    for batch in parquet_file.iter_batches(
+            batch_size=PARQUET_BATCH_SIZE, columns=columns
+    ):
+        data = batch.to_pydict()
+        keys = data["key"]
+        sizes = data.get("size") or [None] * len(keys)
+        etags = data.get("e_tag") or [None] * len(keys)
+        yield from zip(keys, sizes, etags)
+
+
+def resolve_manifest(path: str) -> Tuple[List[str], Sequence[str]]:
+    """Resolves data files and CSV schema of manifest.
+
+    Args:
+        path (str): path to inventory data file or to S3 Inventory
+            manifest.json downloaded together with its data files (next to
+            it or in 'data/' subdirectory)
+
+    Returns:
+        Tuple[List[str], Sequence[str]]: data files paths, CSV schema
+    """
+    if not path.endswith(".json"):
+        return [path], DEFAULT_CSV_SCHEMA
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest_dir = os.path.dirname(path)
+    data_files = []
+    for file in manifest["files"]:
+        name = os.path.basename(file["key"])
+        data_file = os.path.join(manifest_dir, "data", name)
+        if not os.path.exists(data_file):
+            data_file = os.path.join(manifest_dir, name)
+        data_files.append(data_file)
+    schema = DEFAULT_CSV_SCHEMA
+    if manifest.get("fileFormat", "CSV").upper() == "CSV":
+        schema = parse_csv_schema(manifest["fileSchema"])
+    return data_files, schema
+
+
+class ManifestScrapper(URLScrapper):
+    """Class that lists urls for malicious and clean files from S3 Inventory
+    style manifest instead of the live listing API.
+
+    Manifest is streamed - every listing reads data files row by row and
+    stops as soon as `n` matching keys were found. Malicious and clean urls
+    are split by prefix in the same pass (see `list_files_urls`).
+    """
+
+    def __init__(
+            self, manifest_path: str, root_url: str,
+            shard: Optional[Tuple[int, int]] = None
+    ) -> None:
+        self.manifest_path = manifest_path
+        self.root_url = root_url
+        self.shard = shard
+
+    def iter_entries(self) -> Iterator[ManifestEntry]:
+        """Streams all manifest entries.
+
+        Yields:
+            Iterator[ManifestEntry]: (key, size, etag)
+        """
+        data_files, schema = resolve_manifest(self.manifest_path)
+        for data_file in data_files:
+            logger.debug(f"Reading manifest data file {data_file}")
+            if data_file.endswith(".parquet"):
+                yield from iter_parquet_entries(data_file)
+            else:
+                yield from iter_csv_entries(data_file, schema)
+
+    def urls_from_manifest(
+            self, counts: Dict[str, int]
+    ) -> Iterator[FileUrl]:
+        """Returns urls of files with given prefixes, all prefixes are
+        filled in single pass over the manifest.
+
+        Args:
+            counts (Dict[str, int]): max entries to return per s3 prefix
+
+        Yields:
+            Iterator[FileUrl]: urls with size and etag, in manifest order
+        """
+        if self.shard is not None:
+            counts = {
+                prefix: get_shard_cnt(n, *self.shard)
+                for prefix, n in counts.items()
+            }
+        cnts_left = {prefix: n for prefix, n in counts.items() if n > 0}
+        if not cnts_left:
+            return
+        for key, size, etag in self.iter_entries():
+            prefix = next(
+                (prefix for prefix in cnts_left if key.startswith(prefix)),
+                None
+                )
+            if prefix is None or "00Tree.html" in key:
+                continue
+            if self.shard is not None:
+                shard, shards = self.shard
+                if get_key_shard(key, prefix, shards) != shard:
+                    continue
+            yield FileUrl(self.root_url, key, size, etag)
+            cnts_left[prefix] -= 1
+            if cnts_left[prefix] <= 0:
+                del cnts_left[prefix]
+                if not cnts_left:
+                    return
+
+    def list_malicious_files_urls(self, n: int) -> Iterator[FileUrl]:
+        """Returns urls of malicious files.
+
+        Args:
+            n (int): max urls to return
+        Returns:
+            Sequence: urls of malicious files
+        """
+        return self.urls_from_manifest({S3_MALICIOUS_PREFIX: n})
+
+    def list_clean_files_urls(self, n: int) -> Iterator[FileUrl]:
+        """Returns urls of clean files.
+
+        Args:
+            n (int): max entries to return
+
+        Returns:
+            Sequence: urls of clean files
+        """
+        return self.urls_from_manifest({S3_CLEAN_PREFIX: n})
+
+    def list_files_urls(
+            self, malicious_cnt: int, clean_cnt: int
+    ) -> Iterator[FileUrl]:
+        """Returns urls of malicious and clean files, listed in single pass
+        over the manifest.
+
+        Args:
+            malicious_cnt (int): max malicious urls to return
+            clean_cnt (int): max clean urls to return
+
+        Returns:
+            Iterator[FileUrl]: urls of malicious and clean files
+        """
+        return self.urls_from_manifest({
+            S3_MALICIOUS_PREFIX: malicious_cnt, S3_CLEAN_PREFIX: clean_cnt
+        })
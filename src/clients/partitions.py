@@ -0,0 +1,274 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from db_models.meta import Meta
+from db_models.summary import MetaSummary
+from db_models.symbols import (DllName, FunctionName, MetaExport,
+                               MetaImport)
+
+logger = logging.getLogger()
+
+META_TABLE = "meta"
+# catch-all partition, split when future partitions are created
+MAX_PARTITION = "pmax"
+PARTITION_PREFIX = "p"
+EXPORT_CHUNK_SIZE = 1000
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[datetime.date]:
+    """Returns month of monthly partition, None for other partitions.
+
+    Args:
+        name (str): partition name ("p202610")
+
+    Returns:
+        Optional[datetime.date]: first day of the month
+    """
+    digits = name[len(PARTITION_PREFIX):]
+    if not name.startswith(PARTITION_PREFIX) or len(digits) != 6 or (
+            not digits.isdigit()
+    ):
+        return None
+    return datetime.date(int(digits[:4]), int(digits[4:]), 1)
+
+
+def partition_definition(month: datetime.date) -> str:
+    return (
+        f"partition {partition_name(month)} "
+        f"values less than ('{add_months(month, 1):%Y-%m-%d}')"
+    )
+
+
+def plan_partitions(
+        partitions: Sequence[str], today: datetime.date, months_ahead: int,
+        retention_months: Optional[int] = None
+) -> Tuple[List[datetime.date], List[str]]:
+    """Plans partitions maintenance.
+
+    Args:
+        partitions (Sequence[str]): existing partition names
+        today (datetime.date): current day
+        months_ahead (int): months after the current one which must have
+            partition
+        retention_months (Optional[int], optional): months kept before
+            the current one, None to keep all. Defaults to None.
+
+    Returns:
+        Tuple[List[datetime.date], List[str]]: months to create partitions
+            for, names of expired partitions (oldest first)
+    """
+    months = sorted(filter(None, map(partition_month, partitions)))
+    current = month_start(today)
+    # new partitions split catch-all one, so they must follow the last
+    # existing partition even when maintenance did not run for a while
+    month = add_months(months[-1], 1) if months else current
+    to_create = []
+    while month <= add_months(current, months_ahead):
+        to_create.append(month)
+        month = add_months(month, 1)
+    expired = []
+    if retention_months is not None:
+        oldest_kept = add_months(current, -retention_months)
+        expired = [
+            partition_name(month) for month in months if month < oldest_kept
+        ]
+    return to_create, expired
+
+
+class MetaPartitions:
+    """Maintains monthly range partitions of MySQL meta table (see
+    migration a7e2c5d9f3b1) - creates future partitions, exports and
+    drops expired ones together with their symbol rows.
+    """
+
+    def __init__(self, session_factory: sessionmaker) -> None:
+        self.session_factory = session_factory
+
+    def list_partitions(self) -> List[str]:
+        with self.session_factory() as session:
+            return session.execute(
+                text(
+                    """select partition_name from information_schema.partitions
+                    where table_schema = database()
+                        and table_name = :table
+                        and partition_name is not null
+                    order by partition_ordinal_position"""
+                ),
+                {"table": META_TABLE}
+            ).scalars().all()
+
+    def create_partitions(self, months: Sequence[datetime.date]) -> None:
+        """Splits catch-all partition into monthly partitions of given
+        (consecutive, following the last monthly partition) months. The
+        catch-all partition is empty unless writes ran ahead of
+        maintenance, so it is cheap.
+
+        Args:
+            months (Sequence[datetime.date]): months to create
+        """
+        if not months:
+            return
+        definitions = ", ".join(
+            [partition_definition(month) for month in months]
+            + [f"partition {MAX_PARTITION} values less than (maxvalue)"]
+        )
+        with self.session_factory() as session:
+            session.execute(text(
+                f"alter table {META_TABLE} reorganize partition "
+                f"{MAX_PARTITION} into ({definitions})"
+            ))
+        logger.info(
+            f"Created partitions {[partition_name(m) for m in months]}"
+            )
+
+    def iter_partition(
+            self, session: Session, name: str,
+            chunk_size: int = EXPORT_CHUNK_SIZE
+    ) -> Iterator[Meta]:
+        """Streams entries of partition with import/export names loaded,
+        in id order, chunk by chunk.
+
+        Args:
+            session (Session): db session
+            name (str): partition name
+            chunk_size (int, optional): entries per query.
+                Defaults to EXPORT_CHUNK_SIZE.
+
+        Yields:
+            Meta: data object
+        """
+        last_id = 0
+        while True:
+            entries = session.execute(
+                select(Meta).from_statement(text(
+                    f"select * from {META_TABLE} partition ({name}) "
+                    "where id > :last_id order by id limit :limit"
+                )),
+                {"last_id": last_id, "limit": chunk_size}
+            ).scalars().all()
+            if not entries:
+                return
+            self.load_symbols(session, entries)
+            yield from entries
+            last_id = entries[-1].id
+
+    def load_symbols(self, session: Session, entries: Sequence[Meta]) -> None:
+        by_id = {entry.id: entry for entry in entries}
+        import_tables: Dict[int, Dict[str, List[str]]] = {}
+        for meta_id, library, function in session.execute(
+            select(MetaImport.meta_id, DllName.name, FunctionName.name)
+            .join(DllName, DllName.id == MetaImport.dll_id)
+            .join(FunctionName, FunctionName.id == MetaImport.function_id)
+            .where(MetaImport.meta_id.in_(by_id))
+            .order_by(MetaImport.meta_id)
+        ):
+            import_tables.setdefault(meta_id, {}).setdefault(
+                library, []
+                ).append(function)
+        export_functions: Dict[int, List[str]] = {}
+        for meta_id, function in session.execute(
+            select(MetaExport.meta_id, FunctionName.name)
+            .join(FunctionName, FunctionName.id == MetaExport.function_id)
+            .where(MetaExport.meta_id.in_(by_id))
+        ):
+            export_functions.setdefault(meta_id, []).append(function)
+        for meta_id, entry in by_id.items():
+            entry.import_table = list(
+                import_tables.get(meta_id, {}).items()
+                ) or None
+            entry.export_functions = export_functions.get(meta_id)
+
+    def export_partition(self, name: str, directory: str) -> str:
+        """Writes partition entries as gzipped JSON lines (records as
+        written by jsonl sink). File appears only when complete, so an
+        existing archive is kept - the partition may be already partially
+        dropped (see `drop_partition`), exporting it again would replace
+        the archive with entries missing their symbols.
+
+        Args:
+            name (str): partition name
+            directory (str): archive directory
+
+        Returns:
+            str: archive path
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{META_TABLE}-{name}.jsonl.gz")
+        if os.path.exists(path):
+            logger.info(f"Partition {name} already exported to {path}")
+            return path
+        tmp_path = f"{path}.tmp"
+        rows_cnt = 0
+        with self.session_factory() as session, \
+                gzip.open(tmp_path, mode="wt", encoding="utf-8") as f:
+            for entry in self.iter_partition(session, name):
+                f.write(json.dumps(entry.to_record(), default=str) + "\n")
+                rows_cnt += 1
+        os.replace(tmp_path, path)
+        logger.info(f"Exported {rows_cnt} rows of partition {name} to {path}")
+        return path
+
+    def drop_summaries(self, session: Session, month: datetime.date) -> None:
+        """Deletes summary rows of the month. Monthly partition holds all
+        entries created in its month, so these rows summarize exactly the
+        partition entries. Unlike subtracting, deleting is idempotent -
+        it may be repeated when dropping the partition failed.
+
+        Args:
+            session (Session): db session
+            month (datetime.date): first day of the month
+        """
+        session.execute(
+            delete(MetaSummary).where(
+                MetaSummary.day >= month,
+                MetaSummary.day < add_months(month, 1)
+            )
+        )
+
+    def drop_partition(self, name: str) -> None:
+        """Drops monthly partition, symbol rows and summary rows of its
+        entries.
+
+        Symbol and summary rows are deleted in one transaction, then the
+        partition is dropped (DDL commits on its own). When the drop fails,
+        rerunning maintenance is safe: the archive exported before is kept,
+        the deletes find nothing more to delete and the drop is retried.
+
+        Args:
+            name (str): partition name
+        """
+        month = partition_month(name)
+        if month is None:
+            raise ValueError(f"Not a monthly partition: {name}")
+        with self.session_factory.begin() as session:
+            for table in (MetaImport.__tablename__, MetaExport.__tablename__):
+                session.execute(text(
+                    f"delete s from {table} s join {META_TABLE} "
+                    f"partition ({name}) m on m.id = s.meta_id"
+                ))
+            self.drop_summaries(session, month)
+        with self.session_factory() as session:
+            session.execute(text(
+                f"alter table {META_TABLE} drop partition {name}"
+            ))
+        logger.info(f"Dropped partition {name}")
@@ -0,0 +1,303 @@
+import cProfile
+import datetime
+import glob
+import json
+import logging
+import os
+import pstats
+import socket
+import sys
+import threading
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+logger = logging.getLogger()
+
+PROFILE_MODE_SAMPLE = "sample"
+PROFILE_MODE_CPROFILE = "cprofile"
+PROFILE_MODES = (PROFILE_MODE_SAMPLE, PROFILE_MODE_CPROFILE)
+
+SAMPLE_INTERVAL = 0.01
+TOP_FUNCTIONS = 50
+MERGED_PREFIX = "merged"
+COLLAPSED_EXT = ".collapsed"
+CPROFILE_EXT = ".prof"
+MEMORY_EXT = ".memory.json"
+
+# shared no-op context returned while profiling is disabled
+NULL_CONTEXT = nullcontext()
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """Sampling profiler - snapshots stacks of all other threads of the
+    process every `interval` seconds and counts them as collapsed stacks
+    ("frame;frame;frame" from the root), the input format of flamegraph
+    tools.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample(self) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(format_frame(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def write(self, path: str) -> None:
+        with open(path, mode="w", encoding="utf-8") as f:
+            for stack, cnt in self.stacks.most_common():
+                f.write(f"{stack} {cnt}\n")
+
+
+class Profiler:
+    """Opt-in profiler of single process.
+
+    While `directory` is set, `profile` blocks run under the sampling
+    profiler or cProfile (`mode`) with tracemalloc tracing, and `stage`
+    blocks record tracemalloc peak memory (above stage start) per stage
+    name. Results are written to `directory` as one file set per profiled
+    block, see `merge_profiles`. When disabled both return shared no-op
+    context, so instrumentation costs just an attribute check.
+
+    Stages may run in many threads at once (concurrent analysis). Traced
+    memory is process wide, so peak of a stage then includes memory of
+    stages running concurrently in other threads.
+    """
+
+    def __init__(
+            self, directory: Optional[str] = None,
+            mode: str = PROFILE_MODE_SAMPLE,
+            interval: float = SAMPLE_INTERVAL
+    ) -> None:
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self._active = False
+        # guards open stages of all threads, peaks and tracemalloc peak
+        self._lock = threading.Lock()
+        self._stages: List[list] = []
+        self._peaks: Dict[str, int] = {}
+
+    def configure(
+            self, directory: Optional[str], mode: str = PROFILE_MODE_SAMPLE
+    ) -> None:
+        """Enables (or disables, for None `directory`) profiling.
+
+        Args:
+            directory (Optional[str]): directory to write profiles to
+            mode (str, optional): one of PROFILE_MODES.
+                Defaults to PROFILE_MODE_SAMPLE.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {repr(mode)}")
+        self.directory = directory
+        self.mode = mode
+
+    def profile(self, name: str):
+        """Profiles the block (nested blocks are not profiled separately).
+
+        Args:
+            name (str): name prefix of written profile files
+        """
+        if self.directory is None or self._active:
+            return NULL_CONTEXT
+        return self._profile(name)
+
+    @contextmanager
+    def _profile(self, name: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory,
+            f"{name}-{socket.gethostname()}-{os.getpid()}-"
+            f"{uuid.uuid4().hex[:8]}"
+            )
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        self._active = True
+        self._stages = []
+        self._peaks = {}
+        if self.mode == PROFILE_MODE_CPROFILE:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(self.interval)
+            sampler.start()
+        try:
+            yield
+        finally:
+            if self.mode == PROFILE_MODE_CPROFILE:
+                profiler.disable()
+                profiler.dump_stats(path + CPROFILE_EXT)
+            else:
+                sampler.stop()
+                sampler.write(path + COLLAPSED_EXT)
+            peaks = dict(self._peaks, total=tracemalloc.get_traced_memory()[1])
+            with open(path + MEMORY_EXT, mode="w", encoding="utf-8") as f:
+                json.dump(peaks, f)
+            self._active = False
+            if started_tracemalloc:
+                tracemalloc.stop()
+            logger.debug(f"Profile written to {path}")
+
+    def stage(self, name: str):
+        """Records peak memory of the block under stage `name`.
+
+        Args:
+            name (str): stage name
+        """
+        if not self._active:
+            return NULL_CONTEXT
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name: str):
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for entry in self._stages:
+                entry[2] = max(entry[2], peak)
+            tracemalloc.reset_peak()
+            # [name, memory at start, peak so far]
+            entry = [name, current, current]
+            self._stages.append(entry)
+        try:
+            yield
+        finally:
+            with self._lock:
+                _, peak = tracemalloc.get_traced_memory()
+                # other threads may have opened stages since, so the entry
+                # is not necessarily the last one
+                self._stages = [
+                    other for other in self._stages if other is not entry
+                ]
+                for other in self._stages:
+                    other[2] = max(other[2], peak)
+                tracemalloc.reset_peak()
+                self._peaks[name] = max(
+                    self._peaks.get(name, 0), max(entry[2], peak) - entry[1]
+                    )
+
+
+def run_profile_dir(directory: str, name: str) -> str:
+    """Returns new directory for profiles of a single run, so concurrent
+    runs sharing `directory` (e.g. work queue workers) never merge each
+    other's (or stale) profiles.
+
+    Args:
+        directory (str): profiles directory
+        name (str): run name prefix
+
+    Returns:
+        str: "<directory>/<name>-<UTC time>-<random suffix>"
+    """
+    return os.path.join(
+        directory,
+        f"{name}-{datetime.datetime.utcnow():%Y%m%dT%H%M%S}-"
+        f"{uuid.uuid4().hex[:8]}"
+        )
+
+
+def merge_profiles(
+        directory: str, top_functions: int = TOP_FUNCTIONS
+) -> Dict[str, str]:
+    """Merges profiles of all workers written to `directory` into:
+    'merged.collapsed' (summed collapsed stacks, flamegraph input),
+    'merged.prof' and 'merged.txt' (cProfile stats and their top
+    functions by cumulative time) and 'merged.memory.json' (max peak
+    memory of every stage over all workers).
+
+    Args:
+        directory (str): profiles directory
+        top_functions (int, optional): number of functions in text report.
+            Defaults to TOP_FUNCTIONS.
+
+    Returns:
+        Dict[str, str]: merged output kind -> written file path
+    """
+    def worker_files(ext: str) -> List[str]:
+        return sorted(
+            path for path in glob.glob(os.path.join(directory, f"*{ext}"))
+            if not os.path.basename(path).startswith(MERGED_PREFIX)
+            )
+
+    outputs = {}
+    merged_path = os.path.join(directory, MERGED_PREFIX)
+
+    stacks: Counter = Counter()
+    for path in worker_files(COLLAPSED_EXT):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, cnt = line.rstrip("\n").rpartition(" ")
+                stacks[stack] += int(cnt)
+    if stacks:
+        outputs["collapsed"] = merged_path + COLLAPSED_EXT
+        with open(outputs["collapsed"], mode="w", encoding="utf-8") as f:
+            for stack, cnt in stacks.most_common():
+                f.write(f"{stack} {cnt}\n")
+
+    cprofile_files = worker_files(CPROFILE_EXT)
+    if cprofile_files:
+        stats = pstats.Stats(*cprofile_files)
+        outputs["cprofile"] = merged_path + CPROFILE_EXT
+        stats.dump_stats(outputs["cprofile"])
+        outputs["text"] = merged_path + ".txt"
+        with open(outputs["text"], mode="w", encoding="utf-8") as f:
+            pstats.Stats(outputs["cprofile"], stream=f).sort_stats(
+                "cumulative"
+                ).print_stats(top_functions)
+
+    peaks: Dict[str, int] = {}
+    for path in worker_files(MEMORY_EXT):
+        with open(path, encoding="utf-8") as f:
+            for stage, peak in json.load(f).items():
+                peaks[stage] = max(peaks.get(stage, 0), peak)
+    if peaks:
+        outputs["memory"] = merged_path + MEMORY_EXT
+        with open(outputs["memory"], mode="w", encoding="utf-8") as f:
+            json.dump(peaks, f, indent=2)
+        logger.info(
+            "Peak memory per stage: " + ", ".join(
+                f"{stage}={peak / 1024 / 1024:.1f}MB"
+                for stage, peak in sorted(peaks.items())
+            )
+        )
+    logger.info(f"Merged profiles: {outputs}")
+    return outputs
+
+
+# profiles this process, see Profiler.configure
+PROFILER = Profiler()
@@ -0,0 +1,342 @@
+import datetime
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+STAGE_LISTED = "listed"
+STAGE_DOWNLOADED = "downloaded"
+STAGE_ANALYSED = "analysed"
+STAGE_WRITTEN = "written"
+STAGES = (STAGE_LISTED, STAGE_DOWNLOADED, STAGE_ANALYSED, STAGE_WRITTEN)
+
+PUSH_INTERVAL = 2.0
+PUSH_TIMEOUT = 2.0
+LOG_INTERVAL = 10.0
+STATUS_PATH = "/status"
+REPORT_PATH = "/report"
+
+
+class ProgressCounters:
+    """Processed items, errors and transferred bytes of pipeline stages.
+    """
+    __slots__ = ('items', 'errors', 'bytes')
+
+    def __init__(self) -> None:
+        self.items = dict.fromkeys(STAGES, 0)
+        self.errors = dict.fromkeys(STAGES, 0)
+        self.bytes = 0
+
+    def merge(self, counters: Dict[str, Any]) -> None:
+        """Adds counters given as dict (see `to_dict`).
+
+        Args:
+            counters (Dict[str, Any]): counters to add
+        """
+        for stage, cnt in counters.get("items", {}).items():
+            self.items[stage] = self.items.get(stage, 0) + cnt
+        for stage, cnt in counters.get("errors", {}).items():
+            self.errors[stage] = self.errors.get(stage, 0) + cnt
+        self.bytes += counters.get("bytes", 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "items": dict(self.items),
+            "errors": dict(self.errors),
+            "bytes": self.bytes,
+        }
+
+
+class ProgressReporter:
+    """Counts progress of single process and pushes it to progress server.
+
+    Counters are kept as deltas since the last push - background thread
+    POSTs them (with current per-stage concurrency) to `url` every
+    `interval` seconds. Without `url` counting costs just a lock.
+    """
+
+    def __init__(
+            self, url: Optional[str] = None, worker_id: Optional[str] = None,
+            interval: float = PUSH_INTERVAL
+    ) -> None:
+        self.url = url
+        self.worker_id = worker_id
+        self.interval = interval
+        self._delta = ProgressCounters()
+        self._in_flight = dict.fromkeys(STAGES, 0)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, url: Optional[str]) -> None:
+        """Sets progress server url and starts pushing thread.
+
+        Args:
+            url (Optional[str]): progress server url, None to only count
+        """
+        self.url = url
+        # thread is not inherited by forked processes
+        if url is not None and (
+                self._thread is None or not self._thread.is_alive()
+        ):
+            self._thread = threading.Thread(
+                target=self._run, name="progress-reporter", daemon=True
+                )
+            self._thread.start()
+
+    def add(
+            self, stage: str, items: int = 1, errors: int = 0,
+            bytes: int = 0
+    ) -> None:
+        """Registers items processed by stage.
+
+        Args:
+            stage (str): stage name, one of STAGES
+            items (int, optional): number of items. Defaults to 1.
+            errors (int, optional): number of errors. Defaults to 0.
+            bytes (int, optional): transferred bytes. Defaults to 0.
+        """
+        with self._lock:
+            self._delta.items[stage] += items
+            self._delta.errors[stage] += errors
+            self._delta.bytes += bytes
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Guards processing of single item by stage - counts it as in
+        flight, then as processed or failed.
+
+        Args:
+            stage (str): stage name, one of STAGES
+        """
+        with self._lock:
+            self._in_flight[stage] += 1
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            with self._lock:
+                self._in_flight[stage] -= 1
+                if success:
+                    self._delta.items[stage] += 1
+                else:
+                    self._delta.errors[stage] += 1
+
+    def take_report(self) -> Dict[str, Any]:
+        """Returns counters collected since the last call and resets them.
+
+        Returns:
+            Dict[str, Any]: report as accepted by progress server
+        """
+        with self._lock:
+            delta, self._delta = self._delta, ProgressCounters()
+            in_flight = dict(self._in_flight)
+        report = delta.to_dict()
+        report.update(
+            worker=(
+                self.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+            ),
+            in_flight=in_flight
+        )
+        return report
+
+    def flush(self) -> None:
+        """Pushes collected counters to progress server now.
+        """
+        if self.url is None:
+            return
+        report = self.take_report()
+        request = urllib.request.Request(
+            self.url + REPORT_PATH, data=json.dumps(report).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+            )
+        try:
+            with urllib.request.urlopen(request, timeout=PUSH_TIMEOUT):
+                pass
+        except OSError as e:
+            logger.debug(f"Progress push to {self.url} failed. {e}")
+            # keep counts for the next push
+            with self._lock:
+                self._delta.merge(report)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+class ProgressHandler(BaseHTTPRequestHandler):
+    """Serves aggregated progress (GET) and accepts worker reports (POST).
+    """
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") not in ("", STATUS_PATH):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.progress.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        if self.path != REPORT_PATH:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            report = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400)
+            return
+        self.server.progress.merge(report)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Progress server: {format % args}")
+
+
+class ProgressServer:
+    """Aggregates progress reports of all workers of the run.
+
+    Serves JSON snapshot at `STATUS_PATH` of local HTTP endpoint and logs
+    compact progress line every `log_interval` seconds. ETA is estimated
+    from `total` expected items and rate of the last finished stage.
+    """
+
+    def __init__(
+            self, port: int, host: Optional[str] = None,
+            total: Optional[int] = None, log_interval: float = LOG_INTERVAL
+    ) -> None:
+        self.port = port
+        self.host = host or socket.gethostname()
+        self.total = total
+        self.log_interval = log_interval
+        self.counters = ProgressCounters()
+        self.in_flight: Dict[str, Dict[str, int]] = {}
+        self.start_time = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def merge(self, report: Dict[str, Any]) -> None:
+        """Adds worker report to totals.
+
+        Args:
+            report (Dict[str, Any]): report of `ProgressReporter`
+        """
+        with self._lock:
+            self.counters.merge(report)
+            self.in_flight[report.get("worker", "")] = report.get(
+                "in_flight", {}
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns aggregated progress.
+
+        Returns:
+            Dict[str, Any]: counters, rates, summed concurrency and ETA
+        """
+        with self._lock:
+            snapshot = self.counters.to_dict()
+            in_flight = dict.fromkeys(STAGES, 0)
+            for worker_in_flight in self.in_flight.values():
+                for stage, cnt in worker_in_flight.items():
+                    in_flight[stage] = in_flight.get(stage, 0) + cnt
+            workers = len(self.in_flight)
+        elapsed = time.monotonic() - self.start_time
+        items = snapshot["items"]
+        done = items[STAGE_WRITTEN] or items[STAGE_ANALYSED]
+        rate = done / elapsed if elapsed else 0.0
+        eta = None
+        if self.total is not None and rate:
+            eta = max(0.0, (self.total - done) / rate)
+        snapshot.update(
+            total=self.total, workers=workers, in_flight=in_flight,
+            elapsed=elapsed, items_per_second=rate,
+            bytes_per_second=snapshot["bytes"] / elapsed if elapsed else 0.0,
+            eta=eta
+        )
+        return snapshot
+
+    def format_snapshot(self, snapshot: Dict[str, Any]) -> str:
+        """Formats snapshot as compact log line.
+        """
+        items = snapshot["items"]
+        in_flight = snapshot["in_flight"]
+        eta = snapshot["eta"]
+        return (
+            "Progress: "
+            + " ".join(
+                f"{stage}={items[stage]}"
+                + (f"({in_flight[stage]})" if in_flight[stage] else "")
+                for stage in STAGES
+            )
+            + f" total={snapshot['total']}"
+            f" errors={sum(snapshot['errors'].values())}"
+            f" rate={snapshot['items_per_second']:.1f}/s"
+            f" {snapshot['bytes_per_second'] / 1024 / 1024:.1f}MB/s"
+            f" workers={snapshot['workers']}"
+            " eta="
+            + (
+                str(datetime.timedelta(seconds=int(eta)))
+                if eta is not None else "?"
+            )
+        )
+
+    def start(self) -> None:
+        """Starts HTTP endpoint and logging thread. When `port` is taken
+        (e.g. by other worker on the same host) random free port is used.
+        """
+        try:
+            self._httpd = ThreadingHTTPServer(("", self.port), ProgressHandler)
+        except OSError as e:
+            logger.warning(f"Progress port {self.port} unavailable. {e}")
+            self._httpd = ThreadingHTTPServer(("", 0), ProgressHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.progress = self
+        self.port = self._httpd.server_address[1]
+        threading.Thread(
+            target=self._httpd.serve_forever, name="progress-server",
+            daemon=True
+            ).start()
+        threading.Thread(
+            target=self._log_progress, name="progress-log", daemon=True
+            ).start()
+        logger.info(f"Progress status at {self.url}{STATUS_PATH}")
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        logger.info(self.format_snapshot(self.snapshot()))
+
+    def _log_progress(self) -> None:
+        while not self._stopped.wait(self.log_interval):
+            logger.info(self.format_snapshot(self.snapshot()))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# counts progress of this process, see ProgressReporter.configure
+PROGRESS = ProgressReporter()
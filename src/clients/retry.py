@@ -0,0 +1,221 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger()
+
+
+class RetryPolicy:
+    """Backoff settings applied to a single class of errors.
+
+    Delays follow "full jitter" exponential backoff - each sleep is drawn
+    uniformly from [0, min(max_delay, base_delay * multiplier ** attempt)],
+    which spreads retries of many concurrent workers over time instead of
+    making them hit the service again in lockstep.
+    """
+    __slots__ = ('name', 'max_attempts', 'base_delay', 'max_delay',
+                 'multiplier')
+
+    def __init__(
+            self, name: str, max_attempts: int = 5, base_delay: float = 0.1,
+            max_delay: float = 10.0, multiplier: float = 2.0
+    ) -> None:
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"name={repr(self.name)}, "
+            f"max_attempts={repr(self.max_attempts)}, "
+            f"base_delay={repr(self.base_delay)}, "
+            f"max_delay={repr(self.max_delay)}"
+            ")"
+        )
+
+    def get_delay(self, attempt: int) -> float:
+        """Calculates sleep time before next attempt.
+
+        Args:
+            attempt (int): number of already failed attempts (1-based)
+
+        Returns:
+            float: seconds to sleep
+        """
+        cap = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+            )
+        return random.uniform(0, cap)
+
+
+# classifier maps raised exception to policy, None means "do not retry"
+ErrorClassifier = Callable[[BaseException], Optional[RetryPolicy]]
+
+
+class AdaptiveLimiter:
+    """AIMD (additive increase, multiplicative decrease) concurrency limiter.
+
+    Works like a semaphore whose size follows the health of the guarded
+    service. Every successful call raises the limit by `increase / limit`
+    (so +`increase` per "window" of `limit` calls), every error or call
+    slower than `latency_target` multiplies it by `decrease_factor`.
+    Decreases are applied at most once per `cooldown` seconds, so a burst
+    of failures of already in-flight calls counts as a single congestion
+    signal.
+    """
+
+    def __init__(
+            self, initial: int, min_limit: int = 1, max_limit: int = 64,
+            increase: float = 1.0, decrease_factor: float = 0.5,
+            latency_target: Optional[float] = None, cooldown: float = 1.0
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Blocks until there is free slot under current limit.
+        """
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, success: bool, latency: float) -> None:
+        """Returns slot and adjusts limit based on call outcome.
+
+        Args:
+            success (bool): whether guarded call succeeded
+            latency (float): guarded call duration in seconds
+        """
+        with self._cond:
+            self._in_flight -= 1
+            congested = not success or (
+                self.latency_target is not None
+                and latency > self.latency_target
+            )
+            if congested:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._limit = max(
+                        self.min_limit, self._limit * self.decrease_factor
+                        )
+                    logger.debug(
+                        f"Limit decreased to {self.limit} "
+                        f"(success={success}, latency={latency:.3f}s)"
+                        )
+            else:
+                self._limit = min(
+                    self.max_limit, self._limit + self.increase / self._limit
+                    )
+            self._cond.notify_all()
+
+    def set_limit(self, limit: int) -> None:
+        """Forces new limit value (clamped to min/max limits).
+
+        Args:
+            limit (int): new concurrency limit
+        """
+        with self._cond:
+            self._limit = float(
+                max(self.min_limit, min(limit, self.max_limit))
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Guards block of code - waits for a slot, measures the block and
+        feeds outcome back into the limit.
+        """
+        self.acquire()
+        start_time = time.monotonic()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            self.release(success, time.monotonic() - start_time)
+
+
+class Retrier:
+    """Calls function and retries it according to per-error-class policies.
+
+    Attempts are counted separately for every policy, so e.g. a throttling
+    response followed by a dropped connection does not exhaust the budget
+    of either. Errors not recognized by the classifier are raised at once.
+    Optional `limiter` guards every single attempt (backoff sleeps are done
+    outside of the limiter slot).
+    """
+
+    def __init__(
+            self, classifier: ErrorClassifier,
+            limiter: Optional[AdaptiveLimiter] = None,
+            sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.classifier = classifier
+        self.limiter = limiter
+        self.sleep = sleep
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Calls `func` with given arguments retrying on transient errors.
+
+        Returns:
+            Any: `func` result
+        """
+        attempts: Dict[str, int] = {}
+        while True:
+            try:
+                if self.limiter is None:
+                    return func(*args, **kwargs)
+                with self.limiter.slot():
+                    return func(*args, **kwargs)
+            except Exception as e:
+                policy = self.classifier(e)
+                if policy is None:
+                    raise
+                attempt = attempts.get(policy.name, 0) + 1
+                attempts[policy.name] = attempt
+                if attempt >= policy.max_attempts:
+                    logger.warning(
+                        f"Giving up {getattr(func, '__name__', func)} after "
+                        f"{attempt} '{policy.name}' errors. {e}"
+                        )
+                    raise
+                delay = policy.get_delay(attempt)
+                logger.debug(
+                    f"Retrying {getattr(func, '__name__', func)} in "
+                    f"{delay:.3f}s after '{policy.name}' error "
+                    f"({attempt}/{policy.max_attempts}). {e}"
+                    )
+                self.sleep(delay)
+
+    def __call__(self, func: Callable) -> Callable:
+        """Allows using instance as a decorator.
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
@@ -1,14 +1,16 @@
 import logging
 import subprocess
+from typing import Sequence
 
 logger = logging.getLogger()
 
 
-def run_cmd(cmd: str, check=True) -> str:
-    """General command execution.
+def run_cmd(cmd: Sequence[str], check=True) -> str:
+    """General command execution. Arguments are passed to the program as
+    they are (no shell, no splitting), so paths may contain spaces.
 
     Args:
-        cmdb (str): command to execute
+        cmd (Sequence[str]): program and its arguments
         check (bool, optional): catch erorrs during cmd execution.
             Defaults to True.
 
@@ -17,13 +19,14 @@ def run_cmd(cmd: str, check=True) -> str:
     """
     try:
         cmdb_response = subprocess.run(
-            cmd.split(),
+            list(cmd),
             capture_output=True,
             check=check
         )
     except subprocess.CalledProcessError as e:
         logger.warning(
-            f"Error while exec cmdb {cmd}. Return code: {e.returncode}. "
+            f"Error while exec cmdb {list(cmd)}. "
+            f"Return code: {e.returncode}. "
             f"Stdout: {e.stdout.decode('utf-8').strip()}. "
             f"Stderr: {e.stderr.decode('utf-8').strip()}"
             )
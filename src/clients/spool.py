@@ -0,0 +1,247 @@
+import atexit
+import fcntl
+import itertools
+import logging
+import os
+import shutil
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger()
+
+SPOOL_DIR_PREFIX = "spool-"
+# bytes reserved by process, next to its spool directory
+USAGE_FILE_EXT = ".used"
+LOCK_FILE_NAME = "lock"
+# reserved for items which size is not known before download
+UNKNOWN_ITEM_SIZE = 16 * 1024 * 1024
+# recheck of host quota while waiting for other processes to free it
+QUOTA_POLL_INTERVAL = 0.1
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # exists, owned by other user
+        return True
+    return True
+
+
+def get_host_prefix() -> str:
+    return f"{SPOOL_DIR_PREFIX}{socket.gethostname()}-"
+
+
+def read_host_usage(
+        root: str, prefix: str, exclude_pid: Optional[int] = None
+) -> int:
+    """Sums bytes reserved in spool `root` by alive processes of this host.
+
+    Args:
+        root (str): spool root directory
+        prefix (str): host prefix of spool entries
+        exclude_pid (Optional[int], optional): process not to count.
+            Defaults to None.
+
+    Returns:
+        int: reserved bytes
+    """
+    used = 0
+    for entry in os.scandir(root):
+        name = entry.name
+        if not name.startswith(prefix) or not name.endswith(USAGE_FILE_EXT):
+            continue
+        pid = name[len(prefix):-len(USAGE_FILE_EXT)]
+        if not pid.isdigit() or int(pid) == exclude_pid or (
+                not is_process_alive(int(pid))
+        ):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as f:
+                used += int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            continue
+    return used
+
+
+def choose_spool_root(
+        directory: str, tmpfs_dir: Optional[str], quota: int
+) -> str:
+    """Returns tmpfs directory when configured, usable and big enough for
+    the quota (host wide, shared with processes already spooling there),
+    `directory` otherwise.
+
+    Args:
+        directory (str): default (disk) spool directory
+        tmpfs_dir (Optional[str]): preferred (memory) spool directory
+        quota (int): host spool quota in bytes
+
+    Returns:
+        str: spool root directory
+    """
+    if tmpfs_dir is None:
+        return directory
+    try:
+        os.makedirs(tmpfs_dir, exist_ok=True)
+        # space reserved by other processes is part of the same quota
+        free = shutil.disk_usage(tmpfs_dir).free + read_host_usage(
+            tmpfs_dir, get_host_prefix()
+            )
+    except OSError as e:
+        logger.warning(f"Spool tmpfs {tmpfs_dir} unavailable. {e}")
+        return directory
+    if free < quota:
+        logger.warning(
+            f"Spool tmpfs {tmpfs_dir} has {free} bytes free, less than "
+            f"quota {quota}. Using {directory}"
+            )
+        return directory
+    return tmpfs_dir
+
+
+class Spool:
+    """Local storage of downloaded files of processes of this host.
+
+    Every item gets unique path in process own subdirectory of `root`
+    and is deleted right after use. Sizes of items in use by all processes
+    of the host spooling to `root` (e.g. Spark Python workers, one per
+    core) are summed against `quota` - `item` waits while the item would
+    not fit (an item bigger than the whole quota waits for empty spool).
+    Every process keeps its reserved bytes in its usage file, updated
+    under host lock file. Entries left by dead processes of this host are
+    removed on start and not counted.
+    """
+
+    def __init__(self, root: str, quota: int) -> None:
+        self.root = root
+        self.quota = quota
+        self.pid = os.getpid()
+        self.prefix = get_host_prefix()
+        self.directory = os.path.join(root, f"{self.prefix}{self.pid}")
+        self.usage_path = self.directory + USAGE_FILE_EXT
+        self.lock_path = os.path.join(root, self.prefix + LOCK_FILE_NAME)
+        self.used = 0
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        os.makedirs(root, exist_ok=True)
+        self.remove_stale()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def remove_stale(self) -> None:
+        """Removes spool subdirectories and usage files of dead processes
+        of this host.
+        """
+        for entry in os.scandir(self.root):
+            if not entry.name.startswith(self.prefix):
+                continue
+            pid = entry.name[len(self.prefix):]
+            if not entry.is_dir():
+                if not pid.endswith(USAGE_FILE_EXT):
+                    continue
+                pid = pid[:-len(USAGE_FILE_EXT)]
+            if not pid.isdigit() or is_process_alive(int(pid)):
+                continue
+            logger.info(f"Removing stale spool {entry.path}")
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+
+    def close(self) -> None:
+        # exit handlers are inherited by forked processes
+        if os.getpid() == self.pid:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            try:
+                os.remove(self.usage_path)
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def host_lock(self):
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _update_usage(self, size: int) -> None:
+        # under host lock
+        self.used += size
+        with open(self.usage_path, mode="w", encoding="utf-8") as f:
+            f.write(str(self.used))
+
+    def _reserve(self, size: int) -> bool:
+        with self.host_lock():
+            host_used = self.used + read_host_usage(
+                self.root, self.prefix, exclude_pid=self.pid
+                )
+            if host_used and host_used + size > self.quota:
+                return False
+            self._update_usage(size)
+            return True
+
+    @contextmanager
+    def item(self, name: str, size: Optional[int] = None):
+        """Reserves quota for the item and yields its unique path. The file
+        (if created) is deleted on exit.
+
+        Args:
+            name (str): file name, kept as path suffix
+            size (Optional[int], optional): expected file size.
+                Defaults to UNKNOWN_ITEM_SIZE.
+
+        Yields:
+            str: item path
+        """
+        size = UNKNOWN_ITEM_SIZE if size is None else size
+        with self._cond:
+            while not self._reserve(size):
+                # released by this process (notified) or by others (polled)
+                self._cond.wait(QUOTA_POLL_INTERVAL)
+            path = os.path.join(
+                self.directory, f"{next(self._counter)}-{name}"
+                )
+        try:
+            yield path
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            with self._cond:
+                with self.host_lock():
+                    self._update_usage(-size)
+                self._cond.notify_all()
+
+
+_process_spool: Optional[Spool] = None
+
+
+def get_process_spool(
+        directory: str, quota: int, tmpfs_dir: Optional[str] = None
+) -> Spool:
+    """Returns spool of this process, created on first use.
+
+    Args:
+        directory (str): default (disk) spool directory
+        quota (int): host spool quota in bytes
+        tmpfs_dir (Optional[str], optional): preferred (memory) spool
+            directory. Defaults to None.
+
+    Returns:
+        Spool: spool instance
+    """
+    global _process_spool
+    # forked process must not share parent's spool
+    if _process_spool is None or _process_spool.pid != os.getpid():
+        _process_spool = Spool(
+            choose_spool_root(directory, tmpfs_dir, quota), quota
+            )
+        atexit.register(_process_spool.close)
+        logger.debug(f"Spool at {_process_spool.directory}")
+    return _process_spool
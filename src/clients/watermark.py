@@ -0,0 +1,51 @@
+import datetime
+import logging
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+from db_models.watermark import IngestWatermark
+
+logger = logging.getLogger()
+
+# (last modified, key) of the newest ingested object
+Watermark = Tuple[Optional[datetime.datetime], Optional[str]]
+
+
+class WatermarkStore:
+    """Db table backed high-water marks of continuous ingestion, one per
+    S3 prefix.
+    """
+
+    def __init__(self, session_factory: sessionmaker) -> None:
+        self.session_factory = session_factory
+
+    def get(self, prefix: str) -> Watermark:
+        """Returns watermark of prefix.
+
+        Args:
+            prefix (str): S3 prefix
+
+        Returns:
+            Watermark: (last modified, key), (None, None) when nothing was
+                ingested yet
+        """
+        with self.session_factory() as session:
+            watermark = session.get(IngestWatermark, prefix)
+            if watermark is None:
+                return None, None
+            return watermark.last_modified, watermark.last_key
+
+    def save(self, prefix: str, watermark: Watermark) -> None:
+        """Stores watermark of prefix.
+
+        Args:
+            prefix (str): S3 prefix
+            watermark (Watermark): (last modified, key)
+        """
+        last_modified, last_key = watermark
+        with self.session_factory.begin() as session:
+            session.merge(IngestWatermark(
+                prefix=prefix, last_modified=last_modified, last_key=last_key
+            ))
+        logger.debug(f"Watermark of {prefix} saved: {watermark}")
@@ -1,21 +1,54 @@
 import logging
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from envs import HTTP_POOL_CONNECTIONS
 
 logger = logging.getLogger()
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = (10, 60)
+
+
+def create_session(pool_connections: int) -> requests.Session:
+    """Creates session keeping up to `pool_connections` connections alive
+    per host.
+
+    Args:
+        pool_connections (int): connection pool size
+
+    Returns:
+        requests.Session: session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_connections
+        )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# reused by all downloads of single process
+SESSION = create_session(HTTP_POOL_CONNECTIONS)
+
 
-def download_file(src: str, dest: str) -> None:
-    """Downloads file via GET.
+def download_file(
+        src: str, dest: str, session: requests.Session = SESSION
+) -> None:
+    """Downloads file via GET streaming it to disk in chunks.
 
     Args:
         src (str): source url to download file from
         dest (str): local target path to download file to
+        session (requests.Session, optional): session to reuse connections
+            of. Defaults to SESSION.
     """
     logger.debug(f"Downloading from {src} to {dest}")
-    # Consider stream
-    r = requests.get(src)
-    if r.status_code == 200:
-        with open(dest, mode='wb') as f:
-            f.write(r.content)
+    with session.get(src, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+        if r.status_code == 200:
+            with open(dest, mode='wb') as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
     logger.debug(f"File {dest} saved")
@@ -0,0 +1,226 @@
+import datetime
+import logging
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from db_models.work_queue import (WORK_ITEM_DONE, WORK_ITEM_FAILED,
+                                  WORK_ITEM_LEASED, WORK_ITEM_PENDING,
+                                  WorkItem)
+
+logger = logging.getLogger()
+
+
+def db_utcnow(session: Session) -> datetime.datetime:
+    """Returns current UTC time of db server, so leases of workers on
+    different hosts are compared against the same clock.
+
+    Args:
+        session (Session): db session
+
+    Returns:
+        datetime.datetime: naive UTC time
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return datetime.datetime.fromisoformat(
+            session.execute(select(func.datetime("now"))).scalar()
+            )
+    return session.execute(select(func.utc_timestamp())).scalar()
+
+
+class WorkQueue:
+    """Db table backed queue of S3 keys shared by many collectors.
+
+    Workers claim batches with "select ... for update skip locked", so
+    concurrent workers never block on (or get) the same rows. Claimed items
+    are leased - if worker crashes, the lease expires and the items are
+    claimable again. Lease times come from db server clock. Workers renew
+    leases of items still in progress and finish items one by one. Items
+    failing `max_attempts` times are marked failed.
+    """
+
+    def __init__(
+            self, session_factory: sessionmaker, max_attempts: int = 3
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+
+    def enqueue(self, paths: Iterable[str]) -> None:
+        """Adds keys to queue. Already known keys are ignored.
+
+        Args:
+            paths (Iterable[str]): S3 keys
+        """
+        rows = [{"path": path} for path in paths]
+        if not rows:
+            return
+        with self.session_factory.begin() as session:
+            session.execute(
+                insert(WorkItem)
+                .prefix_with("IGNORE", dialect="mysql")
+                .prefix_with("OR IGNORE", dialect="sqlite"),
+                rows
+            )
+        logger.debug(f"Enqueued {len(rows)} items")
+
+    def claim(
+            self, worker_id: str, n: int, lease_seconds: int
+    ) -> List[Tuple[int, str]]:
+        """Leases up to `n` pending (or expired) items to worker. Expired
+        leases of items out of attempts (worker crashed on the last one)
+        are marked failed.
+
+        Args:
+            worker_id (str): unique worker name
+            n (int): max items to claim
+            lease_seconds (int): lease duration
+
+        Returns:
+            List[Tuple[int, str]]: claimed (id, path) pairs
+        """
+        with self.session_factory.begin() as session:
+            now = db_utcnow(session)
+            session.execute(
+                update(WorkItem)
+                .where(
+                    WorkItem.status == WORK_ITEM_LEASED,
+                    WorkItem.lease_expires < now,
+                    WorkItem.attempts >= self.max_attempts
+                )
+                .values(
+                    status=WORK_ITEM_FAILED, lease_owner=None,
+                    lease_expires=None
+                )
+            )
+            items = session.execute(
+                select(WorkItem.id, WorkItem.path)
+                .where(
+                    or_(
+                        WorkItem.status == WORK_ITEM_PENDING,
+                        and_(
+                            WorkItem.status == WORK_ITEM_LEASED,
+                            WorkItem.lease_expires < now
+                        )
+                    ),
+                    WorkItem.attempts < self.max_attempts
+                )
+                .order_by(WorkItem.id)
+                .limit(n)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if items:
+                session.execute(
+                    update(WorkItem)
+                    .where(WorkItem.id.in_([id for id, _ in items]))
+                    .values(
+                        status=WORK_ITEM_LEASED, lease_owner=worker_id,
+                        lease_expires=now + datetime.timedelta(
+                            seconds=lease_seconds
+                            ),
+                        attempts=WorkItem.attempts + 1
+                    )
+                )
+        logger.debug(f"Worker {worker_id} claimed {len(items)} items")
+        return [(id, path) for id, path in items]
+
+    def renew(
+            self, worker_id: str, ids: Iterable[int], lease_seconds: int
+    ) -> int:
+        """Extends leases of items still leased by worker.
+
+        Args:
+            worker_id (str): unique worker name
+            ids (Iterable[int]): ids of claimed items
+            lease_seconds (int): lease duration from now
+
+        Returns:
+            int: number of renewed leases
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        with self.session_factory.begin() as session:
+            renewed_cnt = session.execute(
+                update(WorkItem)
+                .where(
+                    WorkItem.id.in_(ids),
+                    WorkItem.lease_owner == worker_id,
+                    WorkItem.status == WORK_ITEM_LEASED
+                )
+                .values(
+                    lease_expires=db_utcnow(session) + datetime.timedelta(
+                        seconds=lease_seconds
+                        )
+                )
+            ).rowcount
+        if renewed_cnt < len(ids):
+            logger.warning(
+                f"Worker {worker_id} lost {len(ids) - renewed_cnt} leases"
+                )
+        return renewed_cnt
+
+    def complete(self, worker_id: str, ids: Iterable[int]) -> None:
+        """Marks items leased by worker as done.
+
+        Args:
+            worker_id (str): unique worker name
+            ids (Iterable[int]): ids of claimed items
+        """
+        self._finish(worker_id, ids, WORK_ITEM_DONE)
+
+    def release(self, worker_id: str, ids: Iterable[int]) -> None:
+        """Returns items leased by worker back to queue (or marks them
+        failed when they run out of attempts).
+
+        Args:
+            worker_id (str): unique worker name
+            ids (Iterable[int]): ids of claimed items
+        """
+        ids = list(ids)
+        self._finish(worker_id, ids, WORK_ITEM_PENDING)
+        with self.session_factory.begin() as session:
+            session.execute(
+                update(WorkItem)
+                .where(
+                    WorkItem.id.in_(ids),
+                    WorkItem.status == WORK_ITEM_PENDING,
+                    WorkItem.attempts >= self.max_attempts
+                )
+                .values(status=WORK_ITEM_FAILED)
+            )
+
+    def _finish(self, worker_id: str, ids: Iterable[int], status: str) -> None:
+        with self.session_factory.begin() as session:
+            session.execute(
+                update(WorkItem)
+                .where(
+                    WorkItem.id.in_(list(ids)),
+                    WorkItem.lease_owner == worker_id,
+                    WorkItem.status == WORK_ITEM_LEASED
+                )
+                .values(
+                    status=status, lease_owner=None, lease_expires=None
+                )
+            )
+
+    def count_unfinished(self) -> int:
+        """Counts items that are pending (with attempts left) or leased.
+
+        Returns:
+            int: number of unfinished items
+        """
+        with self.session_factory() as session:
+            return session.execute(
+                select(func.count())
+                .select_from(WorkItem)
+                .where(
+                    or_(
+                        and_(
+                            WorkItem.status == WORK_ITEM_PENDING,
+                            WorkItem.attempts < self.max_attempts
+                        ),
+                        WorkItem.status == WORK_ITEM_LEASED
+                    )
+                )
+            ).scalar()
@@ -1,12 +1,16 @@
 import datetime
+from typing import Any, Dict
 
-from sqlalchemy import (BIGINT, INT, VARBINARY, VARCHAR, Column, DateTime,
-                        Sequence)
+from sqlalchemy import (BIGINT, INT, INTEGER, VARBINARY, VARCHAR, Column,
+                        DateTime)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 metadata = Base.metadata
 
+LABEL_MALICIOUS = "malicious"
+LABEL_CLEAN = "clean"
+
 
 class Meta(Base):
     __tablename__ = 'meta'
@@ -15,7 +19,11 @@ class Meta(Base):
         return (
             f"{type(self).__name__}("
             f"hash={repr(self.hash)}, "
+            f"etag={repr(self.etag)}, "
+            f"sha256={repr(self.sha256)}, "
+            f"imphash={repr(self.imphash)}, "
             f"path={repr(self.path)}, "
+            f"label={repr(self.label)}, "
             f"size={repr(self.size)}, "
             f"extension={repr(self.extension)}, "
             f"arch={repr(self.arch)}, "
@@ -24,16 +32,60 @@ class Meta(Base):
             ")"
             )
 
+    # sqlite auto increments only 'INTEGER PRIMARY KEY' columns; MySQL
+    # table is range partitioned by `created`, so its primary key is
+    # (id, created) - auto incremented id alone stays unique
     id = Column(
-        BIGINT, Sequence('meta_id_seq', cycle=True), primary_key=True
+        BIGINT().with_variant(INTEGER(), "sqlite"), primary_key=True,
+        autoincrement=True
     )
     created = Column(
-        DateTime(), default=datetime.datetime.utcnow, nullable=False
+        DateTime(), default=datetime.datetime.utcnow, nullable=False,
+        index=True
     )
-    hash = Column(VARBINARY(32), nullable=False)
+    # content MD5, None for headers only analysis (see `etag`)
+    hash = Column(VARBINARY(32), nullable=True)
+    # S3 ETag as listed - "<md5>" or, for multipart uploads,
+    # "<md5 of part digests>-<parts count>"
+    etag = Column(VARCHAR(64), nullable=True, index=True)
+    sha256 = Column(VARBINARY(64), nullable=True, index=True)
+    imphash = Column(VARBINARY(32), nullable=True, index=True)
     path = Column(VARCHAR(260), nullable=False)
+    # LABEL_MALICIOUS or LABEL_CLEAN, by bucket prefix of the path
+    label = Column(VARCHAR(16), nullable=True, index=True)
     size = Column(BIGINT(), nullable=False)
     extension = Column(VARCHAR(6), nullable=False)
     arch = Column(VARCHAR(16), nullable=True)
     imports = Column(INT(), nullable=True)
     exports = Column(INT(), nullable=True)
+
+    # not mapped - analysis results persisted into normalized symbol tables
+    # (see db_models.symbols) together with the row itself
+    import_table = None
+    export_functions = None
+
+    def to_record(self) -> Dict[str, Any]:
+        """Converts entry to plain dict for non-relational outputs.
+
+        Returns:
+            Dict[str, Any]: column values plus import/export names
+        """
+        record = {
+            column.name: getattr(self, column.name)
+            for column in self.__table__.columns
+        }
+        for column in ("hash", "sha256", "imphash"):
+            if record[column] is not None:
+                record[column] = record[column].decode()
+        if record["created"] is None:
+            record["created"] = datetime.datetime.utcnow()
+        record["import_libraries"] = [
+            library for library, _ in self.import_table or ()
+        ]
+        record["import_functions"] = [
+            f"{library.lower()}!{function}"
+            for library, functions in self.import_table or ()
+            for function in functions
+        ]
+        record["export_functions"] = list(self.export_functions or ())
+        return record
@@ -0,0 +1,150 @@
+import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import BIGINT, VARCHAR, Column, Date, insert, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from db_models.meta import Base, Meta
+
+# label, extension, arch, day
+SummaryKey = Tuple[str, str, str, datetime.date]
+SUMMARY_KEY_COLUMNS = ("label", "extension", "arch", "day")
+SUMMARY_COUNTERS = (
+    "files", "total_size", "files_with_imports", "imports_sum",
+    "files_with_exports", "exports_sum",
+)
+
+
+class MetaSummary(Base):
+    """Per label/extension/arch/day aggregates of meta table, updated
+    together with inserted rows, so stats do not scan meta table.
+
+    Missing label or arch is stored as empty string - key columns are
+    part of primary key.
+    """
+    __tablename__ = 'meta_summary'
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}("
+            f"label={repr(self.label)}, "
+            f"extension={repr(self.extension)}, "
+            f"arch={repr(self.arch)}, "
+            f"day={repr(self.day)}, "
+            f"files={repr(self.files)}, "
+            f"total_size={repr(self.total_size)}"
+            ")"
+            )
+
+    label = Column(VARCHAR(16), primary_key=True, server_default="")
+    extension = Column(VARCHAR(6), primary_key=True, server_default="")
+    arch = Column(VARCHAR(16), primary_key=True, server_default="")
+    day = Column(Date(), primary_key=True)
+    files = Column(BIGINT(), nullable=False, default=0)
+    total_size = Column(BIGINT(), nullable=False, default=0)
+    files_with_imports = Column(BIGINT(), nullable=False, default=0)
+    imports_sum = Column(BIGINT(), nullable=False, default=0)
+    files_with_exports = Column(BIGINT(), nullable=False, default=0)
+    exports_sum = Column(BIGINT(), nullable=False, default=0)
+
+
+def summarize(entries: Sequence[Meta]) -> Dict[SummaryKey, Dict[str, int]]:
+    """Aggregates entries by summary key.
+
+    Args:
+        entries (Sequence[Meta]): data objects with `created` set
+
+    Returns:
+        Dict[SummaryKey, Dict[str, int]]: key -> SUMMARY_COUNTERS values
+    """
+    summaries: Dict[SummaryKey, Dict[str, int]] = {}
+    for entry in entries:
+        key = (
+            entry.label or "", entry.extension or "", entry.arch or "",
+            entry.created.date()
+        )
+        counters = summaries.setdefault(
+            key, dict.fromkeys(SUMMARY_COUNTERS, 0)
+            )
+        counters["files"] += 1
+        counters["total_size"] += entry.size
+        if entry.imports is not None:
+            counters["files_with_imports"] += 1
+            counters["imports_sum"] += entry.imports
+        if entry.exports is not None:
+            counters["files_with_exports"] += 1
+            counters["exports_sum"] += entry.exports
+    return summaries
+
+
+def add_summaries(session: Session, entries: Sequence[Meta]) -> None:
+    """Adds given (already added) entries to summary table within the same
+    session transaction - one upsert row per summary key (update or
+    insert on dialects without upsert support).
+
+    Args:
+        session (Session): db session the entries were added to
+        entries (Sequence[Meta]): data objects
+    """
+    if not entries:
+        return
+    # applies `created` defaults
+    session.flush()
+    rows = [
+        dict(zip(SUMMARY_KEY_COLUMNS, key), **counters)
+        # sorted - concurrent writers lock summary rows in the same order
+        for key, counters in sorted(summarize(entries).items())
+    ]
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(MetaSummary)
+        statement = statement.on_duplicate_key_update({
+            name: getattr(MetaSummary, name) + getattr(
+                statement.inserted, name
+                )
+            for name in SUMMARY_COUNTERS
+        })
+    elif dialect == "sqlite":
+        statement = sqlite.insert(MetaSummary)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(SUMMARY_KEY_COLUMNS),
+            set_={
+                name: getattr(MetaSummary, name) + getattr(
+                    statement.excluded, name
+                    )
+                for name in SUMMARY_COUNTERS
+            }
+        )
+    else:
+        update_or_insert_summaries(session, rows)
+        return
+    session.execute(statement, rows)
+
+
+def update_or_insert_summaries(
+        session: Session, rows: List[Dict[str, Any]]
+) -> None:
+    """Portable (no upsert) variant of adding summary rows - increments
+    counters of existing rows and inserts missing ones, row by row. Two
+    writers inserting the same new key at once make one of transactions
+    fail on primary key, like any other conflicting write.
+
+    Args:
+        session (Session): db session
+        rows (List[Dict[str, Any]]): summary key columns and counters
+    """
+    for row in rows:
+        updated_cnt = session.execute(
+            update(MetaSummary)
+            .where(*[
+                getattr(MetaSummary, name) == row[name]
+                for name in SUMMARY_KEY_COLUMNS
+            ])
+            .values({
+                name: getattr(MetaSummary, name) + row[name]
+                for name in SUMMARY_COUNTERS
+            })
+        ).rowcount
+        if not updated_cnt:
+            session.execute(insert(MetaSummary).values(row))
@@ -0,0 +1,195 @@
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import (BIGINT, INT, VARCHAR, Column, Index, String, insert,
+                        select)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from db_models.meta import Base, Meta
+
+NAME_MAX_LENGTH = 255
+# names are case sensitive (function names) - compare them binary in MySQL
+NAME_TYPE = String(NAME_MAX_LENGTH).with_variant(
+    VARCHAR(NAME_MAX_LENGTH, collation="utf8mb4_bin"), "mysql"
+    )
+
+
+class DllName(Base):
+    """Interned imported library names (lowercased).
+    """
+    __tablename__ = 'dll_name'
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={repr(self.name)})"
+
+    id = Column(INT, primary_key=True, autoincrement=True)
+    name = Column(NAME_TYPE, nullable=False, unique=True)
+
+
+class FunctionName(Base):
+    """Interned imported and exported function names.
+    """
+    __tablename__ = 'function_name'
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={repr(self.name)})"
+
+    id = Column(INT, primary_key=True, autoincrement=True)
+    name = Column(NAME_TYPE, nullable=False, unique=True)
+
+
+class MetaImport(Base):
+    """Sample -> (library, function) import mapping.
+    """
+    __tablename__ = 'meta_import'
+    __table_args__ = (
+        Index('ix_meta_import_function_dll', 'function_id', 'dll_id'),
+        Index('ix_meta_import_dll', 'dll_id'),
+    )
+
+    meta_id = Column(BIGINT, primary_key=True, autoincrement=False)
+    dll_id = Column(INT, primary_key=True, autoincrement=False)
+    function_id = Column(INT, primary_key=True, autoincrement=False)
+
+
+class MetaExport(Base):
+    """Sample -> exported function mapping.
+    """
+    __tablename__ = 'meta_export'
+    __table_args__ = (
+        Index('ix_meta_export_function', 'function_id'),
+    )
+
+    meta_id = Column(BIGINT, primary_key=True, autoincrement=False)
+    function_id = Column(INT, primary_key=True, autoincrement=False)
+
+
+def clip_name(name: str) -> str:
+    return name[:NAME_MAX_LENGTH]
+
+
+def intern_names(
+        engine: Engine, model: Base, names: Iterable[str]
+) -> Dict[str, int]:
+    """Returns ids of given names, inserting missing ones.
+
+    Existing names are looked up first, so auto increment values are not
+    burned by ignored duplicate inserts. Missing names are inserted with
+    "insert ignore" and looked up again, every step in its own short
+    transaction on separate connection - a transaction with older
+    snapshot (e.g. MySQL REPEATABLE READ batch transaction) would not see
+    names committed meanwhile by concurrent writers.
+
+    Args:
+        engine (Engine): db engine
+        model (Base): DllName or FunctionName
+        names (Iterable[str]): names to intern
+
+    Returns:
+        Dict[str, int]: name -> id
+    """
+    names = set(names)
+    if not names:
+        return {}
+    query = select(model.id, model.name)
+    with engine.connect() as connection:
+        with connection.begin():
+            ids = {
+                name: id
+                for id, name in connection.execute(
+                    query.where(model.name.in_(names))
+                )
+            }
+        missing = names.difference(ids)
+        if missing:
+            with connection.begin():
+                connection.execute(
+                    insert(model)
+                    .prefix_with("IGNORE", dialect="mysql")
+                    .prefix_with("OR IGNORE", dialect="sqlite"),
+                    [{"name": name} for name in sorted(missing)]
+                )
+            with connection.begin():
+                ids.update(
+                    (name, id)
+                    for id, name in connection.execute(
+                        query.where(model.name.in_(missing))
+                    )
+                )
+    return ids
+
+
+def intern_symbols(
+        engine: Engine, entries: Sequence[Meta]
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Interns import/export names of given entries. Must be called before
+    the batch transaction writes - sqlite allows only one writer.
+
+    Args:
+        engine (Engine): db engine
+        entries (Sequence[Meta]): data objects with analysis results
+
+    Returns:
+        Tuple[Dict[str, int], Dict[str, int]]: dll name -> id, function
+            name -> id
+    """
+    dll_ids = intern_names(engine, DllName, (
+        clip_name(library.lower())
+        for entry in entries
+        for library, _ in entry.import_table or ()
+    ))
+    function_ids = intern_names(engine, FunctionName, {
+        clip_name(function)
+        for entry in entries
+        for _, functions in entry.import_table or ()
+        for function in functions
+    }.union(
+        clip_name(function)
+        for entry in entries
+        for function in entry.export_functions or ()
+    ))
+    return dll_ids, function_ids
+
+
+def add_symbols(
+        session: Session, entries: Sequence[Meta], dll_ids: Dict[str, int],
+        function_ids: Dict[str, int]
+) -> None:
+    """Bulk inserts import/export names of given (already added) entries
+    within the same session transaction.
+
+    Args:
+        session (Session): db session the entries were added to
+        entries (Sequence[Meta]): data objects with analysis results
+        dll_ids (Dict[str, int]): interned dll names, see `intern_symbols`
+        function_ids (Dict[str, int]): interned function names
+    """
+    if not any(e.import_table or e.export_functions for e in entries):
+        return
+    # assigns ids to new entries
+    session.flush()
+
+    import_rows = {
+        (
+            entry.id, dll_ids[clip_name(library.lower())],
+            function_ids[clip_name(function)]
+        )
+        for entry in entries
+        for library, functions in entry.import_table or ()
+        for function in functions
+    }
+    export_rows = {
+        (entry.id, function_ids[clip_name(function)])
+        for entry in entries
+        for function in entry.export_functions or ()
+    }
+    if import_rows:
+        session.execute(insert(MetaImport), [
+            {"meta_id": meta_id, "dll_id": dll_id, "function_id": function_id}
+            for meta_id, dll_id, function_id in import_rows
+        ])
+    if export_rows:
+        session.execute(insert(MetaExport), [
+            {"meta_id": meta_id, "function_id": function_id}
+            for meta_id, function_id in export_rows
+        ])
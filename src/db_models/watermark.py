@@ -0,0 +1,29 @@
+import datetime
+
+from sqlalchemy import VARCHAR, Column, DateTime
+
+from db_models.meta import Base
+
+
+class IngestWatermark(Base):
+    """Newest already ingested object (by LastModified, then key) of S3
+    prefix.
+    """
+    __tablename__ = 'ingest_watermark'
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}("
+            f"prefix={repr(self.prefix)}, "
+            f"last_modified={repr(self.last_modified)}, "
+            f"last_key={repr(self.last_key)}"
+            ")"
+            )
+
+    prefix = Column(VARCHAR(64), primary_key=True)
+    last_modified = Column(DateTime(), nullable=True)
+    last_key = Column(VARCHAR(260), nullable=True)
+    updated = Column(
+        DateTime(), default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow, nullable=False
+    )
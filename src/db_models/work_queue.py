@@ -0,0 +1,45 @@
+import datetime
+
+from sqlalchemy import BIGINT, INT, INTEGER, VARCHAR, Column, DateTime, Index
+
+from db_models.meta import Base
+
+WORK_ITEM_PENDING = "pending"
+WORK_ITEM_LEASED = "leased"
+WORK_ITEM_DONE = "done"
+WORK_ITEM_FAILED = "failed"
+
+
+class WorkItem(Base):
+    """S3 key waiting to be (or already) processed by one of collectors.
+    """
+    __tablename__ = 'work_item'
+    __table_args__ = (
+        Index('ix_work_item_status_lease', 'status', 'lease_expires'),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}("
+            f"path={repr(self.path)}, "
+            f"status={repr(self.status)}, "
+            f"lease_owner={repr(self.lease_owner)}, "
+            f"attempts={repr(self.attempts)}"
+            ")"
+            )
+
+    # sqlite auto increments only 'INTEGER PRIMARY KEY' columns
+    id = Column(
+        BIGINT().with_variant(INTEGER(), "sqlite"), primary_key=True,
+        autoincrement=True
+    )
+    created = Column(
+        DateTime(), default=datetime.datetime.utcnow, nullable=False
+    )
+    path = Column(VARCHAR(260), nullable=False, unique=True)
+    status = Column(
+        VARCHAR(8), default=WORK_ITEM_PENDING, nullable=False
+    )
+    lease_owner = Column(VARCHAR(64), nullable=True)
+    lease_expires = Column(DateTime(), nullable=True)
+    attempts = Column(INT(), default=0, nullable=False)
@@ -1,4 +1,24 @@
-from clients.aws import get_bucket_and_boto3_from_url
-from envs import S3_STORAGE_URL
+from clients.aws import (classify_s3_error, get_bucket_and_boto3_from_url,
+                         get_transfer_manager)
+from clients.retry import AdaptiveLimiter, Retrier
+from envs import (S3_LATENCY_TARGET, S3_MAX_CONCURRENCY,
+                  S3_MAX_POOL_CONNECTIONS, S3_MULTIPART_CHUNKSIZE,
+                  S3_MULTIPART_THRESHOLD, S3_STORAGE_URL,
+                  S3_TRANSFER_CONCURRENCY)
 
-BUCKET, BOTO3_CLIENT = get_bucket_and_boto3_from_url(S3_STORAGE_URL)
+BUCKET, BOTO3_CLIENT = get_bucket_and_boto3_from_url(
+    S3_STORAGE_URL, max_pool_connections=S3_MAX_POOL_CONNECTIONS
+    )
+# shared by all downloads of single process
+S3_TRANSFER_MANAGER = get_transfer_manager(
+    BOTO3_CLIENT, max_concurrency=S3_TRANSFER_CONCURRENCY,
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE
+    )
+
+# shared by all S3 operations of single process
+S3_LIMITER = AdaptiveLimiter(
+    initial=max(1, S3_MAX_CONCURRENCY // 4), max_limit=S3_MAX_CONCURRENCY,
+    latency_target=S3_LATENCY_TARGET
+    )
+S3_RETRIER = Retrier(classify_s3_error, limiter=S3_LIMITER)
@@ -7,3 +7,72 @@ DB_PASSWORD = environ['DB_PASSWORD']
 DB_PORT = environ['DB_PORT']
 DB_USER = environ['DB_USER']
 S3_STORAGE_URL = environ["S3_STORAGE_URL"]
+
+# optional tuning knobs
+S3_MAX_CONCURRENCY = int(environ.get("S3_MAX_CONCURRENCY", 64))
+S3_LATENCY_TARGET = (
+    float(environ["S3_LATENCY_TARGET"])
+    if "S3_LATENCY_TARGET" in environ else None
+)
+S3_LIST_CONCURRENCY = int(environ.get("S3_LIST_CONCURRENCY", 16))
+S3_MAX_POOL_CONNECTIONS = int(environ.get("S3_MAX_POOL_CONNECTIONS", 64))
+S3_TRANSFER_CONCURRENCY = int(environ.get("S3_TRANSFER_CONCURRENCY", 16))
+S3_MULTIPART_THRESHOLD = int(
+    environ.get("S3_MULTIPART_THRESHOLD", 16 * 1024 * 1024)
+)
+S3_MULTIPART_CHUNKSIZE = int(
+    environ.get("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024)
+)
+HTTP_POOL_CONNECTIONS = int(environ.get("HTTP_POOL_CONNECTIONS", 16))
+DB_MAX_CONCURRENCY = int(environ.get("DB_MAX_CONCURRENCY", 32))
+DB_LATENCY_TARGET = (
+    float(environ["DB_LATENCY_TARGET"])
+    if "DB_LATENCY_TARGET" in environ else None
+)
+
+OUTPUT_SINK = environ.get("OUTPUT_SINK", "mysql")
+PARQUET_OUTPUT_DIR = environ.get("PARQUET_OUTPUT_DIR", "/data/meta_parquet")
+PARQUET_ROW_GROUP_BYTES = int(
+    environ.get("PARQUET_ROW_GROUP_BYTES", 32 * 1024 * 1024)
+)
+PARQUET_MAX_RECORDS_PER_FILE = int(
+    environ.get("PARQUET_MAX_RECORDS_PER_FILE", 1000000)
+)
+SINK_BATCH_SIZE = int(environ.get("SINK_BATCH_SIZE", 100))
+# files analysed at once by every partition
+PROCESS_CONCURRENCY = int(environ.get("PROCESS_CONCURRENCY", 1))
+# files submitted to Spark as single job while listing goes on
+SPARK_JOB_SIZE = int(environ.get("SPARK_JOB_SIZE", 1000))
+# files processed with single settings candidate in autotune mode
+AUTOTUNE_ROUND_SIZE = int(environ.get("AUTOTUNE_ROUND_SIZE", 200))
+SQLITE_PATH = environ.get("SQLITE_PATH", "/data/meta.sqlite")
+JSONL_OUTPUT_DIR = environ.get("JSONL_OUTPUT_DIR", "/data/meta_jsonl")
+PARQUET_ROW_GROUP_ROWS = int(environ.get("PARQUET_ROW_GROUP_ROWS", 10000))
+WORK_BATCH_SIZE = int(environ.get("WORK_BATCH_SIZE", 200))
+WORK_LEASE_SECONDS = int(environ.get("WORK_LEASE_SECONDS", 900))
+WORK_MAX_ATTEMPTS = int(environ.get("WORK_MAX_ATTEMPTS", 3))
+WORK_POLL_INTERVAL = float(environ.get("WORK_POLL_INTERVAL", 5))
+INGEST_POLL_INTERVAL = float(environ.get("INGEST_POLL_INTERVAL", 10))
+INGEST_BATCH_SIZE = int(environ.get("INGEST_BATCH_SIZE", 50))
+INGEST_SETTLE_SECONDS = float(environ.get("INGEST_SETTLE_SECONDS", 60))
+INGEST_MAX_BACKOFF = float(environ.get("INGEST_MAX_BACKOFF", 300))
+PROGRESS_PORT = int(environ.get("PROGRESS_PORT", 8089))
+# address workers reach progress endpoint of the driver at
+PROGRESS_HOST = environ.get("PROGRESS_HOST")
+PROGRESS_LOG_INTERVAL = float(environ.get("PROGRESS_LOG_INTERVAL", 10))
+SPOOL_DIR = environ.get("SPOOL_DIR", "/tmp/meta-spool")
+# preferred (e.g. /dev/shm) when it has room for the whole quota
+SPOOL_TMPFS_DIR = environ.get("SPOOL_TMPFS_DIR")
+# bytes of downloaded files in flight, all processes of the host together
+SPOOL_QUOTA_BYTES = int(environ.get("SPOOL_QUOTA_BYTES", 1024 * 1024 * 1024))
+# profiling is enabled by setting directory shared by all workers
+PROFILE_DIR = environ.get("PROFILE_DIR")
+PROFILE_MODE = environ.get("PROFILE_MODE", "sample")
+META_PARTITIONS_AHEAD = int(environ.get("META_PARTITIONS_AHEAD", 3))
+# months of meta partitions kept before the current one, unset keeps all
+META_RETENTION_MONTHS = (
+    int(environ["META_RETENTION_MONTHS"])
+    if environ.get("META_RETENTION_MONTHS") else None
+)
+# expired partitions are exported here before they are dropped
+META_ARCHIVE_DIR = environ.get("META_ARCHIVE_DIR")
@@ -1,15 +1,70 @@
 import logging
-from itertools import chain
-from typing import Tuple
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
 
-from clients.aws import S3Scrapper
-from definitions import BOTO3_CLIENT, BUCKET
-from envs import S3_STORAGE_URL
-from processors.s3_to_mysql import S3MysqlProcessor
+from clients.autotune import (TUNED_SETTINGS_BOUNDS, Autotuner,
+                              get_round_bounds, load_tuned_settings,
+                              write_report)
+from clients.aws import FileUrl, S3Scrapper, URLScrapper
+from clients.local import LocalDirScrapper
+from clients.manifest import ManifestScrapper
+from clients.profiling import PROFILER, merge_profiles, run_profile_dir
+from clients.progress import PROGRESS, STAGE_LISTED, ProgressServer
+from definitions import BOTO3_CLIENT, BUCKET, S3_RETRIER
+from envs import (AUTOTUNE_ROUND_SIZE, OUTPUT_SINK, PROCESS_CONCURRENCY,
+                  PROFILE_DIR, PROFILE_MODE, PROGRESS_HOST,
+                  PROGRESS_LOG_INTERVAL, PROGRESS_PORT, S3_LIST_CONCURRENCY,
+                  S3_STORAGE_URL, SINK_BATCH_SIZE, SPARK_JOB_SIZE)
+from processors.base import MetaProcessor
+from sinks.factory import parse_sink_names
 
 logger = logging.getLogger()
 
 
+def get_processor(
+        output_sink: str, local: bool = False, headers_only: bool = False
+) -> MetaProcessor:
+    """Returns processor writing to given outputs.
+
+    Args:
+        output_sink (str): "spark-parquet" for Spark native parquet dataset
+            writer or comma separated sink names (e.g. "mysql,jsonl")
+        local (bool, optional): analyse local files in place instead of
+            downloading them from S3. Defaults to False.
+        headers_only (bool, optional): read only PE headers of S3 files
+            with range requests instead of downloading them.
+            Defaults to False.
+
+    Returns:
+        MetaProcessor: processor instance
+    """
+    if local and headers_only:
+        raise ValueError("Headers only analysis supports only S3 input")
+    if output_sink == "spark-parquet":
+        if local or headers_only:
+            raise ValueError(
+                "'spark-parquet' output supports only full S3 analysis"
+                )
+        from processors.s3_to_parquet import S3ParquetProcessor
+        return S3ParquetProcessor(job_size=SPARK_JOB_SIZE)
+    if headers_only:
+        from processors.s3_headers import S3HeadersProcessor
+        processor_cls = S3HeadersProcessor
+    elif local:
+        from processors.local import LocalDirProcessor
+        processor_cls = LocalDirProcessor
+    else:
+        from processors.s3 import S3Processor
+        processor_cls = S3Processor
+    return processor_cls(
+        output_sinks=parse_sink_names(output_sink),
+        batch_size=SINK_BATCH_SIZE, concurrency=PROCESS_CONCURRENCY,
+        job_size=SPARK_JOB_SIZE
+        )
+
+
 def calculate_cnt_div(n: int) -> Tuple[int, int]:
     """Caluculates how many malicious and clean files to process based on
         input.
@@ -24,24 +79,213 @@ def calculate_cnt_div(n: int) -> Tuple[int, int]:
     return n//2, n//2
 
 
-def process_all(n: int) -> None:
-    """Process number of malicious and clean files.
+def create_scrapper(
+        shard: Optional[Tuple[int, int]] = None,
+        sample_seed: Optional[int] = None,
+        manifest_path: Optional[str] = None,
+        local_dir: Optional[str] = None
+) -> URLScrapper:
+    """Creates scrapper listing files to process.
 
     Args:
-        n (int): number to calculate clean and malicious files to process
-    """
+        shard (Optional[Tuple[int, int]], optional): (i, k) - list only i-th
+            of k key space shards (and 1/k of n). Defaults to None.
+        sample_seed (Optional[int], optional): when set, sample keys spread
+            evenly across the key space instead of listing first ones.
+            Defaults to None.
+        manifest_path (Optional[str], optional): read keys from S3 Inventory
+            style manifest instead of listing the bucket. Defaults to None.
+        local_dir (Optional[str], optional): list files of local directory
+            with '0/' and '1/' subdirectories instead of the bucket.
+            Defaults to None.
 
-    s3scrapper = S3Scrapper(
-        bucket=BUCKET, boto3_client=BOTO3_CLIENT, root_url=S3_STORAGE_URL
+    Returns:
+        URLScrapper: scrapper instance
+    """
+    if local_dir is not None:
+        if sample_seed is not None or manifest_path is not None:
+            raise ValueError(
+                "Sampling and manifest are not supported for local input"
+                )
+        return LocalDirScrapper(local_dir, shard=shard)
+    if manifest_path is not None:
+        if sample_seed is not None:
+            raise ValueError("Sampling is not supported for manifest input")
+        return ManifestScrapper(manifest_path, S3_STORAGE_URL, shard=shard)
+    return S3Scrapper(
+        bucket=BUCKET, boto3_client=BOTO3_CLIENT, root_url=S3_STORAGE_URL,
+        retrier=S3_RETRIER, shard=shard, sample_seed=sample_seed,
+        list_concurrency=S3_LIST_CONCURRENCY
         )
 
-    processor = S3MysqlProcessor()
+
+def list_urls_to_process(
+        n: int, scrapper: Optional[URLScrapper] = None
+) -> Iterable[FileUrl]:
+    """Lists urls of malicious and clean files.
+
+    Args:
+        n (int): number to calculate clean and malicious files to list
+        scrapper (Optional[URLScrapper], optional): source of urls.
+            Defaults to S3 bucket listing.
+
+    Returns:
+        Iterable[FileUrl]: lazily listed urls
+    """
+    scrapper = scrapper or create_scrapper()
 
     malicious_cnt, clean_cnt = calculate_cnt_div(n)
-    urls_to_process = (
-            chain(
-                s3scrapper.list_malicious_files_urls(clean_cnt),
-                s3scrapper.list_clean_files_urls(malicious_cnt)
-                )
+    return count_listed(
+            scrapper.list_files_urls(malicious_cnt, clean_cnt)
+            )
+
+
+def count_listed(urls: Iterable[FileUrl]) -> Iterator[FileUrl]:
+    for url in urls:
+        PROGRESS.add(STAGE_LISTED)
+        yield url
+
+
+@contextmanager
+def track_progress(processor: MetaProcessor, total: Optional[int] = None):
+    """Runs progress server for the block and points processor (and this
+    process) to it, so all workers report their progress there.
+
+    Args:
+        processor (MetaProcessor): processor of the run
+        total (Optional[int], optional): number of items expected to be
+            processed, for ETA. Defaults to None.
+    """
+    with ProgressServer(
+            PROGRESS_PORT, host=PROGRESS_HOST, total=total,
+            log_interval=PROGRESS_LOG_INTERVAL
+    ) as progress:
+        PROGRESS.configure(progress.url)
+        processor.progress_url = progress.url
+        try:
+            yield progress
+        finally:
+            PROGRESS.flush()
+
+
+@contextmanager
+def profile_run(
+        processor: MetaProcessor, directory: Optional[str] = None,
+        mode: str = PROFILE_MODE, name: str = "run"
+):
+    """Profiles the block in this process and all workers of processor,
+    merging their profiles at the end. Does nothing without directory.
+
+    Profiles are written to a new subdirectory of the run (see
+    `run_profile_dir`) and only this process merges it.
+
+    Args:
+        processor (MetaProcessor): processor of the run
+        directory (Optional[str], optional): directory shared by all
+            workers to write profiles to. Defaults to PROFILE_DIR.
+        mode (str, optional): "sample" or "cprofile".
+            Defaults to PROFILE_MODE.
+        name (str, optional): run subdirectory name prefix.
+            Defaults to "run".
+    """
+    directory = directory or PROFILE_DIR
+    if directory is None:
+        yield
+        return
+    directory = run_profile_dir(directory, name)
+    logger.info(f"Profiles of the run are written to {directory}")
+    processor.profile_dir = directory
+    processor.profile_mode = mode
+    PROFILER.configure(directory, mode)
+    try:
+        with PROFILER.profile("driver"):
+            yield
+    finally:
+        merge_profiles(directory)
+
+
+def process_autotuned(
+        processor: MetaProcessor, urls: Iterable[FileUrl], tuner: Autotuner,
+        progress: Optional[ProgressServer] = None,
+        round_size: int = AUTOTUNE_ROUND_SIZE
+) -> None:
+    """Processes urls in rounds of `round_size` items, every round with
+    settings proposed by the tuner, and feeds it with measured throughput.
+
+    Args:
+        processor (MetaProcessor): processor of the run
+        urls (Iterable[FileUrl]): urls of files to process
+        tuner (Autotuner): tuner of processor attributes
+        progress (Optional[ProgressServer], optional): progress server of
+            the run, to record items processed by every stage.
+            Defaults to None.
+        round_size (int, optional): items per round.
+            Defaults to AUTOTUNE_ROUND_SIZE.
+    """
+    urls = iter(urls)
+    while True:
+        chunk = list(islice(urls, round_size))
+        if not chunk:
+            break
+        settings = tuner.propose()
+        for name, value in settings.items():
+            setattr(processor, name, value)
+        items_before = progress.snapshot()["items"] if progress else {}
+        start_time = time.monotonic()
+        processor.process_files(chunk)
+        duration = time.monotonic() - start_time
+        details = {}
+        if progress is not None:
+            details["stage_items_per_second"] = {
+                stage: (cnt - items_before.get(stage, 0)) / duration
+                for stage, cnt in progress.snapshot()["items"].items()
+            }
+        tuner.record(settings, len(chunk), duration, **details)
+
+
+def process_all(
+        n: int, scrapper: Optional[URLScrapper] = None,
+        processor: Optional[MetaProcessor] = None,
+        profile_dir: Optional[str] = None,
+        autotune_report: Optional[str] = None
+) -> None:
+    """Process number of malicious and clean files.
+
+    Args:
+        n (int): number to calculate clean and malicious files to process
+        scrapper (Optional[URLScrapper], optional): source of urls.
+            Defaults to S3 bucket listing.
+        processor (Optional[MetaProcessor], optional): processor matching
+            the scrapper. Defaults to S3 processor writing to OUTPUT_SINK.
+        profile_dir (Optional[str], optional): profile the run writing
+            profiles to this directory. Defaults to PROFILE_DIR.
+        autotune_report (Optional[str], optional): tune processor
+            concurrency and batch size during the run, starting from
+            settings of this report (when present) and writing chosen
+            ones to it. Defaults to None.
+    """
+    if autotune_report is not None and OUTPUT_SINK == "spark-parquet":
+        raise ValueError("'spark-parquet' output is not supported by autotune")
+    processor = processor or get_processor(OUTPUT_SINK)
+    with track_progress(processor, total=n) as progress, \
+            profile_run(processor, profile_dir):
+        urls = list_urls_to_process(n, scrapper)
+        if autotune_report is None:
+            processor.process_files(urls)
+            return
+        # round is one job, a partition gets at most partition size items
+        items_per_partition = min(
+            AUTOTUNE_ROUND_SIZE,
+            processor.get_partition_size(processor.get_partitions())
+            )
+        tuner = Autotuner(
+            load_tuned_settings(autotune_report) or {
+                name: getattr(processor, name)
+                for name in TUNED_SETTINGS_BOUNDS
+            },
+            bounds=get_round_bounds(items_per_partition)
             )
-    processor.process_files(urls_to_process)
+        try:
+            process_autotuned(processor, urls, tuner, progress)
+        finally:
+            write_report(autotune_report, tuner.report())
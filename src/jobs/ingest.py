@@ -0,0 +1,156 @@
+import datetime
+import logging
+import time
+from itertools import islice
+from typing import Optional, Tuple
+
+from clients.aws import S3_CLEAN_PREFIX, S3_MALICIOUS_PREFIX, S3Scrapper
+from clients.db import SYNC_SESSION
+from clients.progress import PROGRESS, STAGE_LISTED
+from clients.watermark import Watermark, WatermarkStore
+from envs import (INGEST_BATCH_SIZE, INGEST_MAX_BACKOFF, INGEST_POLL_INTERVAL,
+                  INGEST_SETTLE_SECONDS, OUTPUT_SINK)
+from jobs.collector import create_scrapper, get_processor, track_progress
+from processors.base import MetaProcessor
+
+logger = logging.getLogger()
+
+INGEST_PREFIXES = (S3_MALICIOUS_PREFIX, S3_CLEAN_PREFIX)
+
+
+def ingest_prefix(
+        scrapper: S3Scrapper, processor: MetaProcessor, store: WatermarkStore,
+        prefix: str, keys_ordered: bool = False,
+        settle_seconds: float = INGEST_SETTLE_SECONDS,
+        batch_size: int = INGEST_BATCH_SIZE
+) -> int:
+    """Processes objects of prefix newer than its watermark in micro
+    batches and moves the watermark.
+
+    With `keys_ordered` watermark moves after every batch. Otherwise new
+    objects are found anywhere in the key order, so watermark moves only
+    after the whole prefix was listed - batches processed before a crash
+    are processed again (and deduplicated by sinks).
+
+    Args:
+        scrapper (S3Scrapper): bucket scrapper
+        processor (MetaProcessor): processor writing results to sinks
+        store (WatermarkStore): watermarks store
+        prefix (str): S3 prefix
+        keys_ordered (bool, optional): keys of new objects sort after
+            keys of older ones. Defaults to False.
+        settle_seconds (float, optional): objects modified in last seconds
+            are left for the next poll. Defaults to INGEST_SETTLE_SECONDS.
+        batch_size (int, optional): objects per micro batch.
+            Defaults to INGEST_BATCH_SIZE.
+
+    Returns:
+        int: number of processed objects
+    """
+    watermark = store.get(prefix)
+    modified_before = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=settle_seconds
+        )
+    new_objects = scrapper.list_new_objects(
+        prefix, watermark, keys_ordered=keys_ordered,
+        modified_before=modified_before
+        )
+    newest: Optional[Watermark] = None
+    processed_cnt = 0
+    while True:
+        batch = list(islice(new_objects, batch_size))
+        if not batch:
+            break
+        PROGRESS.add(STAGE_LISTED, items=len(batch))
+        processor.process_partition([url for url, _ in batch])
+        processed_cnt += len(batch)
+        if keys_ordered:
+            url, modified = batch[-1]
+            store.save(prefix, (modified, url.path))
+        else:
+            newest = max(
+                [(modified, url.path) for url, modified in batch]
+                + ([newest] if newest is not None else [])
+                )
+    if newest is not None:
+        store.save(prefix, newest)
+    return processed_cnt
+
+
+def run_poll(
+        scrapper: S3Scrapper, processor: MetaProcessor, store: WatermarkStore,
+        keys_ordered: bool = False
+) -> Tuple[int, int]:
+    """Ingests all prefixes once. Failure of one prefix (e.g. sink or
+    listing error) is logged and does not stop the others; its watermark
+    stays where the last successful batch (or pass) left it.
+
+    Returns:
+        Tuple[int, int]: processed objects, failed prefixes
+    """
+    processed_cnt = failed_cnt = 0
+    for prefix in INGEST_PREFIXES:
+        try:
+            processed_cnt += ingest_prefix(
+                scrapper, processor, store, prefix, keys_ordered=keys_ordered
+                )
+        except Exception:
+            logger.exception(f"Ingest of prefix {prefix} failed")
+            failed_cnt += 1
+    return processed_cnt, failed_cnt
+
+
+def run_ingest(
+        keys_ordered: bool = False,
+        poll_interval: float = INGEST_POLL_INTERVAL,
+        max_polls: Optional[int] = None
+) -> None:
+    """Continuously processes objects uploaded to the bucket since the
+    last poll. Micro batches are processed in this process (no Spark job
+    per batch), so new samples are written within seconds.
+
+    Files gone before analysis are logged and skipped, so they never hold
+    the watermark back. Any other failure (e.g. throttling, network, full
+    spool disk) fails the batch, so the watermark stays before it and the
+    files are retried with the next poll. Polls with failed prefixes are
+    repeated with exponential backoff (up to INGEST_MAX_BACKOFF seconds)
+    instead of stopping the daemon.
+
+    Args:
+        keys_ordered (bool, optional): keys of new objects sort after
+            keys of older ones, so only keys after watermark are listed.
+            Defaults to False.
+        poll_interval (float, optional): seconds between polls start.
+            Defaults to INGEST_POLL_INTERVAL.
+        max_polls (Optional[int], optional): stop after number of polls.
+            Defaults to None (run forever).
+    """
+    if OUTPUT_SINK == "spark-parquet":
+        raise ValueError("'spark-parquet' output is not supported by ingest")
+    scrapper = create_scrapper()
+    processor = get_processor(OUTPUT_SINK)
+    processor.skip_permanent_failures = True
+    store = WatermarkStore(SYNC_SESSION)
+    logger.info(f"Ingest starts. Keys ordered: {keys_ordered}")
+    polls_cnt = failed_polls_cnt = 0
+    with track_progress(processor):
+        while max_polls is None or polls_cnt < max_polls:
+            start_time = time.monotonic()
+            processed_cnt, failed_cnt = run_poll(
+                scrapper, processor, store, keys_ordered=keys_ordered
+                )
+            polls_cnt += 1
+            duration = time.monotonic() - start_time
+            logger.info(
+                f"Ingest poll {polls_cnt} processed {processed_cnt} new "
+                f"files in {duration:.1f}s, {failed_cnt} prefixes failed"
+                )
+            if failed_cnt:
+                failed_polls_cnt += 1
+                delay = min(
+                    poll_interval * 2 ** failed_polls_cnt, INGEST_MAX_BACKOFF
+                    )
+            else:
+                failed_polls_cnt = 0
+                delay = poll_interval - duration
+            time.sleep(max(0.0, delay))
@@ -0,0 +1,53 @@
+import datetime
+import logging
+from typing import Optional
+
+from clients.db import SYNC_SESSION
+from clients.partitions import MetaPartitions, plan_partitions
+from envs import (META_ARCHIVE_DIR, META_PARTITIONS_AHEAD,
+                  META_RETENTION_MONTHS)
+
+logger = logging.getLogger()
+
+
+def run_maintenance(
+        months_ahead: int = META_PARTITIONS_AHEAD,
+        retention_months: Optional[int] = META_RETENTION_MONTHS,
+        archive_dir: Optional[str] = META_ARCHIVE_DIR,
+        today: Optional[datetime.date] = None
+) -> None:
+    """Creates meta partitions for the coming months and removes expired
+    ones, exporting each to `archive_dir` first (when set). Expired
+    partition is exported, then its symbol and summary rows are deleted,
+    then it is dropped - a rerun after failure in any step continues
+    where it stopped (see `MetaPartitions.drop_partition`).
+
+    Args:
+        months_ahead (int, optional): months after the current one which
+            must have partition. Defaults to META_PARTITIONS_AHEAD.
+        retention_months (Optional[int], optional): months kept before
+            the current one, None to keep all.
+            Defaults to META_RETENTION_MONTHS.
+        archive_dir (Optional[str], optional): directory to export expired
+            partitions to. Defaults to META_ARCHIVE_DIR.
+        today (Optional[datetime.date], optional): current day.
+            Defaults to today (UTC).
+    """
+    today = today or datetime.datetime.utcnow().date()
+    partitions = MetaPartitions(SYNC_SESSION)
+    to_create, expired = plan_partitions(
+        partitions.list_partitions(), today, months_ahead, retention_months
+        )
+    partitions.create_partitions(to_create)
+    if expired and archive_dir is None:
+        logger.warning(
+            f"Dropping expired partitions {expired} without archive"
+            )
+    for name in expired:
+        if archive_dir is not None:
+            partitions.export_partition(name, archive_dir)
+        partitions.drop_partition(name)
+    logger.info(
+        f"Maintenance done. Created {len(to_create)}, "
+        f"removed {len(expired)} partitions"
+        )
@@ -0,0 +1,115 @@
+import logging
+import os
+import socket
+import time
+from itertools import islice
+from typing import Dict, List, Optional
+
+from clients.aws import FileUrl, URLScrapper
+from clients.db import SYNC_SESSION
+from clients.work_queue import WorkQueue
+from db_models.meta import Meta
+from envs import (OUTPUT_SINK, S3_STORAGE_URL, WORK_BATCH_SIZE,
+                  WORK_LEASE_SECONDS, WORK_MAX_ATTEMPTS, WORK_POLL_INTERVAL)
+from jobs.collector import (get_processor, list_urls_to_process,
+                            profile_run, track_progress)
+
+logger = logging.getLogger()
+
+ENQUEUE_CHUNK_SIZE = 1000
+
+
+def get_work_queue() -> WorkQueue:
+    return WorkQueue(SYNC_SESSION, max_attempts=WORK_MAX_ATTEMPTS)
+
+
+def enqueue_all(n: int, scrapper: Optional[URLScrapper] = None) -> None:
+    """Lists malicious and clean files and adds them to work queue.
+
+    Args:
+        n (int): number to calculate clean and malicious files to enqueue
+        scrapper (Optional[URLScrapper], optional): source of urls.
+            Defaults to S3 bucket listing.
+    """
+    work_queue = get_work_queue()
+    urls = iter(list_urls_to_process(n, scrapper))
+    enqueued_cnt = 0
+    while True:
+        chunk = [url.path for url in islice(urls, ENQUEUE_CHUNK_SIZE)]
+        if not chunk:
+            break
+        work_queue.enqueue(chunk)
+        enqueued_cnt += len(chunk)
+        logger.info(f"Enqueued {enqueued_cnt} items")
+
+
+def get_default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(
+        worker_id: Optional[str] = None, headers_only: bool = False,
+        profile_dir: Optional[str] = None
+) -> None:
+    """Claims batches from work queue and processes them until the queue
+    has no unfinished items.
+
+    Claimed batch is processed in the worker process. Items are completed
+    as soon as their sink batch is written, and leases of the rest are
+    renewed then, so a claimed batch may take longer than a single lease.
+    Items that failed analysis (or were not written) are released - retried
+    later or marked failed after WORK_MAX_ATTEMPTS.
+
+    Args:
+        worker_id (Optional[str], optional): unique worker name.
+            Defaults to "<hostname>-<pid>".
+        headers_only (bool, optional): read only PE headers of files.
+            Defaults to False.
+        profile_dir (Optional[str], optional): profile the worker writing
+            profiles to its own subdirectory of this directory.
+            Defaults to PROFILE_DIR.
+    """
+    if OUTPUT_SINK == "spark-parquet":
+        raise ValueError("'spark-parquet' output is not supported by workers")
+    worker_id = worker_id or get_default_worker_id()
+    work_queue = get_work_queue()
+    processor = get_processor(OUTPUT_SINK, headers_only=headers_only)
+    processor.skip_permanent_failures = True
+    logger.info(f"Worker {worker_id} starts")
+    # queue size is unknown to single worker, so no ETA
+    with track_progress(processor), \
+            profile_run(processor, profile_dir, name=worker_id):
+        while True:
+            items = work_queue.claim(
+                worker_id, WORK_BATCH_SIZE, WORK_LEASE_SECONDS
+                )
+            if not items:
+                unfinished_cnt = work_queue.count_unfinished()
+                if not unfinished_cnt:
+                    logger.info(f"Worker {worker_id} ends. Queue drained")
+                    return
+                # others are still working - their expired leases come back
+                logger.debug(f"{unfinished_cnt} items leased by other workers")
+                time.sleep(WORK_POLL_INTERVAL)
+                continue
+
+            leased: Dict[str, int] = {path: id for id, path in items}
+
+            def on_written(batch: List[Meta]) -> None:
+                work_queue.complete(
+                    worker_id, [leased.pop(entry.path) for entry in batch]
+                    )
+                work_queue.renew(
+                    worker_id, leased.values(), WORK_LEASE_SECONDS
+                    )
+
+            try:
+                processor.process_partition(
+                    [FileUrl(S3_STORAGE_URL, path) for _, path in items],
+                    on_written
+                    )
+            except Exception:
+                logger.exception(f"Batch of {len(items)} items failed")
+            if leased:
+                logger.warning(f"Releasing {len(leased)} unfinished items")
+                work_queue.release(worker_id, leased.values())
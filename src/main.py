@@ -1,9 +1,10 @@
 # Copyright 2022, Lukasz Przybyl , All rights reserved.
 
+import argparse
 import datetime
 import logging
+from typing import Tuple
 
-from jobs.collector import process_all
 from logging_setup import load_logger_config
 
 load_logger_config()
@@ -12,14 +13,176 @@ logger = logging.getLogger()
 
 N_NUMBER = 2000  # task input value
 
+MODE_BATCH = "batch"
+MODE_ENQUEUE = "enqueue"
+MODE_WORK = "work"
+MODE_INGEST = "ingest"
+MODE_MAINTAIN = "maintain"
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parses "i/k" shard definition.
+
+    Args:
+        value (str): shard definition, e.g. "0/4"
+
+    Raises:
+        argparse.ArgumentTypeError: invalid definition
+
+    Returns:
+        Tuple[int, int]: shard index, number of shards
+    """
+    try:
+        shard, shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Shard must be 'i/k', got {repr(value)}"
+            )
+    if not 0 <= shard < shards:
+        raise argparse.ArgumentTypeError(
+            f"Shard index must be in range [0, {shards}), got {shard}"
+            )
+    return shard, shards
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    """Parses command line arguments.
+
+    Args:
+        args (list, optional): arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Meta file analysis.")
+    parser.add_argument(
+        "-n", type=int, default=N_NUMBER,
+        help=f"number of files to list (default: {N_NUMBER})"
+        )
+    parser.add_argument(
+        "--mode",
+        choices=(
+            MODE_BATCH, MODE_ENQUEUE, MODE_WORK, MODE_INGEST, MODE_MAINTAIN
+            ),
+        default=MODE_BATCH,
+        help=(
+            "'batch' lists and processes files in this process, "
+            "'enqueue' only adds listed files to db work queue, "
+            "'work' processes files claimed from db work queue, "
+            "'ingest' runs continuously processing newly uploaded files, "
+            "'maintain' creates future meta partitions and archives or "
+            "drops expired ones"
+            )
+        )
+    parser.add_argument(
+        "--shard", type=parse_shard, default=None, metavar="I/K",
+        help=(
+            "list only i-th of k key space parts (and 1/k of n) - run k "
+            "instances with shards 0/k .. k-1/k to split work between them"
+            )
+        )
+    parser.add_argument(
+        "--sample-seed", type=int, default=None, metavar="SEED",
+        help=(
+            "sample n keys spread evenly across the key space (reproducible "
+            "for given seed) instead of taking first n keys"
+            )
+        )
+    parser.add_argument(
+        "--manifest", default=None, metavar="PATH",
+        help=(
+            "read keys, sizes and etags from S3 Inventory style manifest "
+            "(manifest.json or .csv/.csv.gz/.parquet data file) instead of "
+            "listing the bucket"
+            )
+        )
+    parser.add_argument(
+        "--local-dir", default=None, metavar="PATH",
+        help=(
+            "analyse files of local directory (with '0/' malicious and '1/' "
+            "clean subdirectories) in place instead of the bucket"
+            )
+        )
+    parser.add_argument(
+        "--headers-only", action="store_true",
+        help=(
+            "read only PE headers and import/export directories of S3 files "
+            "with range requests (rows keep ETag, no MD5 or SHA256)"
+            )
+        )
+    parser.add_argument(
+        "--profile", default=None, metavar="DIR",
+        help=(
+            "profile driver and workers (PROFILE_MODE 'sample' or "
+            "'cprofile') writing per worker and merged profiles, "
+            "collapsed stacks and peak memory per stage to a new run "
+            "subdirectory of DIR, which must be shared by all workers "
+            "(default: PROFILE_DIR)"
+            )
+        )
+    parser.add_argument(
+        "--autotune", default=None, metavar="REPORT",
+        help=(
+            "in 'batch' mode, tune analysis concurrency and sink batch size "
+            "for throughput during the run, starting from settings in "
+            "REPORT JSON (if it exists) and writing chosen ones to it"
+            )
+        )
+    parser.add_argument(
+        "--keys-ordered", action="store_true",
+        help=(
+            "in 'ingest' mode, keys of new files sort after keys of older "
+            "ones, so only keys after the last ingested one are listed"
+            )
+        )
+    parser.add_argument(
+        "--worker-id", default=None,
+        help="unique worker name in 'work' mode (default: <hostname>-<pid>)"
+        )
+    return parser.parse_args(args)
+
 
 def main() -> None:
     """Main program starting function.
     """
-    logger.info("Main starts")
+    args = parse_args()
+    logger.info(f"Main starts. Mode: {args.mode}")
     start_time = datetime.datetime.utcnow()
     logger.info("Start time")
-    process_all(N_NUMBER)
+    if args.mode == MODE_MAINTAIN:
+        from jobs.maintenance import run_maintenance
+        run_maintenance()
+    elif args.mode == MODE_INGEST:
+        from jobs.ingest import run_ingest
+        run_ingest(keys_ordered=args.keys_ordered)
+    elif args.mode == MODE_WORK:
+        from jobs.work_queue import run_worker
+        run_worker(
+            args.worker_id, headers_only=args.headers_only,
+            profile_dir=args.profile
+            )
+    else:
+        from jobs.collector import create_scrapper
+        scrapper = create_scrapper(
+            shard=args.shard, sample_seed=args.sample_seed,
+            manifest_path=args.manifest, local_dir=args.local_dir
+            )
+        if args.mode == MODE_ENQUEUE:
+            if args.local_dir is not None:
+                raise ValueError("Work queue supports only S3 input")
+            from jobs.work_queue import enqueue_all
+            enqueue_all(args.n, scrapper)
+        else:
+            from envs import OUTPUT_SINK
+            from jobs.collector import get_processor, process_all
+            processor = get_processor(
+                OUTPUT_SINK, local=args.local_dir is not None,
+                headers_only=args.headers_only
+                )
+            process_all(
+                args.n, scrapper, processor,
+                profile_dir=args.profile, autotune_report=args.autotune
+                )
     end_time = datetime.datetime.utcnow()
     logger.info(f"Main ends. Execution took {str(end_time-start_time)}")
 
@@ -1,25 +1,34 @@
 import datetime
 import hashlib
 import logging
+import mmap
 import os
 import pathlib
+import re
 from abc import abstractmethod
-from os.path import join
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from subprocess import CalledProcessError
-from typing import Sequence, Tuple, Union
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple, Union)
 
 from pyspark.sql import SparkSession
 
-from clients.aws import FileUrl
+from clients.aws import FileUrl, UrlChunk, pack_urls
+from clients.profiling import PROFILE_MODE_SAMPLE, PROFILER
+from clients.progress import (PROGRESS, STAGE_ANALYSED, STAGE_DOWNLOADED,
+                              STAGE_WRITTEN)
 from clients.shell import run_cmd
-from db_models.meta import Meta
+from clients.spool import Spool, get_process_spool
+from db_models.meta import LABEL_CLEAN, LABEL_MALICIOUS, Meta
+from sinks.base import Sink
 
 logger = logging.getLogger()
 
 S3_MALICIOUS_PREFIX = "0/"
 S3_CLEAN_PREFIX = "1/"
-LOCAL_DL_DIR = "/tmp"
-
 COUNT_QUERY = (
     """select count(1) as count
     from meta where hash = :hash"""
@@ -28,6 +37,70 @@ COUNT_QUERY = (
 ARCH_START_IDX = "\narchitecture: "
 ARCH_END_IDX = ", flags"
 
+DIGEST_ALGORITHMS = ("md5", "sha256")
+# digest algorithm -> Meta column
+DIGEST_COLUMNS = {
+    "md5": "hash",
+    "sha256": "sha256",
+}
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# winedump import/export function row: "<thunk/entry> <ordinal> <name>"
+FUNCTION_ROW_RE = re.compile(r"^[0-9a-fA-F]{8}\s+(\d+)\s+(\S+)")
+IMPHASH_LIB_EXTENSIONS = ("dll", "ocx", "sys")
+
+
+def calc_digests(
+        file_path: str, algorithms: Sequence[str] = DIGEST_ALGORITHMS,
+        chunk_size: int = HASH_CHUNK_SIZE, use_mmap: bool = False
+) -> Dict[str, str]:
+    """Calculates several digests of given file in single read pass.
+
+    Every chunk is read once into reused buffer (or sliced from memory map
+    of the file, without copying) and fed to all hashers.
+
+    Args:
+        file_path (str): path to the local file
+        algorithms (Sequence[str], optional): hashlib algorithm names.
+            Defaults to DIGEST_ALGORITHMS.
+        chunk_size (int, optional): read buffer size.
+            Defaults to HASH_CHUNK_SIZE.
+        use_mmap (bool, optional): hash memory mapped file.
+            Defaults to False.
+
+    Returns:
+        Dict[str, str]: algorithm name -> hex digest
+    """
+    logger.debug(f"Digests {algorithms} calc begging")
+    start_time = datetime.datetime.utcnow()
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    with open(file_path, "rb", buffering=0) as f:
+        # empty files can't be memory mapped
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(mm), chunk_size):
+                        chunk = view[offset:offset + chunk_size]
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                finally:
+                    chunk = None
+                    view.release()
+        else:
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            while True:
+                read_cnt = f.readinto(buffer)
+                if not read_cnt:
+                    break
+                chunk = view[:read_cnt]
+                for hasher in hashers.values():
+                    hasher.update(chunk)
+    end_time = datetime.datetime.utcnow()
+    logger.debug(f"Digests calc end. Took {end_time - start_time}")
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
 
 def calc_md5(file_path: str) -> str:
     """Calculates MD5 of given file.
@@ -38,15 +111,40 @@ def calc_md5(file_path: str) -> str:
     Returns:
         str: calculated MD5 hash
     """
-    logger.debug("MD5 calc begging")
-    start_time = datetime.datetime.utcnow()
-    with open(file_path, "rb") as f:
-        hash = hashlib.md5(f.read()).hexdigest()
-        end_time = datetime.datetime.utcnow()
-        logger.debug(
-            f"MD5 calc end. Took {end_time - start_time}"
+    return calc_digests(file_path, ("md5",))["md5"]
+
+
+def calc_imphash(
+        import_table: Union[Sequence[Tuple[str, Sequence[str]]], None]
+) -> Union[str, None]:
+    """Calculates import hash (imphash) from already parsed import table.
+
+    Follows pefile's algorithm: "<lib>.<function>" pairs in import order,
+    lowercased, library extension (dll/ocx/sys) stripped, joined with
+    commas and MD5 hashed. Functions imported by ordinal are named
+    "ord<N>" (no per-library ordinal lookup table is applied).
+
+    Args:
+        import_table (Union[Sequence[Tuple[str, Sequence[str]]], None]):
+            (library, functions) pairs as returned by `get_import_table`
+
+    Returns:
+        Union[str, None]: imphash, None when there are no imports
+    """
+    if not import_table:
+        return None
+    entries = []
+    for library, functions in import_table:
+        library = library.lower()
+        name, _, ext = library.rpartition(".")
+        if name and ext in IMPHASH_LIB_EXTENSIONS:
+            library = name
+        entries.extend(
+            f"{library}.{function.lower()}" for function in functions
             )
-        return hash
+    if not entries:
+        return None
+    return hashlib.md5(",".join(entries).encode()).hexdigest()
 
 
 def get_arch(file_path: str) -> Union[str, None]:
@@ -61,7 +159,7 @@ def get_arch(file_path: str) -> Union[str, None]:
 
     arch = None
     try:
-        objdump_r = run_cmd(f"objdump -f {file_path}")
+        objdump_r = run_cmd(["objdump", "-f", file_path])
     except CalledProcessError:
         pass
     else:
@@ -73,59 +171,141 @@ def get_arch(file_path: str) -> Union[str, None]:
     return arch
 
 
-def get_imports(file_path: str) -> Union[Sequence, None]:
-    """Aquire imports information from PE file.
+def parse_import_table(output: str) -> List[Tuple[str, List[str]]]:
+    """Parses winedump import dump into (library, functions) pairs.
+
+    Args:
+        output (str): `winedump -j import` output
+
+    Returns:
+        List[Tuple[str, List[str]]]: imported libraries with their
+            functions, in import order
+    """
+    import_table = []
+    for line in output.split("\n"):
+        line = line.strip()
+        if line.startswith("offset"):
+            import_table.append((line.split()[-1], []))
+            continue
+        match = FUNCTION_ROW_RE.match(line)
+        if match and import_table:
+            ordinal, name = match.groups()
+            if name.startswith("<"):
+                # "<by ordinal>"
+                name = f"ord{ordinal}"
+            import_table[-1][1].append(name)
+    return import_table
+
+
+def get_import_table(
+        file_path: str
+) -> Union[List[Tuple[str, List[str]]], None]:
+    """Aquire import table (libraries and their functions) from PE file.
 
     Args:
         file_path (str): path to file under analysis
 
     Returns:
-        Union[Sequence, None]: found import files
+        Union[List[Tuple[str, List[str]]], None]: found (library, functions)
+            pairs
     """
-    imports = None
+    import_table = None
     try:
-        objdump_imports_r = run_cmd(f"winedump -j import {file_path}")
+        objdump_imports_r = run_cmd(["winedump", "-j", "import", file_path])
     except CalledProcessError:
         pass
     else:
         # TODO: more fancy way of detecting error needed since winedump
         #  return code 0 even when error occured...
         if "aborting" not in objdump_imports_r:
-            # TODO: consider regex. Need more analysis if this is always valid
-            imports = [
-                line.strip().split()[-1]
-                for line in objdump_imports_r.split("\n")
-                if line.strip().startswith("offset")
-                ]
-            logger.debug(f"Found imports '{imports}'")
+            import_table = parse_import_table(objdump_imports_r)
+            logger.debug(f"Found import table '{import_table}'")
+    return import_table
+
+
+def get_imports(file_path: str) -> Union[Sequence, None]:
+    """Aquire imports information from PE file.
+
+    Args:
+        file_path (str): path to file under analysis
+
+    Returns:
+        Union[Sequence, None]: found import files
+    """
+    import_table = get_import_table(file_path)
+    if import_table is None:
+        return None
+    imports = [library for library, _ in import_table]
+    logger.debug(f"Found imports '{imports}'")
     return imports
 
 
-def get_exports(file_path: str) -> Union[Sequence, None]:
-    """Aquire exports information from PE file.
+def parse_export_table(output: str) -> Tuple[List[str], List[str]]:
+    """Parses winedump export dump into export names and functions.
+
+    Args:
+        output (str): `winedump -j export` output
+
+    Returns:
+        Tuple[List[str], List[str]]: export table names, exported functions
+    """
+    names = []
+    functions = []
+    for line in output.split("\n"):
+        line = line.strip()
+        if line.startswith("Name:"):
+            names.append(line.split()[-1])
+            continue
+        match = FUNCTION_ROW_RE.match(line)
+        if match:
+            ordinal, name = match.groups()
+            if name.startswith("<"):
+                # "<no name>"
+                name = f"ord{ordinal}"
+            functions.append(name)
+    return names, functions
+
+
+def get_export_table(
+        file_path: str
+) -> Union[Tuple[List[str], List[str]], None]:
+    """Aquire export table (export names and functions) from PE file.
 
     Args:
         file_path (str): path to file under analysis
 
     Returns:
-        Union[Sequence, None]: found export files
+        Union[Tuple[List[str], List[str]], None]: found export names and
+            exported functions
     """
-    exports = None
+    export_table = None
     try:
-        objdump_exports_r = run_cmd(f"winedump -j export {file_path}")
+        objdump_exports_r = run_cmd(["winedump", "-j", "export", file_path])
     except CalledProcessError:
         pass
     else:
         # TODO: more fancy way of detecting error needed since winedump
         #  return code 0 even when error occured...
         if "aborting" not in objdump_exports_r:
-            # TODO: consider regex. Need more analysis if this is always valid
-            exports = [
-                line.strip().split()[-1]
-                for line in objdump_exports_r.split("\n")
-                if line.strip().startswith("Name:")
-            ]
-            logger.debug(f"Found eports '{exports}'")
+            export_table = parse_export_table(objdump_exports_r)
+            logger.debug(f"Found export table '{export_table}'")
+    return export_table
+
+
+def get_exports(file_path: str) -> Union[Sequence, None]:
+    """Aquire exports information from PE file.
+
+    Args:
+        file_path (str): path to file under analysis
+
+    Returns:
+        Union[Sequence, None]: found export files
+    """
+    export_table = get_export_table(file_path)
+    if export_table is None:
+        return None
+    exports = export_table[0]
+    logger.debug(f"Found eports '{exports}'")
     return exports
 
 
@@ -143,74 +323,341 @@ def get_extension(file_path: str) -> str:
     return pathlib.Path(file_path).suffix[1:]
 
 
+def get_label(path: str) -> Optional[str]:
+    """Aquires label from bucket prefix of file path.
+
+    Args:
+        path (str): path of the file relative to bucket (or local) root
+
+    Returns:
+        Optional[str]: LABEL_MALICIOUS or LABEL_CLEAN, None for paths
+            outside both prefixes
+    """
+    if path.startswith(S3_MALICIOUS_PREFIX):
+        return LABEL_MALICIOUS
+    if path.startswith(S3_CLEAN_PREFIX):
+        return LABEL_CLEAN
+    return None
+
+
 class MetaProcessor:
     """Interface base class for meta urls processing.
     Should be interited from when introducing new metadata processing inputs
     and outputs.
     """
 
+    digest_algorithms = DIGEST_ALGORITHMS
+    use_mmap = False
+    output_sinks: Sequence[str] = ()
+    batch_size = 100
+    # items analysed at once by single partition (threads)
+    concurrency = 1
+    # urls submitted to engine as single job, while listing goes on
+    job_size = 1000
+    # jobs run at once, bounds urls held by the driver
+    jobs_in_flight = 2
+    # items failing with permanent error (see `is_permanent_error`) are
+    # logged and skipped instead of failing partition
+    skip_permanent_failures = False
+    # progress server of the run, set by the driver
+    progress_url: Optional[str] = None
+    # profiling of workers, see clients.profiling
+    profile_dir: Optional[str] = None
+    profile_mode = PROFILE_MODE_SAMPLE
+
+    def __init__(
+            self, output_sinks: Optional[Sequence[str]] = None,
+            batch_size: Optional[int] = None,
+            concurrency: Optional[int] = None,
+            job_size: Optional[int] = None
+    ) -> None:
+        if output_sinks is not None:
+            self.output_sinks = tuple(output_sinks)
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if concurrency is not None:
+            self.concurrency = concurrency
+        if job_size is not None:
+            self.job_size = job_size
+
+    def create_sink(self) -> Sink:
+        """Creates sink for analysis results. Called once per worker
+        partition.
+
+        Returns:
+            Sink: sink writing to all `output_sinks`
+        """
+        # imported here - sinks configuration requires environment settings
+        from sinks.factory import create_sink
+        return create_sink(self.output_sinks)
+
     @abstractmethod
     def download_file(self, src: str, dest: str) -> None:
         pass
 
-    def io_file_process(self, src: str, dest: str) -> Tuple[bytes, int]:
+    def get_spool(self) -> Spool:
+        from envs import SPOOL_DIR, SPOOL_QUOTA_BYTES, SPOOL_TMPFS_DIR
+        return get_process_spool(
+            SPOOL_DIR, SPOOL_QUOTA_BYTES, tmpfs_dir=SPOOL_TMPFS_DIR
+            )
+
+    @contextmanager
+    def local_file(self, url: FileUrl):
+        """Provides local path file is analysed at - unique spool path,
+        with file size reserved against spool quota and the file deleted
+        after analysis.
+
+        Args:
+            url (FileUrl): url of file to analyse
+
+        Yields:
+            str: local target path to download file to
+        """
+        with self.get_spool().item(url.path.split("/")[-1], url.size) as path:
+            yield path
+
+    def io_file_process(self, src: str, dest: str) -> Dict[str, Any]:
         """Groups io file related actions.
 
         Args:
             src (str): source url to download file from
             dest (str): local target path to download file to
         Returns:
-            bytes: metadata aquired through sequentional i/o actions
+            Dict[str, Any]: metadata aquired through sequentional i/o
+                actions, keyed by Meta attribute names
         """
-        self.download_file(src, dest)
+        with PROGRESS.stage(STAGE_DOWNLOADED), \
+                PROFILER.stage(STAGE_DOWNLOADED):
+            self.download_file(src, dest)
+        size = os.path.getsize(dest)
+        PROGRESS.add(STAGE_DOWNLOADED, items=0, bytes=size)
         # TODO: one flow for PE analysis - if file is reported corrupted
         # like 'file format not recognized'
         # there is need to run remaining analysis.
-        try:
-            imports = len(get_imports(dest))
-        except TypeError:
-            imports = None
-
-        try:
-            exports = len(get_exports(dest))
-        except TypeError:
-            exports = None
-        return (
-            calc_md5(dest), os.path.getsize(dest), get_arch(dest),
-            imports, exports
+        import_table = get_import_table(dest)
+        export_table = get_export_table(dest)
+
+        file_meta = {
+            DIGEST_COLUMNS[name]: str.encode(digest)
+            for name, digest in calc_digests(
+                dest, self.digest_algorithms, use_mmap=self.use_mmap
+                ).items()
+            if name in DIGEST_COLUMNS
+        }
+        imphash = calc_imphash(import_table)
+        file_meta.update(
+            size=size, arch=get_arch(dest),
+            imports=None if import_table is None else len(import_table),
+            exports=None if export_table is None else len(export_table[0]),
+            imphash=None if imphash is None else str.encode(imphash),
+            import_table=import_table,
+            export_functions=None if export_table is None else export_table[1]
         )
+        return file_meta
 
-    def process_item(self, url: FileUrl) -> None:
-        """Process given file url.
+    def analyse_item(self, url: FileUrl) -> Meta:
+        """Analyse given file url.
 
         Args:
             url (FileUrl): url of file to analyse
+
+        Returns:
+            Meta: data object with analysis results
         """
-        logger.debug(f"Processing item: {url}")
+        logger.debug(f"Analysing item: {url}")
 
         path = url.path
         extension = get_extension(path)
-        target_path = join(LOCAL_DL_DIR, path.split("/")[-1])
-        hash, size, arch, imports, exports = self.io_file_process(
-            url, target_path
+        with self.local_file(url) as local_path:
+            file_meta = self.io_file_process(url, local_path)
+        file_meta.setdefault("etag", url.etag)
+
+        return Meta(
+            path=path, label=get_label(path), extension=extension.lower(),
+            **file_meta
             )
 
-        self.send_to_db(
-                Meta(
-                    hash=str.encode(hash), size=size,
-                    path=path, extension=extension.lower(), arch=arch,
-                    imports=imports, exports=exports
+    def process_partition(
+            self, urls: Iterable[FileUrl],
+            on_written: Optional[Callable[[List[Meta]], None]] = None
+    ) -> None:
+        """Analyse given file urls and write results to sink in batches,
+        reporting progress and (when enabled) profiling the worker.
 
-                )
-        )
+        Args:
+            urls (Iterable[FileUrl]): urls of files to analyse
+            on_written (Optional[Callable[[List[Meta]], None]], optional):
+                called with every batch written to sink. Defaults to None.
+        """
+        PROGRESS.configure(self.progress_url)
+        PROFILER.configure(self.profile_dir, self.profile_mode)
+        with PROFILER.profile("partition"):
+            self.write_partition(urls, on_written)
+
+    def write_partition(
+            self, urls: Iterable[FileUrl],
+            on_written: Optional[Callable[[List[Meta]], None]] = None
+    ) -> None:
+        """Analyse given file urls and write results to sink in batches.
+
+        Args:
+            urls (Iterable[FileUrl]): urls of files to analyse
+            on_written (Optional[Callable[[List[Meta]], None]], optional):
+                called with every batch written to sink. Defaults to None.
+        """
+        sink = self.create_sink()
+        try:
+            batch = []
+            for db_entry in self.analyse_items(urls):
+                batch.append(db_entry)
+                if len(batch) >= self.batch_size:
+                    self.write_batch(sink, batch, on_written)
+                    batch = []
+            if batch:
+                self.write_batch(sink, batch, on_written)
+        finally:
+            sink.close()
+            for stats in sink.report():
+                logger.info(f"Sink report: {stats}")
+            PROGRESS.flush()
+
+    def analyse_tracked(self, url: FileUrl) -> Optional[Meta]:
+        logger.debug(f"Processing item: {url}")
+        try:
+            with PROGRESS.stage(STAGE_ANALYSED), \
+                    PROFILER.stage(STAGE_ANALYSED):
+                return self.analyse_item(url)
+        except Exception as e:
+            if not self.skip_permanent_failures or (
+                    not self.is_permanent_error(e)
+            ):
+                raise
+            logger.warning(f"Skipping failed item {url}. {repr(e)}")
+            return None
+
+    def is_permanent_error(self, error: BaseException) -> bool:
+        """Tells if analysis of item failed for good (e.g. file is gone),
+        so retrying it is pointless. Throttling, network or disk errors are
+        not permanent.
+
+        Args:
+            error (BaseException): raised error
+
+        Returns:
+            bool: True for permanent error
+        """
+        return isinstance(error, FileNotFoundError)
+
+    def analyse_items(self, urls: Iterable[FileUrl]) -> Iterator[Meta]:
+        """Analyses urls with up to `concurrency` items in flight, yielding
+        results in input order (without skipped items, see
+        `skip_permanent_failures`).
+
+        Args:
+            urls (Iterable[FileUrl]): urls of files to analyse
+
+        Yields:
+            Meta: data object with analysis results
+        """
+        if self.concurrency <= 1:
+            results = map(self.analyse_tracked, urls)
+        else:
+            results = self.analyse_concurrently(urls)
+        for db_entry in results:
+            if db_entry is not None:
+                yield db_entry
+
+    def analyse_concurrently(
+            self, urls: Iterable[FileUrl]
+    ) -> Iterator[Optional[Meta]]:
+        with ThreadPoolExecutor(
+                self.concurrency, thread_name_prefix="analyse"
+        ) as executor:
+            in_flight = deque()
+            for url in urls:
+                in_flight.append(executor.submit(self.analyse_tracked, url))
+                if len(in_flight) >= self.concurrency:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def write_batch(
+            self, sink: Sink, batch: List[Meta],
+            on_written: Optional[Callable[[List[Meta]], None]] = None
+    ) -> None:
+        """Writes batch to sink counting written (or failed) items.
+
+        Args:
+            sink (Sink): output sink
+            batch (List[Meta]): analysis results
+            on_written (Optional[Callable[[List[Meta]], None]], optional):
+                called with the batch once written. Defaults to None.
+        """
+        try:
+            with PROFILER.stage(STAGE_WRITTEN):
+                sink.write_batch(batch)
+        except Exception:
+            PROGRESS.add(STAGE_WRITTEN, items=0, errors=len(batch))
+            raise
+        PROGRESS.add(STAGE_WRITTEN, items=len(batch))
+        if on_written is not None:
+            on_written(batch)
+
+    def stream_jobs(
+            self, urls: Iterable[FileUrl],
+            run_job: Callable[[List[UrlChunk]], None], partitions: int
+    ) -> None:
+        """Submits urls to engine in jobs of `job_size` urls as they are
+        listed, with at most `jobs_in_flight` jobs running, so driver
+        memory does not grow with number of urls and processing starts
+        with the first listed job.
+
+        Args:
+            urls (Iterable[FileUrl]): urls of files to process, consumed
+                lazily
+            run_job (Callable[[List[UrlChunk]], None]): runs job processing
+                given chunks, one chunk per partition
+            partitions (int): partitions per job
+        """
+        urls = iter(urls)
+        partition_size = self.get_partition_size(partitions)
+        with ThreadPoolExecutor(
+                self.jobs_in_flight, thread_name_prefix="job"
+        ) as executor:
+            in_flight = deque()
+            while True:
+                chunks = list(
+                    pack_urls(islice(urls, self.job_size), partition_size)
+                    )
+                if not chunks:
+                    break
+                if len(in_flight) >= self.jobs_in_flight:
+                    in_flight.popleft().result()
+                in_flight.append(executor.submit(run_job, chunks))
+            while in_flight:
+                in_flight.popleft().result()
+
+    def process_chunks(self, chunks: Iterable[UrlChunk]) -> None:
+        self.process_partition(url for chunk in chunks for url in chunk)
+
+    def get_partitions(self) -> int:
+        """Returns number of partitions a job is split into.
+        """
+        spark = SparkSession.builder.appName('backend').getOrCreate()
+        return spark.sparkContext.defaultParallelism
+
+    def get_partition_size(self, partitions: int) -> int:
+        return max(1, -(-self.job_size // partitions))
 
     def spark_processor(self, items_to_process):
         spark = SparkSession.builder.appName('backend').getOrCreate()
         sc = spark.sparkContext
-        # for item in items_to_process:
-        #     self.process_item(item)
-        rdd = sc.parallelize(items_to_process)
-        rdd.foreach(lambda item: self.process_item(item))
+
+        def run_job(chunks: List[UrlChunk]) -> None:
+            rdd = sc.parallelize(chunks, len(chunks))
+            rdd.foreachPartition(self.process_chunks)
+
+        self.stream_jobs(items_to_process, run_job, sc.defaultParallelism)
 
     def process_files(self, urls) -> None:
         """Process metadata n of malicious and n of clean files.
@@ -219,8 +666,4 @@ class MetaProcessor:
             n_malicious (int): number of malicious files to process
             n_clean (int): number of malicious files to process
         """
-        # TODO: consider local dir as TemporaryDirectory - self cleanup
-        # after processing completed
-        os.makedirs(LOCAL_DL_DIR, exist_ok=True)
-
         self.spark_processor(urls)
@@ -0,0 +1,30 @@
+import logging
+from contextlib import contextmanager
+from os.path import join
+
+from clients.aws import FileUrl
+from processors.base import MetaProcessor
+
+logger = logging.getLogger()
+
+
+class LocalMixin:
+    """Mixin that adds local (or network mounted) directory as a source.
+    Files are analysed in place - nothing is downloaded or copied and
+    hashing reads memory mapped files.
+    """
+    use_mmap = True
+
+    @contextmanager
+    def local_file(self, url: FileUrl):
+        yield join(url.root_url, url.path)
+
+    def download_file(self, src: FileUrl, dest: str) -> None:
+        logger.debug(f"Analysing {dest} in place")
+
+
+class LocalDirProcessor(LocalMixin, MetaProcessor):
+    """Processes local files writing results to `output_sinks` given on
+    instantination.
+    """
+    pass
@@ -0,0 +1,297 @@
+import logging
+import struct
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# bytes fetched by single range request; DOS/NT headers and section table
+# of almost every PE file fit into the first block
+RANGE_BLOCK_SIZE = 4096
+MAX_NAME_LENGTH = 256
+# sanity limits protecting against corrupted (or hostile) headers
+MAX_SECTIONS = 96
+MAX_IMPORT_LIBRARIES = 1024
+MAX_IMPORT_FUNCTIONS = 16384
+MAX_EXPORT_FUNCTIONS = 65536
+
+PE32_MAGIC = 0x10b
+PE32_PLUS_MAGIC = 0x20b
+EXPORT_DIRECTORY = 0
+IMPORT_DIRECTORY = 1
+
+# same names as `objdump -f` reports for PE files
+MACHINE_ARCHS = {
+    0x014c: "i386",
+    0x8664: "i386:x86-64",
+    0x01c0: "arm",
+    0x01c4: "arm",
+    0xaa64: "aarch64",
+    0x0200: "ia64",
+}
+
+# fetch(offset, size) -> bytes, may return less than `size` at file end
+RangeFetcher = Callable[[int, int], bytes]
+# (virtual address, virtual size, raw data size, raw data offset)
+Section = Tuple[int, int, int, int]
+
+
+class PEHeaderError(Exception):
+    """Raised when file is not a PE file or its headers are corrupted
+    """
+    pass
+
+
+class RangeReader:
+    """Random access reader over remote file fetching aligned blocks on
+    demand. Fetched blocks are cached, consecutive missing blocks are
+    fetched with single request.
+    """
+
+    def __init__(
+            self, fetch: RangeFetcher, size: Optional[int] = None,
+            block_size: int = RANGE_BLOCK_SIZE
+    ) -> None:
+        self.fetch = fetch
+        self.size = size
+        self.block_size = block_size
+        self.blocks: Dict[int, bytes] = {}
+        self.bytes_fetched = 0
+        self.requests = 0
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Reads `size` bytes at `offset` (less at the end of the file).
+
+        Args:
+            offset (int): file offset
+            size (int): number of bytes to read
+
+        Returns:
+            bytes: read data
+        """
+        if offset < 0 or size <= 0:
+            return b""
+        if self.size is not None:
+            size = min(size, self.size - offset)
+            if size <= 0:
+                return b""
+        first = offset // self.block_size
+        last = (offset + size - 1) // self.block_size
+        missing = [i for i in range(first, last + 1) if i not in self.blocks]
+        if missing:
+            start = missing[0] * self.block_size
+            data = self.fetch(
+                start, (missing[-1] + 1) * self.block_size - start
+                )
+            self.requests += 1
+            self.bytes_fetched += len(data)
+            for i in range(missing[0], missing[-1] + 1):
+                begin = (i - missing[0]) * self.block_size
+                self.blocks[i] = data[begin:begin + self.block_size]
+        data = b"".join(self.blocks[i] for i in range(first, last + 1))
+        begin = offset - first * self.block_size
+        return data[begin:begin + size]
+
+    def read_cstring(self, offset: int) -> str:
+        """Reads zero terminated ASCII string.
+
+        Args:
+            offset (int): file offset
+
+        Returns:
+            str: decoded string (at most MAX_NAME_LENGTH characters)
+        """
+        data = self.read(offset, MAX_NAME_LENGTH)
+        end = data.find(b"\0")
+        if end >= 0:
+            data = data[:end]
+        return data.decode("ascii", errors="replace")
+
+
+def unpack_from(fmt: str, data: bytes, offset: int = 0) -> Tuple:
+    """`struct.unpack_from` raising PEHeaderError on truncated data.
+    """
+    try:
+        return struct.unpack_from(fmt, data, offset)
+    except struct.error as e:
+        raise PEHeaderError(f"Truncated header. {e}") from e
+
+
+class PEHeaders:
+    """Parses PE file structures needed for metadata - architecture and
+    import/export tables - reading only headers, section table and
+    import/export directories (following RVAs), never the whole file.
+    """
+
+    def __init__(self, reader: RangeReader) -> None:
+        self.reader = reader
+        self.sections: List[Section] = []
+        self.machine: Optional[int] = None
+        self.is_pe32_plus = False
+        self.directories: List[Tuple[int, int]] = []
+        self.parse_headers()
+
+    def parse_headers(self) -> None:
+        dos_header = self.reader.read(0, 64)
+        if dos_header[:2] != b"MZ":
+            raise PEHeaderError("Missing DOS header")
+        (nt_offset,) = unpack_from("<I", dos_header, 0x3c)
+        nt_headers = self.reader.read(nt_offset, 24)
+        if nt_headers[:4] != b"PE\0\0":
+            raise PEHeaderError("Missing NT header")
+        (
+            self.machine, sections_cnt, _, _, _, optional_header_size, _
+        ) = unpack_from("<HHIIIHH", nt_headers, 4)
+        optional_header = self.reader.read(
+            nt_offset + 24, optional_header_size
+            )
+        (magic,) = unpack_from("<H", optional_header)
+        if magic not in (PE32_MAGIC, PE32_PLUS_MAGIC):
+            raise PEHeaderError(f"Unknown optional header magic {magic:#x}")
+        self.is_pe32_plus = magic == PE32_PLUS_MAGIC
+        directories_offset = 112 if self.is_pe32_plus else 96
+        (directories_cnt,) = unpack_from(
+            "<I", optional_header, directories_offset - 4
+            )
+        directories_cnt = min(
+            directories_cnt,
+            (optional_header_size - directories_offset) // 8
+            )
+        self.directories = [
+            unpack_from("<II", optional_header, directories_offset + 8 * i)
+            for i in range(max(0, directories_cnt))
+        ]
+        section_table = self.reader.read(
+            nt_offset + 24 + optional_header_size,
+            40 * min(sections_cnt, MAX_SECTIONS)
+            )
+        self.sections = [
+            unpack_from("<IIII", section_table, offset + 8)
+            for offset in range(0, len(section_table) - 39, 40)
+        ]
+
+    @property
+    def arch(self) -> Optional[str]:
+        return MACHINE_ARCHS.get(self.machine)
+
+    def rva_to_offset(self, rva: int) -> Optional[int]:
+        """Maps relative virtual address to file offset.
+
+        Args:
+            rva (int): relative virtual address
+
+        Returns:
+            Optional[int]: file offset, None when rva is not backed by file
+        """
+        for address, virtual_size, raw_size, raw_offset in self.sections:
+            if address <= rva < address + max(virtual_size, raw_size):
+                if rva - address >= raw_size:
+                    return None
+                return raw_offset + rva - address
+        # headers are mapped 1:1
+        if not self.sections or rva < min(s[0] for s in self.sections):
+            return rva
+        return None
+
+    def get_directory(self, index: int) -> Optional[Tuple[int, int]]:
+        if index >= len(self.directories):
+            return None
+        rva, size = self.directories[index]
+        if not rva:
+            return None
+        return rva, size
+
+    def read_rva(self, rva: int, size: int) -> bytes:
+        offset = self.rva_to_offset(rva)
+        if offset is None:
+            return b""
+        return self.reader.read(offset, size)
+
+    def read_rva_cstring(self, rva: int) -> str:
+        offset = self.rva_to_offset(rva)
+        if offset is None:
+            return ""
+        return self.reader.read_cstring(offset)
+
+    def get_import_table(self) -> Optional[List[Tuple[str, List[str]]]]:
+        """Reads import table the way `get_import_table` reports it.
+
+        Returns:
+            Optional[List[Tuple[str, List[str]]]]: (library, functions)
+                pairs, None when file has no import directory
+        """
+        directory = self.get_directory(IMPORT_DIRECTORY)
+        if directory is None:
+            return None
+        rva, size = directory
+        # prefetch whole directory, it's read descriptor by descriptor
+        self.read_rva(rva, min(size, 20 * MAX_IMPORT_LIBRARIES))
+        thunk_size = 8 if self.is_pe32_plus else 4
+        thunk_fmt = "<Q" if self.is_pe32_plus else "<I"
+        ordinal_flag = 1 << (thunk_size * 8 - 1)
+        import_table = []
+        functions_cnt = 0
+        for i in range(MAX_IMPORT_LIBRARIES):
+            descriptor = self.read_rva(rva + 20 * i, 20)
+            if len(descriptor) < 20 or not any(descriptor):
+                break
+            (
+                original_thunk, _, _, name_rva, first_thunk
+            ) = unpack_from("<IIIII", descriptor)
+            functions = []
+            thunk_rva = original_thunk or first_thunk
+            while functions_cnt < MAX_IMPORT_FUNCTIONS:
+                data = self.read_rva(thunk_rva, thunk_size)
+                if len(data) < thunk_size:
+                    break
+                (thunk,) = unpack_from(thunk_fmt, data)
+                if not thunk:
+                    break
+                if thunk & ordinal_flag:
+                    functions.append(f"ord{thunk & 0xffff}")
+                else:
+                    # skip 2 bytes of hint
+                    functions.append(
+                        self.read_rva_cstring((thunk & 0x7fffffff) + 2)
+                        )
+                functions_cnt += 1
+                thunk_rva += thunk_size
+            import_table.append((self.read_rva_cstring(name_rva), functions))
+        return import_table
+
+    def get_export_table(self) -> Optional[Tuple[List[str], List[str]]]:
+        """Reads export table the way `get_export_table` reports it.
+
+        Returns:
+            Optional[Tuple[List[str], List[str]]]: export table names,
+                exported functions (unnamed ones as "ord<N>"), None when
+                file has no export directory
+        """
+        directory = self.get_directory(EXPORT_DIRECTORY)
+        if directory is None:
+            return None
+        rva, _ = directory
+        data = self.read_rva(rva, 40)
+        if len(data) < 40:
+            return None
+        (
+            name_rva, base, functions_cnt, names_cnt, functions_rva,
+            names_rva, ordinals_rva
+        ) = unpack_from("<IIIIIII", data, 12)
+        functions_cnt = min(functions_cnt, MAX_EXPORT_FUNCTIONS)
+        names_cnt = min(names_cnt, functions_cnt)
+        addresses = self.read_rva(functions_rva, 4 * functions_cnt)
+        name_rvas = self.read_rva(names_rva, 4 * names_cnt)
+        ordinals = self.read_rva(ordinals_rva, 2 * names_cnt)
+        names_cnt = min(len(name_rvas) // 4, len(ordinals) // 2)
+        named = {
+            unpack_from("<H", ordinals, 2 * i)[0]:
+                self.read_rva_cstring(unpack_from("<I", name_rvas, 4 * i)[0])
+            for i in range(names_cnt)
+        }
+        # unused ordinals have zero address
+        functions = [
+            named.get(i, f"ord{base + i}")
+            for i in range(len(addresses) // 4)
+            if unpack_from("<I", addresses, 4 * i)[0]
+        ]
+        return [self.read_rva_cstring(name_rva)], functions
@@ -0,0 +1,56 @@
+import logging
+
+from clients.aws import FileUrl, ProvideSizeSubscriber, is_missing_s3_object
+from definitions import (BOTO3_CLIENT, BUCKET, S3_RETRIER,
+                         S3_TRANSFER_MANAGER)
+from processors.base import MetaProcessor
+
+logger = logging.getLogger()
+
+
+class S3Mixin:
+    """Mixin that adds S3 store as a download source.
+    """
+    # Download via 'requests' lib implementation seems slower than boto3.
+    # boto3 dl is fastest when instance is reused for same bucket/region
+    # operations. Current implementation of boto3 cannot be pickeled though!
+    # What if files are downloaded from different buckets or regions?
+    # TODO: can't pass boto3 to instance attributes due to not pickable.
+    # Consider some configurable singleton client/session cache obj that allows
+    # dynamic assigment instead hardcoded.
+    bucket = BUCKET
+    boto3_client = BOTO3_CLIENT
+    s3_retrier = S3_RETRIER
+    transfer_manager = S3_TRANSFER_MANAGER
+
+    def download_file(self, src: FileUrl, dest: str) -> None:
+        """Downloads file from S3 store through shared transfer manager
+        (large files with concurrent ranged GETs). Throttling and transient
+        errors are retried with backoff.
+
+        Args:
+            src (FileUrl): remote file url
+            dest (str): destination file path
+        """
+        logger.debug(f"src: {repr(src)}, dest: {dest}")
+        self.s3_retrier.call(self.transfer_file, src, dest)
+
+    def is_permanent_error(self, error: BaseException) -> bool:
+        return is_missing_s3_object(error) or super().is_permanent_error(
+            error
+            )
+
+    def transfer_file(self, src: FileUrl, dest: str) -> None:
+        subscribers = None
+        if src.size is not None:
+            subscribers = [ProvideSizeSubscriber(src.size)]
+        self.transfer_manager.download(
+            self.bucket, src.path, dest, subscribers=subscribers
+            ).result()
+
+
+class S3Processor(S3Mixin, MetaProcessor):
+    """Processes S3 files writing results to `output_sinks` given on
+    instantination.
+    """
+    pass
@@ -0,0 +1,124 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from clients.aws import FileUrl
+from clients.profiling import PROFILER
+from clients.progress import PROGRESS, STAGE_DOWNLOADED
+from processors.base import MetaProcessor, calc_imphash
+from processors.pe_headers import (RANGE_BLOCK_SIZE, PEHeaderError, PEHeaders,
+                                   RangeReader)
+from processors.s3 import S3Mixin
+
+logger = logging.getLogger()
+
+
+class HeadersMixin:
+    """Mixin that analyses S3 files reading only PE headers, section table
+    and import/export directories with byte-range requests instead of
+    downloading whole files.
+
+    File digests are not calculated - `hash` and `sha256` are left empty
+    and rows are identified by object ETag stored as is in `etag` (MD5
+    of the content only for objects uploaded in single part).
+    """
+    block_size = RANGE_BLOCK_SIZE
+
+    @contextmanager
+    def local_file(self, url: FileUrl):
+        # nothing is downloaded
+        yield None
+
+    def fetch_range(self, src: FileUrl, offset: int, size: int) -> bytes:
+        """Fetches part of S3 file. Throttling and transient errors are
+        retried with backoff.
+
+        Args:
+            src (FileUrl): remote file url
+            offset (int): first byte to fetch
+            size (int): number of bytes to fetch
+
+        Returns:
+            bytes: fetched data, shorter at the end of the file
+        """
+        def get_range():
+            rsp = self.boto3_client.get_object(
+                Bucket=self.bucket, Key=src.path,
+                Range=f"bytes={offset}-{offset + size - 1}"
+                )
+            return rsp["Body"].read()
+        try:
+            return self.s3_retrier.call(get_range)
+        except ClientError as e:
+            # range starting past the end of the file
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise
+
+    def stat_file(self, src: FileUrl) -> Tuple[int, Optional[str]]:
+        """Returns size and ETag of S3 file, from listing when known.
+
+        Args:
+            src (FileUrl): remote file url
+
+        Returns:
+            Tuple[int, Optional[str]]: size, ETag (None if S3 has none)
+        """
+        if src.size is not None and src.etag is not None:
+            return src.size, src.etag
+        rsp = self.s3_retrier.call(
+            self.boto3_client.head_object, Bucket=self.bucket, Key=src.path
+            )
+        etag = rsp.get("ETag")
+        return rsp["ContentLength"], etag.strip('"') if etag else None
+
+    def io_file_process(self, src: FileUrl, dest: str) -> Dict[str, Any]:
+        """Reads metadata from remote PE headers, `dest` is not used.
+
+        Args:
+            src (FileUrl): source url to read file headers from
+            dest (str): not used, nothing is downloaded
+        Returns:
+            Dict[str, Any]: metadata keyed by Meta attribute names
+        """
+        size, etag = self.stat_file(src)
+        reader = RangeReader(
+            lambda offset, cnt: self.fetch_range(src, offset, cnt),
+            size=size, block_size=self.block_size
+            )
+        arch = import_table = export_table = None
+        with PROGRESS.stage(STAGE_DOWNLOADED), \
+                PROFILER.stage(STAGE_DOWNLOADED):
+            try:
+                headers = PEHeaders(reader)
+                arch = headers.arch
+                import_table = headers.get_import_table()
+                export_table = headers.get_export_table()
+            except PEHeaderError as e:
+                logger.debug(f"Can't read PE headers of {src}. {e}")
+        PROGRESS.add(STAGE_DOWNLOADED, items=0, bytes=reader.bytes_fetched)
+        logger.debug(
+            f"Fetched {reader.bytes_fetched} of {size} bytes of {src} "
+            f"in {reader.requests} requests"
+            )
+        if etag is None:
+            # row can't be deduplicated - flagged by missing hash and etag
+            logger.warning(f"No ETag of {src}, stored unidentified")
+        imphash = calc_imphash(import_table)
+        return dict(
+            hash=None, sha256=None, etag=etag, size=size, arch=arch,
+            imports=None if import_table is None else len(import_table),
+            exports=None if export_table is None else len(export_table[0]),
+            imphash=None if imphash is None else str.encode(imphash),
+            import_table=import_table,
+            export_functions=None if export_table is None else export_table[1]
+        )
+
+
+class S3HeadersProcessor(HeadersMixin, S3Mixin, MetaProcessor):
+    """Processes S3 files reading only their PE headers, writing results to
+    `output_sinks` given on instantination.
+    """
+    pass
@@ -0,0 +1,78 @@
+import logging
+from typing import List
+
+from pyspark.sql import SparkSession
+from pyspark.sql.types import (ArrayType, IntegerType, LongType, StringType,
+                               StructField, StructType, TimestampType)
+
+from clients.aws import UrlChunk
+from envs import (PARQUET_MAX_RECORDS_PER_FILE, PARQUET_OUTPUT_DIR,
+                  PARQUET_ROW_GROUP_BYTES)
+from processors.base import MetaProcessor
+from processors.s3 import S3Mixin
+from sinks.parquet import PARQUET_PARTITION_COLUMNS, meta_to_parquet_row
+
+logger = logging.getLogger()
+
+PARQUET_SCHEMA = StructType([
+    StructField("created", TimestampType(), False),
+    StructField("hash", StringType(), True),
+    StructField("etag", StringType(), True),
+    StructField("sha256", StringType(), True),
+    StructField("imphash", StringType(), True),
+    StructField("path", StringType(), False),
+    StructField("label", StringType(), True),
+    StructField("size", LongType(), False),
+    StructField("imports", IntegerType(), True),
+    StructField("exports", IntegerType(), True),
+    StructField("import_libraries", ArrayType(StringType()), True),
+    StructField("import_functions", ArrayType(StringType()), True),
+    StructField("export_functions", ArrayType(StringType()), True),
+    # partition columns
+    StructField("date", StringType(), False),
+    StructField("extension", StringType(), False),
+    StructField("arch", StringType(), True),
+])
+
+
+class ParquetMixin:
+    """Mixin that writes analysis results as partitioned Parquet dataset
+    with Spark instead of writing them through sinks.
+
+    Rows are written by Spark executors straight from the analysis stage.
+    Spark sorts every task output by partition columns, so each task keeps
+    only one file open and buffers at most one row group
+    (`row_group_bytes`) in memory; `max_records_per_file` bounds file size.
+    """
+    output_dir = PARQUET_OUTPUT_DIR
+    partition_columns = PARQUET_PARTITION_COLUMNS
+    row_group_bytes = PARQUET_ROW_GROUP_BYTES
+    max_records_per_file = PARQUET_MAX_RECORDS_PER_FILE
+    # concurrent appends to one dataset share its '_temporary' directory
+    jobs_in_flight = 1
+
+    def spark_processor(self, items_to_process):
+        spark = SparkSession.builder.appName('backend').getOrCreate()
+        sc = spark.sparkContext
+
+        def run_job(chunks: List[UrlChunk]) -> None:
+            rdd = sc.parallelize(chunks, len(chunks)).flatMap(iter).map(
+                lambda item: meta_to_parquet_row(self.analyse_item(item))
+                )
+            logger.debug(f"Writing parquet dataset to {self.output_dir}")
+            (
+                spark.createDataFrame(rdd, schema=PARQUET_SCHEMA)
+                .write
+                .partitionBy(*self.partition_columns)
+                .option("parquet.block.size", self.row_group_bytes)
+                .option("maxRecordsPerFile", self.max_records_per_file)
+                .option("compression", "snappy")
+                .mode("append")
+                .parquet(self.output_dir)
+            )
+
+        self.stream_jobs(items_to_process, run_job, sc.defaultParallelism)
+
+
+class S3ParquetProcessor(ParquetMixin, S3Mixin, MetaProcessor):
+    pass
@@ -0,0 +1,161 @@
+import logging
+import time
+from abc import abstractmethod
+from typing import List, Sequence
+
+from db_models.meta import Meta
+
+logger = logging.getLogger()
+
+
+class SinkError(Exception):
+    """Generic sink related error
+    """
+    pass
+
+
+class SinkStats:
+    """Latency and throughput counters of single sink.
+    """
+    __slots__ = ('name', 'batches', 'rows', 'seconds', 'max_latency')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max_latency = 0.0
+
+    def record(self, rows: int, seconds: float) -> None:
+        """Registers single timed sink operation.
+
+        Args:
+            rows (int): number of rows handled by the operation
+            seconds (float): operation duration
+        """
+        self.batches += 1
+        self.rows += rows
+        self.seconds += seconds
+        self.max_latency = max(self.max_latency, seconds)
+
+    @property
+    def avg_latency(self) -> float:
+        return self.seconds / self.batches if self.batches else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}("
+            f"name={repr(self.name)}, "
+            f"batches={self.batches}, "
+            f"rows={self.rows}, "
+            f"seconds={self.seconds:.3f}, "
+            f"avg_latency={self.avg_latency:.3f}, "
+            f"max_latency={self.max_latency:.3f}, "
+            f"rows_per_second={self.rows_per_second:.1f}"
+            ")"
+        )
+
+
+class Sink:
+    """Interface base class for analysis results outputs.
+
+    Subclasses implement `_write_batch`, `_flush` and `_close`; the public
+    methods time every call into `stats`.
+    """
+    name = "sink"
+
+    def __init__(self) -> None:
+        self.stats = SinkStats(self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @abstractmethod
+    def _write_batch(self, entries: Sequence[Meta]) -> None:
+        pass
+
+    def _flush(self) -> None:
+        pass
+
+    def _close(self) -> None:
+        pass
+
+    def write_batch(self, entries: Sequence[Meta]) -> None:
+        """Writes (or buffers) batch of data objects.
+
+        Args:
+            entries (Sequence[Meta]): data objects
+        """
+        start_time = time.monotonic()
+        self._write_batch(entries)
+        self.stats.record(len(entries), time.monotonic() - start_time)
+
+    def flush(self) -> None:
+        """Makes all written entries durable.
+        """
+        start_time = time.monotonic()
+        self._flush()
+        self.stats.seconds += time.monotonic() - start_time
+
+    def close(self) -> None:
+        """Flushes and releases sink resources (also when flush fails).
+        """
+        try:
+            self.flush()
+        finally:
+            self._close()
+        logger.info(f"Sink closed: {self.stats}")
+
+    def report(self) -> List[SinkStats]:
+        """Returns stats of this sink (and of wrapped sinks).
+
+        Returns:
+            List[SinkStats]: stats
+        """
+        return [self.stats]
+
+
+class FanOutSink(Sink):
+    """Writes every batch to all wrapped sinks.
+    """
+    name = "fan-out"
+
+    def __init__(self, sinks: Sequence[Sink]) -> None:
+        super().__init__()
+        self.sinks = list(sinks)
+
+    def _write_batch(self, entries: Sequence[Meta]) -> None:
+        for sink in self.sinks:
+            sink.write_batch(entries)
+
+    def _flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        """Closes all wrapped sinks (they log own stats), also when some of
+        them fail. The first error is raised after the rest are closed.
+        """
+        error = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                if error is not None:
+                    logger.exception(f"Closing sink {sink.name} failed")
+                else:
+                    error = e
+        if error is not None:
+            raise error
+
+    def report(self) -> List[SinkStats]:
+        return [self.stats] + [
+            stats for sink in self.sinks for stats in sink.report()
+        ]
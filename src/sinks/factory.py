@@ -0,0 +1,65 @@
+from typing import Sequence
+
+from envs import (JSONL_OUTPUT_DIR, PARQUET_OUTPUT_DIR,
+                  PARQUET_ROW_GROUP_ROWS, SQLITE_PATH)
+from sinks.base import FanOutSink, Sink, SinkError
+
+SINK_NAMES = ("mysql", "sqlite", "jsonl", "parquet")
+
+
+def create_single_sink(name: str) -> Sink:
+    """Creates sink by its name.
+
+    Sinks are imported lazily so their specific dependencies (e.g. MySQL
+    driver, pyarrow) are needed only when the sink is used.
+
+    Args:
+        name (str): one of SINK_NAMES
+
+    Returns:
+        Sink: sink instance
+    """
+    if name == "mysql":
+        from sinks.mysql import MySQLSink
+        return MySQLSink()
+    if name == "sqlite":
+        from sinks.sql import SQLiteSink
+        return SQLiteSink(SQLITE_PATH)
+    if name == "jsonl":
+        from sinks.jsonl import JsonLinesSink
+        return JsonLinesSink(JSONL_OUTPUT_DIR)
+    if name == "parquet":
+        from sinks.parquet import ParquetSink
+        return ParquetSink(
+            PARQUET_OUTPUT_DIR, row_group_rows=PARQUET_ROW_GROUP_ROWS
+            )
+    raise SinkError(f"Unknown sink {repr(name)}. Expected one of {SINK_NAMES}")
+
+
+def create_sink(names: Sequence[str]) -> Sink:
+    """Creates sink writing to all given outputs.
+
+    Args:
+        names (Sequence[str]): sink names
+
+    Returns:
+        Sink: single sink or FanOutSink wrapping all of them
+    """
+    if not names:
+        raise SinkError("At least one sink required")
+    sinks = [create_single_sink(name) for name in names]
+    if len(sinks) == 1:
+        return sinks[0]
+    return FanOutSink(sinks)
+
+
+def parse_sink_names(value: str) -> Sequence[str]:
+    """Parses comma separated sink names (e.g. "mysql,jsonl").
+
+    Args:
+        value (str): comma separated names
+
+    Returns:
+        Sequence[str]: sink names
+    """
+    return tuple(name.strip() for name in value.split(",") if name.strip())
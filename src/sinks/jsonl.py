@@ -0,0 +1,43 @@
+import json
+import logging
+import os
+import uuid
+from typing import Sequence
+
+from db_models.meta import Meta
+from sinks.base import Sink
+
+logger = logging.getLogger()
+
+
+class JsonLinesSink(Sink):
+    """Writes data objects as JSON lines. Every sink instance (worker)
+    writes its own part file in `directory`.
+    """
+    name = "jsonl"
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.path = os.path.join(
+            directory, f"part-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+            )
+        self._file = None
+
+    def _write_batch(self, entries: Sequence[Meta]) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            logger.debug(f"Opening {self.path}")
+            self._file = open(self.path, mode="a", encoding="utf-8")
+        self._file.writelines(
+            json.dumps(db_entry.to_record(), default=str) + "\n"
+            for db_entry in entries
+        )
+
+    def _flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,12 @@
+from clients.db import DB_RETRIER, SYNC_ENGINE
+from sinks.sql import SqlSink
+
+
+class MySQLSink(SqlSink):
+    """Writes data objects to MySQL db. Deadlocks and lost connections are
+    retried with backoff.
+    """
+    name = "mysql"
+
+    def __init__(self) -> None:
+        super().__init__(SYNC_ENGINE, DB_RETRIER)
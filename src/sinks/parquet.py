@@ -0,0 +1,104 @@
+import logging
+import uuid
+from typing import Any, Dict, Sequence
+
+from db_models.meta import Meta
+from sinks.base import Sink, SinkError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, needed only by ParquetSink
+    pa = None
+    pq = None
+
+logger = logging.getLogger()
+
+PARQUET_PARTITION_COLUMNS = ("date", "extension", "arch")
+
+
+def meta_to_parquet_row(db_entry: Meta) -> Dict[str, Any]:
+    """Converts data object to parquet row (record with partition columns).
+
+    Args:
+        db_entry (Meta): data object
+
+    Returns:
+        Dict[str, Any]: parquet row
+    """
+    record = db_entry.to_record()
+    record["date"] = record["created"].strftime("%Y-%m-%d")
+    return record
+
+
+def get_arrow_schema():
+    """Returns arrow schema of parquet rows.
+
+    Returns:
+        pa.Schema: schema
+    """
+    return pa.schema([
+        pa.field("created", pa.timestamp("us"), False),
+        pa.field("hash", pa.string()),
+        pa.field("etag", pa.string()),
+        pa.field("sha256", pa.string()),
+        pa.field("imphash", pa.string()),
+        pa.field("path", pa.string(), False),
+        pa.field("label", pa.string()),
+        pa.field("size", pa.int64(), False),
+        pa.field("imports", pa.int32()),
+        pa.field("exports", pa.int32()),
+        pa.field("import_libraries", pa.list_(pa.string())),
+        pa.field("import_functions", pa.list_(pa.string())),
+        pa.field("export_functions", pa.list_(pa.string())),
+        # partition columns
+        pa.field("date", pa.string(), False),
+        pa.field("extension", pa.string(), False),
+        pa.field("arch", pa.string()),
+    ])
+
+
+class ParquetSink(Sink):
+    """Writes data objects to partitioned Parquet dataset with pyarrow.
+
+    Rows are buffered up to `row_group_rows` and then written as new part
+    files (one row group each) into hive style partition directories, so
+    memory use is bounded by single row group.
+    """
+    name = "parquet"
+
+    def __init__(
+            self, directory: str,
+            partition_columns: Sequence[str] = PARQUET_PARTITION_COLUMNS,
+            row_group_rows: int = 10000
+    ) -> None:
+        if pa is None:
+            raise SinkError("ParquetSink requires 'pyarrow' package")
+        super().__init__()
+        self.directory = directory
+        self.partition_columns = list(partition_columns)
+        self.row_group_rows = row_group_rows
+        self.schema = get_arrow_schema()
+        self._rows = []
+        self._part_prefix = f"part-{uuid.uuid4().hex[:8]}"
+        self._parts_cnt = 0
+
+    def _write_batch(self, entries: Sequence[Meta]) -> None:
+        self._rows.extend(meta_to_parquet_row(e) for e in entries)
+        if len(self._rows) >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        table = pa.Table.from_pylist(self._rows, schema=self.schema)
+        self._rows = []
+        logger.debug(f"Writing {table.num_rows} rows to {self.directory}")
+        pq.write_to_dataset(
+            table, self.directory, partition_cols=self.partition_columns,
+            basename_template=(
+                f"{self._part_prefix}-{self._parts_cnt}-{{i}}.parquet"
+                ),
+            row_group_size=self.row_group_rows
+        )
+        self._parts_cnt += 1
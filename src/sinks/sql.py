@@ -0,0 +1,221 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from clients.retry import Retrier, RetryPolicy
+from db_models.meta import Base, Meta
+from db_models.summary import add_summaries
+from db_models.symbols import add_symbols, intern_symbols
+from sinks.base import Sink
+
+logger = logging.getLogger()
+
+SQLITE_LOCKED_POLICY = RetryPolicy(
+    "sqlite-locked", max_attempts=10, base_delay=0.05, max_delay=2.0
+    )
+
+
+def classify_sqlite_error(error: BaseException) -> Optional[RetryPolicy]:
+    """Maps sqlite related error to retry policy.
+
+    Args:
+        error (BaseException): raised error
+
+    Returns:
+        Optional[RetryPolicy]: policy to apply, None if error is permanent
+    """
+    if isinstance(error, OperationalError) and "locked" in str(error.orig):
+        return SQLITE_LOCKED_POLICY
+    return None
+
+
+def copy_entry(db_entry: Meta) -> Meta:
+    """Returns transient copy of data object, so the same object can be
+    written by several sinks (and retried) without being bound to session.
+
+    Args:
+        db_entry (Meta): data object
+
+    Returns:
+        Meta: copy without primary key
+    """
+    copy = Meta(**{
+        column.name: getattr(db_entry, column.name)
+        for column in Meta.__table__.columns
+        if column.name != "id"
+    })
+    copy.import_table = db_entry.import_table
+    copy.export_functions = db_entry.export_functions
+    return copy
+
+
+def get_entry_key(db_entry: Meta) -> Optional[Tuple[str, Any]]:
+    """Returns deduplication key of data object - content MD5 or, for
+    headers only rows, S3 ETag. Objects with neither are not deduplicated.
+
+    Args:
+        db_entry (Meta): data object
+
+    Returns:
+        Optional[Tuple[str, Any]]: (column name, value)
+    """
+    if db_entry.hash is not None:
+        return "hash", db_entry.hash
+    if db_entry.etag is not None:
+        return "etag", db_entry.etag
+    return None
+
+
+def get_known_keys(
+        session: Session, entries: Sequence[Meta]
+) -> Set[Tuple[str, Any]]:
+    """Returns deduplication keys of entries already present in db.
+
+    Headers only row is known when any row has its ETag, so files already
+    analysed in full are not analysed by headers again.
+
+    Args:
+        session (Session): db session
+        entries (Sequence[Meta]): data objects
+
+    Returns:
+        Set[Tuple[str, Any]]: keys, see `get_entry_key`
+    """
+    keys = set(filter(None, map(get_entry_key, entries)))
+    known = set()
+    for name in ("hash", "etag"):
+        values = {value for key, value in keys if key == name}
+        if values:
+            column = getattr(Meta, name)
+            known.update(
+                (name, value)
+                for value in session.execute(
+                    select(column).where(column.in_(values))
+                ).scalars()
+            )
+    return known
+
+
+def get_headers_only_ids(
+        session: Session, entries: Sequence[Meta]
+) -> Dict[str, int]:
+    """Returns ids of headers only rows (no hash) with ETags of fully
+    analysed entries.
+
+    Args:
+        session (Session): db session
+        entries (Sequence[Meta]): data objects
+
+    Returns:
+        Dict[str, int]: ETag -> row id
+    """
+    etags = {
+        db_entry.etag for db_entry in entries
+        if db_entry.hash is not None and db_entry.etag is not None
+    }
+    if not etags:
+        return {}
+    return dict(session.execute(
+        select(Meta.etag, Meta.id)
+        .where(Meta.etag.in_(etags), Meta.hash.is_(None))
+    ).all())
+
+
+class SqlSink(Sink):
+    """Writes batches of data objects to relational db in one transaction
+    per batch, together with their symbols and summary table updates.
+    Entries already present in db (see `get_entry_key`) are skipped. Fully
+    analysed entry of an object with headers only row completes that row
+    with content digests instead of adding another one.
+    """
+    name = "sql"
+
+    def __init__(
+            self, engine: Engine, retrier: Optional[Retrier] = None
+    ) -> None:
+        super().__init__()
+        self.engine = engine
+        self.session_factory = sessionmaker(
+            engine, expire_on_commit=False, future=True
+            )
+        self.retrier = retrier
+
+    def _write_batch(self, entries: Sequence[Meta]) -> None:
+        if self.retrier is None:
+            self._insert_new(entries)
+        else:
+            self.retrier.call(self._insert_new, entries)
+
+    def _insert_new(self, entries: Sequence[Meta]) -> List[Meta]:
+        # in own short transactions, see intern_names
+        dll_ids, function_ids = intern_symbols(self.engine, entries)
+        with self.session_factory.begin() as session:
+            seen = get_known_keys(session, entries)
+            logger.debug(f"Already in db: {len(seen)}/{len(entries)}")
+            # ETag -> id of headers only row in db or its copy in batch
+            headers_only: Dict[str, Union[int, Meta]] = dict(
+                get_headers_only_ids(session, entries)
+                )
+            new_entries = []
+            for db_entry in entries:
+                key = get_entry_key(db_entry)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                if db_entry.hash is not None and db_entry.etag is not None:
+                    # later headers only entries of the object are known
+                    seen.add(("etag", db_entry.etag))
+                    row = headers_only.pop(db_entry.etag, None)
+                    if row is not None:
+                        self.complete_headers_only(session, row, db_entry)
+                        continue
+                copy = copy_entry(db_entry)
+                if key is not None and key[0] == "etag":
+                    headers_only[copy.etag] = copy
+                new_entries.append(copy)
+            session.add_all(new_entries)
+            add_symbols(session, new_entries, dll_ids, function_ids)
+            add_summaries(session, new_entries)
+            logger.debug(f"Added {len(new_entries)} new rows to db")
+        return new_entries
+
+    def complete_headers_only(
+            self, session: Session, row: Union[int, Meta], db_entry: Meta
+    ) -> None:
+        """Sets content digests of fully analysed entry on headers only
+        row of the same object (same ETag). Other columns, symbols and
+        summary already describe the object.
+
+        Args:
+            session (Session): db session
+            row (Union[int, Meta]): id of the row in db or its new entry
+            db_entry (Meta): fully analysed data object
+        """
+        digests = dict(hash=db_entry.hash, sha256=db_entry.sha256)
+        if isinstance(row, Meta):
+            for name, value in digests.items():
+                setattr(row, name, value)
+        else:
+            session.execute(
+                update(Meta).where(Meta.id == row).values(**digests)
+            )
+
+
+class SQLiteSink(SqlSink):
+    """Writes data objects to local sqlite file - offline ingest without
+    db server. Tables are created on first use.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        engine = create_engine(
+            f"sqlite:///{path}", future=True,
+            connect_args={"timeout": 60}
+            )
+        Base.metadata.create_all(engine)
+        super().__init__(engine, Retrier(classify_sqlite_error))
@@ -0,0 +1,74 @@
+import pytest
+
+from clients.autotune import (Autotuner, get_round_bounds,
+                              load_tuned_settings, write_report)
+
+
+def rate_of(settings):
+    # throughput peaks at concurrency 8, batch size does not matter
+    return 100 - abs(settings["concurrency"] - 8) * 10
+
+
+def run_rounds(tuner, rounds, rate=rate_of):
+    for _ in range(rounds):
+        settings = tuner.propose()
+        tuner.record(settings, rate(settings), 1.0)
+
+
+def test_autotuner_climbs_to_best_settings():
+    tuner = Autotuner({"concurrency": 1, "batch_size": 100})
+    run_rounds(tuner, 18)
+    assert tuner.best["concurrency"] == 8
+    assert tuner.best_rate == 100
+    # holds best settings after convergence
+    assert tuner.propose()["concurrency"] == 8
+
+
+def test_autotuner_follows_throughput_changes():
+    tuner = Autotuner({"concurrency": 8, "batch_size": 100})
+    run_rounds(tuner, 20)
+    assert tuner.best["concurrency"] == 8
+    run_rounds(tuner, 40, lambda settings: 1000 / settings["concurrency"])
+    assert tuner.best["concurrency"] == 1
+
+
+def test_autotuner_respects_bounds():
+    tuner = Autotuner(
+        {"concurrency": 100, "batch_size": 1}, warmup_rounds=2
+        )
+    assert tuner.best == {"concurrency": 64, "batch_size": 10}
+    for _ in range(10):
+        settings = tuner.propose()
+        assert 1 <= settings["concurrency"] <= 64
+        assert 10 <= settings["batch_size"] <= 2000
+        tuner.record(settings, settings["concurrency"], 1.0)
+
+
+def test_autotuner_remeasures_gaining_move():
+    tuner = Autotuner({"concurrency": 8, "batch_size": 100})
+    rates = iter([100, 150, 90])
+    # noisy round of the first move, not repeated by its re-measurement
+    run_rounds(tuner, 3, lambda settings: next(rates))
+    assert tuner.best == {"concurrency": 8, "batch_size": 100}
+    assert tuner.propose() == {"concurrency": 4, "batch_size": 100}
+
+
+@pytest.mark.parametrize('items_per_partition, expected_result', [
+    (25, (10, 25)),
+    (4, (4, 4)),
+    (12500, (10, 2000)),
+])
+def test_round_bounds_limit_batch_size(items_per_partition, expected_result):
+    bounds = get_round_bounds(items_per_partition)
+    assert bounds["batch_size"] == expected_result
+    assert bounds["concurrency"] == (1, 64)
+
+
+def test_report_roundtrip(tmp_path):
+    path = str(tmp_path / "tune" / "report.json")
+    assert load_tuned_settings(path) is None
+    tuner = Autotuner({"concurrency": 2, "batch_size": 100})
+    run_rounds(tuner, 3)
+    write_report(path, tuner.report())
+    assert load_tuned_settings(path) == tuner.best
+    assert len(tuner.report()["rounds"]) == 3
@@ -0,0 +1,309 @@
+import datetime
+import io
+import pickle
+import random
+from bisect import bisect_right
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from s3transfer.futures import TransferMeta
+
+from clients.aws import (KEY_ALPHABET, FileUrl, ProvideSizeSubscriber,
+                         S3Scrapper, encode_key_position, get_key_shard,
+                         get_shard_boundaries, get_shard_cnt,
+                         get_shard_key_range, get_transfer_manager,
+                         is_missing_s3_object, pack_urls)
+
+
+@pytest.mark.parametrize('position, expected_result', [
+    (0, "00"),
+    (61, "0z"),
+    (62, "10"),
+    (62 * 62 - 1, "zz"),
+])
+def test_encode_key_position(position, expected_result):
+    assert encode_key_position(position) == expected_result
+
+
+@pytest.mark.parametrize('shards', [1, 2, 3, 7, 16])
+def test_shard_key_ranges_cover_key_space(shards):
+    keys = sorted(
+        f"0/{a}{b}{suffix}" for a in KEY_ALPHABET for b in KEY_ALPHABET[::7]
+        for suffix in ("", "file.exe")
+    ) + ["0/-file.exe", "0/~file.exe"]
+    owners = {}
+    for shard in range(shards):
+        start_at, end_before = get_shard_key_range("0/", shard, shards)
+        for key in keys:
+            if (
+                (start_at is None or key >= start_at)
+                and (end_before is None or key < end_before)
+            ):
+                assert key not in owners
+                owners[key] = shard
+    assert len(owners) == len(keys)
+    assert all(
+        get_key_shard(key, "0/", shards) == shard
+        for key, shard in owners.items()
+    )
+
+
+def test_shard_cnt_sums_to_total():
+    assert [get_shard_cnt(10, shard, 4) for shard in range(4)] == [3, 3, 2, 2]
+
+
+def test_sharded_listing_stops_at_shard_end():
+    boto3_client = MagicMock()
+    boto3_client.list_objects_v2.side_effect = [
+        {
+            "Contents": [{"Key": "0/0a.exe"}, {"Key": "0/00Tree.html"}],
+            "IsTruncated": True, "NextContinuationToken": "token"
+        },
+        {
+            "Contents": [{"Key": "0/Ua.exe"}, {"Key": "0/Va.exe"}],
+            "IsTruncated": True, "NextContinuationToken": "token2"
+        },
+    ]
+    s3scrapper = S3Scrapper("bucket", boto3_client, "url", shard=(0, 2))
+    assert list(s3scrapper.list_keys(100, "0/")) == ["0/0a.exe", "0/Ua.exe"]
+    assert boto3_client.list_objects_v2.call_count == 2
+    assert "StartAfter" not in (
+        boto3_client.list_objects_v2.call_args_list[0].kwargs
+    )
+
+
+class FakeS3Client:
+    """Serves list_objects_v2 from in-memory sorted keys.
+    """
+
+    def __init__(self, keys, modified=None):
+        self.keys = sorted(keys)
+        # key -> LastModified
+        self.modified = modified or {}
+        self.calls_cnt = 0
+
+    def list_objects_v2(
+            self, Bucket, Prefix, Delimiter, MaxKeys, StartAfter=None,
+            ContinuationToken=None
+    ):
+        self.calls_cnt += 1
+        start_after = ContinuationToken or StartAfter or ""
+        prefixed = [key for key in self.keys if key.startswith(Prefix)]
+        idx = bisect_right(prefixed, start_after)
+        keys = prefixed[idx:idx + MaxKeys]
+        is_truncated = idx + MaxKeys < len(prefixed)
+        rsp = {
+            "Contents": [
+                {"Key": key, "LastModified": self.modified[key]}
+                if key in self.modified else {"Key": key}
+                for key in keys
+            ],
+            "IsTruncated": is_truncated
+        }
+        if is_truncated:
+            rsp["NextContinuationToken"] = keys[-1]
+        return rsp
+
+
+def make_random_keys(prefix, cnt):
+    rnd = random.Random(0)
+    return [
+        prefix + "".join(rnd.choice(KEY_ALPHABET) for _ in range(32)) + ".exe"
+        for _ in range(cnt)
+    ]
+
+
+def test_sample_keys_is_reproducible_and_spread():
+    keys = make_random_keys("0/", 5000)
+    boto3_client = FakeS3Client(keys + make_random_keys("1/", 100))
+    sample = list(
+        S3Scrapper("bucket", boto3_client, "url", sample_seed=1)
+        .list_keys(50, "0/")
+    )
+    assert len(sample) == len(set(sample)) == 50
+    assert sample == sorted(sample)
+    assert set(sample) <= set(keys)
+    # spread over whole key space, not just first keys
+    assert sample[-1] > sorted(keys)[-500]
+    assert boto3_client.calls_cnt <= 100
+
+    assert list(
+        S3Scrapper("bucket", FakeS3Client(keys), "url", sample_seed=1)
+        .list_keys(50, "0/")
+    ) == sample
+    assert list(
+        S3Scrapper("bucket", FakeS3Client(keys), "url", sample_seed=2)
+        .list_keys(50, "0/")
+    ) != sample
+
+
+@pytest.mark.parametrize('keys_cnt, n', [(60, 50), (50, 50), (30, 50)])
+def test_sample_keys_fills_empty_strata(keys_cnt, n):
+    # keys only in a small part of the key space - most strata are empty
+    keys = sorted(
+        "0/A" + key[len("0/"):] for key in make_random_keys("0/", keys_cnt)
+        )
+    sample = list(
+        S3Scrapper(
+            "bucket", FakeS3Client(keys), "url", sample_seed=1,
+            list_concurrency=4
+        ).list_keys(n, "0/")
+    )
+    assert len(sample) == len(set(sample)) == min(n, keys_cnt)
+    assert sample == sorted(sample)
+    assert set(sample) <= set(keys)
+
+
+def test_sample_keys_respects_shard():
+    keys = make_random_keys("0/", 2000)
+    sample = list(
+        S3Scrapper(
+            "bucket", FakeS3Client(keys), "url", shard=(1, 3), sample_seed=1
+        ).list_keys(30, "0/")
+    )
+    assert len(sample) == 10
+    assert all(get_key_shard(key, "0/", 3) == 1 for key in sample)
+
+
+def test_sharded_listing_includes_boundary_keys():
+    keys = sorted(
+        get_shard_boundaries("0/", 3) + make_random_keys("0/", 30)
+        )
+    listed = [
+        list(
+            S3Scrapper(
+                "bucket", FakeS3Client(keys), "url", shard=(shard, 3)
+            ).list_keys(100, "0/")
+        )
+        for shard in range(3)
+    ]
+    assert sum(listed, []) == keys
+    assert all(
+        get_key_shard(key, "0/", 3) == shard
+        for shard, shard_keys in enumerate(listed) for key in shard_keys
+    )
+
+
+def test_sample_keys_includes_boundary_key():
+    boundary = get_shard_boundaries("0/", 3)[0]
+    keys = [boundary] + [
+        key for key in make_random_keys("0/", 100)
+        if get_key_shard(key, "0/", 3) != 1
+    ]
+    sample = list(
+        S3Scrapper(
+            "bucket", FakeS3Client(keys), "url", shard=(1, 3), sample_seed=1
+        ).list_keys(30, "0/")
+    )
+    assert sample == [boundary]
+
+
+@pytest.mark.parametrize('error, expected_result', [
+    (ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject"), True),
+    (ClientError({"Error": {"Code": "404"}}, "HeadObject"), True),
+    (ClientError({"Error": {"Code": "SlowDown"}}, "GetObject"), False),
+    (EndpointConnectionError(endpoint_url="url"), False),
+])
+def test_is_missing_s3_object(error, expected_result):
+    assert is_missing_s3_object(error) == expected_result
+
+
+@pytest.mark.parametrize('size', [3, None])
+def test_transfer_manager_uses_listed_size(tmp_path, size):
+    client = boto3.client(
+        "s3", region_name="eu-west-1", aws_access_key_id="key",
+        aws_secret_access_key="secret"
+        )
+    # unexpected HEAD request would fail on missing stubbed response
+    stubber = Stubber(client)
+    # s3transfer newer than the locked 0.6.0 needs also the ETag to skip
+    # HEAD request, which is not provided
+    if size is None or hasattr(TransferMeta, "provide_object_etag"):
+        stubber.add_response(
+            "head_object", {"ContentLength": 3, "ETag": '"etag"'}
+            )
+    stubber.add_response(
+        "get_object", {"Body": StreamingBody(io.BytesIO(b"abc"), 3)}
+        )
+    dest = tmp_path / "a.exe"
+    with stubber, get_transfer_manager(
+            client, max_concurrency=2, multipart_threshold=1024,
+            multipart_chunksize=1024
+    ) as manager:
+        subscribers = (
+            [ProvideSizeSubscriber(size)] if size else None
+        )
+        manager.download(
+            "bucket", "0/a.exe", str(dest), subscribers=subscribers
+            ).result()
+    assert dest.read_bytes() == b"abc"
+    stubber.assert_no_pending_responses()
+
+
+def modified_at(minute):
+    return datetime.datetime(
+        2026, 1, 1, 0, minute, tzinfo=datetime.timezone.utc
+        )
+
+
+@pytest.mark.parametrize('keys_ordered, watermark, expected_keys', [
+    (
+        False, (None, None), ["0/a.exe", "0/b.exe", "0/c.exe"]
+    ),
+    (
+        # same LastModified as watermark, but greater key
+        False, (datetime.datetime(2026, 1, 1, 0, 2), "0/a.exe"),
+        ["0/b.exe"]
+    ),
+    (
+        # listed after watermark key regardless of LastModified
+        True, (datetime.datetime(2026, 1, 1, 0, 9), "0/a.exe"),
+        ["0/b.exe", "0/c.exe"]
+    ),
+])
+def test_list_new_objects(keys_ordered, watermark, expected_keys):
+    modified = {
+        "0/a.exe": modified_at(2), "0/b.exe": modified_at(2),
+        "0/c.exe": modified_at(1), "0/d.exe": modified_at(30),
+    }
+    client = FakeS3Client(modified, modified)
+    scrapper = S3Scrapper("bucket", client, "url")
+    new_objects = list(scrapper.list_new_objects(
+        "0/", watermark, keys_ordered=keys_ordered,
+        modified_before=datetime.datetime(2026, 1, 1, 0, 10), page_size=2
+        ))
+    assert [url.path for url, _ in new_objects] == expected_keys
+    assert all(modified.tzinfo is None for _, modified in new_objects)
+
+
+def test_pack_urls_roundtrip():
+    root_url = "https://bucket.s3.eu-central-1.amazonaws.com"
+    urls = [
+        FileUrl(root_url, "0/a.exe", 10, "d41d8cd98f00b204e9800998ecf8427e"),
+        FileUrl(root_url, "0/ż.dll", 0, "d41d8cd98f00b204e9800998ecf8427e-12"),
+        FileUrl(root_url, "1/b", None, None),
+        FileUrl(root_url, "1/c", 5, "not-md5"),
+        FileUrl("/data", "0/d.exe", 7),
+    ]
+    chunks = list(pack_urls(urls, chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1, 1]
+    unpacked = [
+        url for chunk in pickle.loads(pickle.dumps(chunks)) for url in chunk
+    ]
+    assert [repr(url) for url in unpacked] == [repr(url) for url in urls]
+
+
+def test_packed_urls_are_compact():
+    root_url = "https://bucket.s3.eu-central-1.amazonaws.com"
+    urls = [
+        FileUrl(root_url, f"0/{i:032d}.exe", i, f"{i:032x}")
+        for i in range(1000)
+    ]
+    (chunk,) = pack_urls(urls, chunk_size=1000)
+    # key + 32 bytes per url
+    assert len(pickle.dumps(chunk)) < 1000 * (38 + 32) + 1024
+    assert len(pickle.dumps(chunk)) < len(pickle.dumps(urls)) * 0.75
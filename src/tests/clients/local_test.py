@@ -0,0 +1,58 @@
+from clients.local import LocalDirScrapper
+from processors.local import LocalDirProcessor
+
+FILES = {
+    "0/b.exe": b"b" * 3,
+    "0/a/c.exe": b"c" * 5,
+    "0/a/x/d.dll": b"d",
+    "0/e/f.exe": b"",
+    "1/g.exe": b"g" * 2,
+}
+
+
+def make_tree(root):
+    for path, content in FILES.items():
+        file_path = root / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(content)
+
+
+def test_local_dir_scrapper(tmp_path):
+    make_tree(tmp_path)
+    scrapper = LocalDirScrapper(str(tmp_path), walk_concurrency=2)
+
+    urls = list(scrapper.list_malicious_files_urls(10))
+    assert [(u.path, u.size) for u in urls] == [
+        ("0/b.exe", 3), ("0/a/c.exe", 5), ("0/a/x/d.dll", 1), ("0/e/f.exe", 0)
+    ]
+    assert {u.root_url for u in urls} == {str(tmp_path)}
+    assert [u.path for u in scrapper.list_malicious_files_urls(2)] == [
+        "0/b.exe", "0/a/c.exe"
+    ]
+    assert [u.path for u in scrapper.list_clean_files_urls(10)] == ["1/g.exe"]
+
+
+def test_local_dir_scrapper_shards(tmp_path):
+    make_tree(tmp_path)
+    paths = [
+        {
+            u.path for u in LocalDirScrapper(
+                str(tmp_path), shard=(shard, 2)
+                ).list_malicious_files_urls(10)
+        }
+        for shard in range(2)
+    ]
+    assert paths[0].isdisjoint(paths[1])
+    assert paths[0] | paths[1] == {p for p in FILES if p.startswith("0/")}
+
+
+def test_local_dir_scrapper_missing_label_dir(tmp_path):
+    assert list(LocalDirScrapper(str(tmp_path)).list_clean_files_urls(5)) == []
+
+
+def test_local_dir_processor_analyses_in_place(tmp_path):
+    make_tree(tmp_path)
+    url = next(iter(LocalDirScrapper(str(tmp_path)).list_clean_files_urls(1)))
+    with LocalDirProcessor().local_file(url) as path:
+        assert path == str(tmp_path / "1" / "g.exe")
+    assert (tmp_path / "1" / "g.exe").exists()
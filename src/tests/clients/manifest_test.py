@@ -0,0 +1,87 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from clients.manifest import ManifestScrapper, iter_csv_entries
+
+ROWS = [
+    ("bucket", "0/a%2Bb.exe", "10", "2022-11-01T00:00:00.000Z", "etag1"),
+    ("bucket", "1/c.dll", "20", "2022-11-01T00:00:00.000Z", "etag2"),
+    ("bucket", "0/00Tree.html", "1", "2022-11-01T00:00:00.000Z", "etag3"),
+    ("bucket", "0/d.exe", "30", "2022-11-01T00:00:00.000Z", "etag4"),
+]
+
+
+def write_csv_gz(path, rows):
+    with gzip.open(path, mode="wt", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def test_iter_csv_entries_with_header(tmp_path):
+    path = tmp_path / "inventory.csv"
+    path.write_text('Key,Size,ETag\n0/a.exe,5,"abc"\n0/b.exe,,\n')
+    assert list(iter_csv_entries(str(path))) == [
+        ("0/a.exe", 5, "abc"), ("0/b.exe", None, None)
+    ]
+
+
+def test_manifest_json(tmp_path):
+    (tmp_path / "data").mkdir()
+    write_csv_gz(tmp_path / "data" / "part1.csv.gz", ROWS[:2])
+    write_csv_gz(tmp_path / "data" / "part2.csv.gz", ROWS[2:])
+    (tmp_path / "manifest.json").write_text(json.dumps({
+        "fileFormat": "CSV",
+        "fileSchema": "Bucket, Key, Size, LastModifiedDate, ETag",
+        "files": [
+            {"key": "inventory/bucket/config/data/part1.csv.gz"},
+            {"key": "inventory/bucket/config/data/part2.csv.gz"},
+        ]
+    }))
+    scrapper = ManifestScrapper(str(tmp_path / "manifest.json"), "url")
+
+    urls = list(scrapper.list_malicious_files_urls(5))
+    assert [(u.path, u.size, u.etag) for u in urls] == [
+        ("0/a+b.exe", 10, "etag1"), ("0/d.exe", 30, "etag4")
+    ]
+    assert [u.path for u in scrapper.list_malicious_files_urls(1)] == [
+        "0/a+b.exe"
+    ]
+    assert [u.path for u in scrapper.list_clean_files_urls(5)] == ["1/c.dll"]
+
+
+def test_manifest_lists_all_prefixes_in_single_pass(tmp_path):
+    path = tmp_path / "inventory.csv.gz"
+    write_csv_gz(path, ROWS)
+    scrapper = ManifestScrapper(str(path), "url")
+    passes = []
+    iter_entries = scrapper.iter_entries
+
+    def count_passes():
+        passes.append(1)
+        return iter_entries()
+
+    scrapper.iter_entries = count_passes
+    urls = list(scrapper.list_files_urls(5, 5))
+    assert [u.path for u in urls] == ["0/a+b.exe", "1/c.dll", "0/d.exe"]
+    assert len(passes) == 1
+    assert [u.path for u in scrapper.list_files_urls(1, 1)] == [
+        "0/a+b.exe", "1/c.dll"
+    ]
+
+
+def test_parquet_manifest(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "inventory.parquet")
+    pq.write_table(pa.table({
+        "bucket": ["bucket"] * 3,
+        "key": ["0/a.exe", "1/b.exe", "0/c.exe"],
+        "size": [1, 2, 3],
+        "e_tag": ["e1", "e2", "e3"],
+    }), path)
+    urls = list(ManifestScrapper(path, "url").list_malicious_files_urls(5))
+    assert [(u.path, u.size, u.etag) for u in urls] == [
+        ("0/a.exe", 1, "e1"), ("0/c.exe", 3, "e3")
+    ]
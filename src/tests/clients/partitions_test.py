@@ -0,0 +1,137 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from clients.partitions import (MetaPartitions, add_months, partition_month,
+                                plan_partitions)
+from db_models.meta import Meta
+from db_models.summary import MetaSummary
+from sinks.sql import SQLiteSink
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+@pytest.mark.parametrize('month, months, expected_result', [
+    (datetime.date(2026, 10, 1), 3, datetime.date(2027, 1, 1)),
+    (datetime.date(2026, 1, 1), -1, datetime.date(2025, 12, 1)),
+    (datetime.date(2026, 12, 1), 0, datetime.date(2026, 12, 1)),
+])
+def test_add_months(month, months, expected_result):
+    assert add_months(month, months) == expected_result
+
+
+@pytest.mark.parametrize('name, expected_result', [
+    ("p202610", datetime.date(2026, 10, 1)),
+    ("pmax", None),
+    ("p2026", None),
+])
+def test_partition_month(name, expected_result):
+    assert partition_month(name) == expected_result
+
+
+@pytest.mark.parametrize(
+    'partitions, retention_months, expected_create, expected_expired', [
+        (
+            ["p202610", "p202611", "pmax"], None,
+            ["p202612", "p202701"], []
+        ),
+        # maintenance did not run for months - no gaps
+        (
+            ["p202606", "pmax"], 2,
+            [
+                "p202607", "p202608", "p202609", "p202610", "p202611",
+                "p202612", "p202701"
+            ],
+            ["p202606"]
+        ),
+        (
+            ["p202607", "p202608", "p202609", "p202701", "pmax"], 1,
+            [], ["p202607", "p202608"]
+        ),
+        ([], None, ["p202610", "p202611", "p202612", "p202701"], []),
+    ]
+)
+def test_plan_partitions(
+        partitions, retention_months, expected_create, expected_expired
+):
+    to_create, expired = plan_partitions(
+        partitions, TODAY, months_ahead=3, retention_months=retention_months
+        )
+    assert [f"p{month:%Y%m}" for month in to_create] == expected_create
+    assert expired == expected_expired
+
+
+def test_load_symbols(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    sink.write_batch([
+        Meta(
+            hash=b"a", path="0/a.dll", size=10, extension="dll",
+            import_table=[
+                ("KERNEL32.dll", ["ExitProcess", "Sleep"]),
+                ("USER32.dll", ["MessageBoxA"]),
+            ],
+            export_functions=["DllMain"]
+        ),
+        Meta(hash=b"b", path="0/b.dll", size=10, extension="dll"),
+    ])
+    sink.close()
+
+    with sink.session_factory() as session:
+        entries = session.execute(
+            select(Meta).order_by(Meta.hash)
+        ).scalars().all()
+        MetaPartitions(sink.session_factory).load_symbols(session, entries)
+    assert sorted(entries[0].import_table) == [
+        ("kernel32.dll", ["ExitProcess", "Sleep"]),
+        ("user32.dll", ["MessageBoxA"]),
+    ]
+    assert entries[0].export_functions == ["DllMain"]
+    assert entries[1].import_table is None
+    assert entries[1].to_record()["export_functions"] == []
+
+
+def test_drop_summaries(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    sink.write_batch([
+        Meta(
+            hash=bytes([i]), path=f"0/{i}.dll", size=10, extension="dll",
+            created=created
+        )
+        for i, created in enumerate([
+            datetime.datetime(2026, 8, 31, 23, 59),
+            datetime.datetime(2026, 9, 1),
+            datetime.datetime(2026, 9, 30, 12),
+            datetime.datetime(2026, 10, 1),
+        ])
+    ])
+    sink.close()
+
+    partitions = MetaPartitions(sink.session_factory)
+    with sink.session_factory.begin() as session:
+        partitions.drop_summaries(session, datetime.date(2026, 9, 1))
+    with sink.session_factory() as session:
+        days = session.execute(
+            select(MetaSummary.day).order_by(MetaSummary.day)
+        ).scalars().all()
+    assert days == [datetime.date(2026, 8, 31), datetime.date(2026, 10, 1)]
+
+
+def test_drop_partition_rejects_catch_all_partition(tmp_path):
+    partitions = MetaPartitions(
+        SQLiteSink(str(tmp_path / "meta.sqlite")).session_factory
+        )
+    with pytest.raises(ValueError):
+        partitions.drop_partition("pmax")
+
+
+def test_export_partition_keeps_existing_archive(tmp_path):
+    archive = tmp_path / "meta-p202609.jsonl.gz"
+    archive.write_bytes(b"complete archive")
+    partitions = MetaPartitions(
+        SQLiteSink(str(tmp_path / "meta.sqlite")).session_factory
+        )
+    assert partitions.export_partition("p202609", str(tmp_path)) == str(
+        archive
+        )
+    assert archive.read_bytes() == b"complete archive"
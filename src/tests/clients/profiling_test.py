@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from clients.profiling import (NULL_CONTEXT, PROFILE_MODE_CPROFILE,
+                               PROFILE_MODE_SAMPLE, Profiler, merge_profiles,
+                               run_profile_dir)
+
+
+def busy_stage(profiler, size):
+    with profiler.stage("analysed"):
+        with profiler.stage("downloaded"):
+            data = bytearray(size)
+        del data
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            pass
+
+
+def test_disabled_profiler_is_noop():
+    profiler = Profiler()
+    assert profiler.profile("worker") is NULL_CONTEXT
+    assert profiler.stage("analysed") is NULL_CONTEXT
+
+
+@pytest.mark.parametrize('mode, expected_outputs', [
+    (
+        PROFILE_MODE_SAMPLE, {"collapsed", "memory"}
+    ),
+    (
+        PROFILE_MODE_CPROFILE, {"cprofile", "text", "memory"}
+    ),
+])
+def test_profiles_are_merged(tmp_path, mode, expected_outputs):
+    profiler = Profiler(str(tmp_path), mode=mode, interval=0.001)
+    for size in (1024 * 1024, 2 * 1024 * 1024):
+        with profiler.profile("worker"):
+            busy_stage(profiler, size)
+
+    outputs = merge_profiles(str(tmp_path))
+
+    assert set(outputs) == expected_outputs
+    with open(outputs["memory"]) as f:
+        peaks = json.load(f)
+    assert peaks["downloaded"] >= 2 * 1024 * 1024
+    assert peaks["analysed"] >= peaks["downloaded"]
+    if mode == PROFILE_MODE_SAMPLE:
+        with open(outputs["collapsed"]) as f:
+            lines = f.read().splitlines()
+        assert any("busy_stage" in line for line in lines)
+        assert all(line.rpartition(" ")[2].isdigit() for line in lines)
+
+
+def test_concurrent_stages_keep_peaks(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    size = 4 * 1024 * 1024
+    opened = threading.Event()
+    allocated = threading.Event()
+
+    def other_thread():
+        with profiler.stage("downloaded"):
+            opened.set()
+            allocated.wait()
+
+    with profiler.profile("worker"):
+        thread = threading.Thread(target=other_thread)
+        with profiler.stage("analysed"):
+            thread.start()
+            opened.wait()
+            data = bytearray(size)
+            del data
+        # stage of this thread ends while the other one is still open
+        allocated.set()
+        thread.join()
+
+    with open(merge_profiles(str(tmp_path))["memory"]) as f:
+        peaks = json.load(f)
+    assert peaks["analysed"] >= size
+    # traced memory is process wide
+    assert peaks["downloaded"] >= size
+
+
+def test_runs_merge_only_own_profiles(tmp_path):
+    run_dirs = [run_profile_dir(str(tmp_path), "w1") for _ in range(2)]
+    assert len(set(run_dirs)) == 2
+    assert all(
+        os.path.basename(run_dir).startswith("w1-") for run_dir in run_dirs
+    )
+    for run_dir, size in zip(run_dirs, (1024 * 1024, 8 * 1024 * 1024)):
+        profiler = Profiler(run_dir)
+        with profiler.profile("worker"):
+            busy_stage(profiler, size)
+
+    with open(merge_profiles(run_dirs[0])["memory"]) as f:
+        peaks = json.load(f)
+    assert 1024 * 1024 <= peaks["downloaded"] < 8 * 1024 * 1024
@@ -0,0 +1,51 @@
+import json
+import urllib.request
+
+import pytest
+
+from clients.progress import (STAGE_ANALYSED, STAGE_DOWNLOADED,
+                              STAGE_LISTED, STAGE_WRITTEN, ProgressReporter,
+                              ProgressServer)
+
+
+def test_reporter_counts_stages():
+    reporter = ProgressReporter(worker_id="w1")
+    reporter.add(STAGE_LISTED, items=3)
+    with reporter.stage(STAGE_DOWNLOADED):
+        assert reporter.take_report()["in_flight"][STAGE_DOWNLOADED] == 1
+    with pytest.raises(ValueError):
+        with reporter.stage(STAGE_ANALYSED):
+            raise ValueError()
+
+    report = reporter.take_report()
+    assert report["worker"] == "w1"
+    assert report["items"][STAGE_DOWNLOADED] == 1
+    assert report["items"][STAGE_ANALYSED] == 0
+    assert report["errors"][STAGE_ANALYSED] == 1
+    assert report["in_flight"][STAGE_DOWNLOADED] == 0
+    # counters are reset after every report
+    assert reporter.take_report()["items"][STAGE_DOWNLOADED] == 0
+
+
+def test_server_aggregates_workers():
+    with ProgressServer(0, host="localhost", total=10) as server:
+        for worker_id in ("w1", "w2"):
+            reporter = ProgressReporter(server.url, worker_id=worker_id)
+            reporter.add(STAGE_WRITTEN, items=2, bytes=100)
+            reporter.flush()
+        with urllib.request.urlopen(server.url + "/status") as rsp:
+            status = json.loads(rsp.read())
+
+    assert status["items"][STAGE_WRITTEN] == 4
+    assert status["bytes"] == 200
+    assert status["workers"] == 2
+    assert status["total"] == 10
+    assert status["eta"] is not None
+    assert "written=4" in server.format_snapshot(server.snapshot())
+
+
+def test_reporter_keeps_counts_when_push_fails():
+    reporter = ProgressReporter("http://localhost:1", worker_id="w1")
+    reporter.add(STAGE_WRITTEN, items=2)
+    reporter.flush()
+    assert reporter.take_report()["items"][STAGE_WRITTEN] == 2
@@ -0,0 +1,99 @@
+import pytest
+
+from clients.retry import AdaptiveLimiter, Retrier, RetryPolicy
+
+THROTTLE_POLICY = RetryPolicy("throttle", max_attempts=3, base_delay=0.1)
+CONNECTION_POLICY = RetryPolicy("connection", max_attempts=2, base_delay=0.1)
+
+
+class ThrottleError(Exception):
+    pass
+
+
+def classifier(error):
+    if isinstance(error, ThrottleError):
+        return THROTTLE_POLICY
+    if isinstance(error, ConnectionError):
+        return CONNECTION_POLICY
+    return None
+
+
+def failing(errors):
+    errors = list(errors)
+
+    def func():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return func
+
+
+@pytest.mark.parametrize('errors, expected_sleeps', [
+    (
+        [], 0
+    ),
+    (
+        [ThrottleError(), ThrottleError()], 2
+    ),
+    (
+        [ThrottleError(), ConnectionError(), ThrottleError()], 3
+    ),
+])
+def test_retrier_recovers(errors, expected_sleeps):
+    sleeps = []
+    retrier = Retrier(classifier, sleep=sleeps.append)
+    assert retrier.call(failing(errors)) == "ok"
+    assert len(sleeps) == expected_sleeps
+
+
+@pytest.mark.parametrize('errors, expected_error', [
+    (
+        [ThrottleError()] * 3, ThrottleError
+    ),
+    (
+        [ConnectionError()] * 2, ConnectionError
+    ),
+    (
+        [ValueError()], ValueError
+    ),
+])
+def test_retrier_gives_up(errors, expected_error):
+    retrier = Retrier(classifier, sleep=lambda delay: None)
+    with pytest.raises(expected_error):
+        retrier.call(failing(errors))
+
+
+def test_retry_policy_delay_is_capped():
+    policy = RetryPolicy("dummy", base_delay=1.0, max_delay=4.0)
+    for attempt in range(1, 10):
+        assert 0 <= policy.get_delay(attempt) <= 4.0
+
+
+def test_adaptive_limiter_aimd():
+    limiter = AdaptiveLimiter(initial=8, max_limit=16, cooldown=0)
+    limiter.acquire()
+    limiter.release(success=False, latency=0.0)
+    assert limiter.limit == 4
+    for _ in range(40):
+        with limiter.slot():
+            pass
+    assert limiter.limit > 4
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_limiter_latency_target():
+    limiter = AdaptiveLimiter(
+        initial=8, max_limit=16, latency_target=1.0, cooldown=0
+        )
+    limiter.acquire()
+    limiter.release(success=True, latency=2.0)
+    assert limiter.limit == 4
+
+
+def test_adaptive_limiter_slot_failure_decreases():
+    limiter = AdaptiveLimiter(initial=2, cooldown=0)
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError()
+    assert limiter.limit == 1
+    assert limiter.in_flight == 0
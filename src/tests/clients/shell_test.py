@@ -0,0 +1,17 @@
+from subprocess import CalledProcessError
+
+import pytest
+
+from clients.shell import run_cmd
+
+
+def test_run_cmd_keeps_arguments_with_spaces(tmp_path):
+    path = tmp_path / "dir with spaces" / "file name.txt"
+    path.parent.mkdir()
+    path.write_text(" content \n")
+    assert run_cmd(["cat", str(path)]) == "content"
+
+
+def test_run_cmd_raises_on_error(tmp_path):
+    with pytest.raises(CalledProcessError):
+        run_cmd(["cat", str(tmp_path / "missing file")])
@@ -0,0 +1,111 @@
+import os
+import shutil
+import socket
+import threading
+import time
+
+from clients.spool import Spool, choose_spool_root
+
+# above max pid_max of linux, never alive
+DEAD_PID = 4194305
+
+
+def test_spool_item_is_unique_and_deleted(tmp_path):
+    spool = Spool(str(tmp_path), quota=100)
+    with spool.item("a.exe", 10) as first, spool.item("a.exe", 10) as second:
+        assert first != second
+        assert first.endswith("a.exe")
+        for path in (first, second):
+            with open(path, "wb") as f:
+                f.write(b"x")
+        assert spool.used == 20
+    assert not os.path.exists(first) and not os.path.exists(second)
+    assert spool.used == 0
+    # file does not have to be created
+    with spool.item("b.exe", 10):
+        pass
+
+
+def test_spool_quota_waits(tmp_path):
+    spool = Spool(str(tmp_path), quota=100)
+    entered = threading.Event()
+
+    def take_second():
+        with spool.item("b.exe", 60):
+            entered.set()
+
+    with spool.item("a.exe", 60):
+        thread = threading.Thread(target=take_second)
+        thread.start()
+        time.sleep(0.05)
+        assert not entered.is_set()
+    thread.join(1)
+    assert entered.is_set()
+    # item bigger than the quota waits only for empty spool
+    with spool.item("c.exe", 1000):
+        pass
+
+
+def test_spool_removes_stale_directories(tmp_path):
+    host = socket.gethostname()
+    stale = tmp_path / f"spool-{host}-{DEAD_PID}"
+    alive = tmp_path / f"spool-{host}-1"
+    other_host = tmp_path / f"spool-other-{DEAD_PID}"
+    for directory in (stale, alive, other_host):
+        directory.mkdir()
+        (directory / "0-a.exe").write_bytes(b"x")
+
+    spool = Spool(str(tmp_path), quota=100)
+
+    assert not stale.exists()
+    assert alive.exists() and other_host.exists()
+    assert os.path.isdir(spool.directory)
+    spool.close()
+    assert not os.path.exists(spool.directory)
+
+
+def test_choose_spool_root_prefers_tmpfs(tmp_path):
+    disk, tmpfs = str(tmp_path / "disk"), str(tmp_path / "tmpfs")
+    assert choose_spool_root(disk, None, 100) == disk
+    assert choose_spool_root(disk, tmpfs, 100) == tmpfs
+    assert choose_spool_root(disk, tmpfs, 2 ** 62) == disk
+
+
+def test_spool_quota_is_shared_by_host_processes(tmp_path):
+    host = socket.gethostname()
+    # reservations of an alive process of this host and of a dead one
+    other = tmp_path / f"spool-{host}-{os.getppid()}.used"
+    other.write_text("60")
+    (tmp_path / f"spool-{host}-{DEAD_PID}.used").write_text("1000")
+    spool = Spool(str(tmp_path), quota=100)
+    assert not (tmp_path / f"spool-{host}-{DEAD_PID}.used").exists()
+    entered = threading.Event()
+
+    def take_item():
+        with spool.item("a.exe", 60):
+            entered.set()
+
+    thread = threading.Thread(target=take_item)
+    thread.start()
+    time.sleep(0.05)
+    assert not entered.is_set()
+    # the other process releases its item
+    other.write_text("0")
+    thread.join(1)
+    assert entered.is_set()
+    with spool.item("b.exe", 10):
+        with open(spool.usage_path) as f:
+            assert f.read() == "10"
+    spool.close()
+    assert not os.path.exists(spool.usage_path)
+
+
+def test_choose_spool_root_counts_host_usage(tmp_path):
+    disk, tmpfs = str(tmp_path / "disk"), tmp_path / "tmpfs"
+    tmpfs.mkdir()
+    # reserved by other workers, already taken from free space
+    (tmpfs / f"spool-{socket.gethostname()}-{os.getppid()}.used").write_text(
+        str(2 ** 61)
+        )
+    quota = shutil.disk_usage(str(tmpfs)).free + 2 ** 40
+    assert choose_spool_root(disk, str(tmpfs), quota) == str(tmpfs)
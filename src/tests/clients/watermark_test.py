@@ -0,0 +1,22 @@
+import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from clients.watermark import WatermarkStore
+from db_models.meta import Base
+
+
+def test_watermark_store():
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    store = WatermarkStore(sessionmaker(engine, future=True))
+    first = (datetime.datetime(2026, 1, 1), "0/a.exe")
+    second = (datetime.datetime(2026, 1, 2), "0/b.exe")
+
+    assert store.get("0/") == (None, None)
+    store.save("0/", first)
+    store.save("1/", first)
+    store.save("0/", second)
+    assert store.get("0/") == second
+    assert store.get("1/") == first
@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from clients.work_queue import WorkQueue, db_utcnow
+from db_models.meta import Base
+from db_models.work_queue import WORK_ITEM_FAILED, WorkItem
+
+
+@pytest.fixture
+def work_queue():
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    work_queue = WorkQueue(sessionmaker(engine, future=True), max_attempts=2)
+    work_queue.enqueue(["0/a.exe", "0/b.exe", "1/c.dll", "0/a.exe"])
+    return work_queue
+
+
+def test_claim_does_not_return_leased_items(work_queue):
+    first = work_queue.claim("w1", 2, lease_seconds=60)
+    second = work_queue.claim("w2", 2, lease_seconds=60)
+    assert [path for _, path in first] == ["0/a.exe", "0/b.exe"]
+    assert [path for _, path in second] == ["1/c.dll"]
+    assert work_queue.claim("w3", 2, lease_seconds=60) == []
+
+
+def test_complete_drains_queue(work_queue):
+    items = work_queue.claim("w1", 10, lease_seconds=60)
+    # only lease owner can finish items
+    work_queue.complete("w2", [id for id, _ in items])
+    assert work_queue.count_unfinished() == 3
+    work_queue.complete("w1", [id for id, _ in items])
+    assert work_queue.count_unfinished() == 0
+
+
+def test_expired_lease_is_claimable_again(work_queue):
+    items = work_queue.claim("w1", 1, lease_seconds=60)
+    with work_queue.session_factory.begin() as session:
+        session.execute(update(WorkItem).values(
+            lease_expires=datetime.datetime.utcnow()
+            - datetime.timedelta(seconds=1)
+        ))
+    assert work_queue.claim("w2", 1, lease_seconds=60) == items
+
+
+def test_release_marks_failed_after_max_attempts(work_queue):
+    for worker_id in ("w1", "w2"):
+        items = work_queue.claim(worker_id, 1, lease_seconds=60)
+        work_queue.release(worker_id, [id for id, _ in items])
+    with work_queue.session_factory() as session:
+        assert session.execute(
+            select(WorkItem.status).where(WorkItem.path == "0/a.exe")
+        ).scalar() == WORK_ITEM_FAILED
+    assert work_queue.count_unfinished() == 2
+
+
+def test_renew_extends_only_own_leases(work_queue):
+    items = work_queue.claim("w1", 2, lease_seconds=0)
+    ids = [id for id, _ in items]
+    work_queue.complete("w1", ids[:1])
+    assert work_queue.renew("w2", ids, lease_seconds=60) == 0
+    # expired lease is renewed while no other worker claimed the item
+    assert work_queue.renew("w1", ids, lease_seconds=60) == 1
+    assert [path for _, path in work_queue.claim("w2", 10, 60)] == [
+        "1/c.dll"
+    ]
+
+
+def test_claim_uses_db_clock(work_queue):
+    lease = datetime.timedelta(seconds=60)
+    with work_queue.session_factory() as session:
+        started = db_utcnow(session)
+        work_queue.claim("w1", 1, lease_seconds=60)
+        lease_expires = session.execute(
+            select(WorkItem.lease_expires).where(WorkItem.path == "0/a.exe")
+        ).scalar()
+        assert started + lease <= lease_expires <= db_utcnow(session) + lease
+
+
+def test_expired_last_attempt_lease_is_marked_failed(work_queue):
+    for worker_id in ("w1", "w2"):
+        # worker crashes - lease expires without release
+        work_queue.claim(worker_id, 1, lease_seconds=-1)
+    # leased on the last attempt, still unfinished until marked failed
+    assert work_queue.count_unfinished() == 3
+    assert [path for _, path in work_queue.claim("w3", 1, 60)] == ["0/b.exe"]
+    with work_queue.session_factory() as session:
+        assert session.execute(
+            select(WorkItem.status).where(WorkItem.path == "0/a.exe")
+        ).scalar() == WORK_ITEM_FAILED
+    assert work_queue.count_unfinished() == 2
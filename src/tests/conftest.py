@@ -0,0 +1,17 @@
+import pytest
+
+from db_models.meta import Meta
+
+
+@pytest.fixture
+def make_meta():
+    """Returns factory of `Meta` entries of 'dll' files named after their
+    hash. Other columns are passed as keyword arguments.
+    """
+    def make(hash: bytes, **columns) -> Meta:
+        columns.setdefault("size", 10)
+        return Meta(
+            hash=hash, path=f"0/{hash.hex()}.dll", extension="dll", **columns
+        )
+
+    return make
@@ -0,0 +1,54 @@
+import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from db_models.meta import LABEL_CLEAN, LABEL_MALICIOUS, Base
+from db_models.summary import MetaSummary, add_summaries
+
+DAY = datetime.datetime(2026, 10, 19, 12)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    with sessionmaker(engine, future=True)() as session:
+        yield session
+
+
+@pytest.fixture
+def make_meta(make_meta):
+    return lambda i, label, imports=None: make_meta(
+        bytes([i]), label=label, imports=imports, created=DAY
+    )
+
+
+def get_summaries(session):
+    return [
+        (summary.label, summary.files, summary.total_size,
+         summary.files_with_imports, summary.imports_sum)
+        for summary in session.execute(
+            select(MetaSummary).order_by(MetaSummary.label)
+        ).scalars()
+    ]
+
+
+@pytest.mark.parametrize('dialect', ["sqlite", "postgresql"])
+def test_summaries_are_accumulated(session, dialect, make_meta):
+    batches = [
+        [make_meta(0, LABEL_MALICIOUS, 2), make_meta(1, LABEL_CLEAN)],
+        [make_meta(2, LABEL_MALICIOUS, 3)],
+    ]
+    # dialects without upsert support fall back to update or insert
+    with patch.object(session.get_bind().dialect, "name", dialect):
+        for batch in batches:
+            session.add_all(batch)
+            add_summaries(session, batch)
+    session.commit()
+    assert get_summaries(session) == [
+        (LABEL_CLEAN, 1, 10, 0, 0),
+        (LABEL_MALICIOUS, 2, 20, 2, 5),
+    ]
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from db_models.meta import Base
+from db_models.symbols import (DllName, FunctionName, MetaExport, MetaImport,
+                               add_symbols, intern_names, intern_symbols)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # names are interned on separate connections - in-memory db would not
+    # be shared
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'meta.sqlite'}", future=True
+        )
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine, future=True) as session:
+        yield session
+
+
+def test_intern_names_reuses_ids(engine, session):
+    ids = intern_names(engine, FunctionName, ["a", "b"])
+    assert intern_names(engine, FunctionName, ["b", "c"])["b"] == ids["b"]
+    assert session.execute(select(FunctionName.name)).scalars().all() == [
+        "a", "b", "c"
+    ]
+
+
+def test_add_symbols(engine, session, make_meta):
+    entries = [
+        make_meta(
+            b"1",
+            import_table=[
+                ("KERNEL32.dll", ["CreateFileW", "ExitProcess"]),
+                ("user32.DLL", ["MessageBoxA"]),
+            ],
+            export_functions=["DllMain"]
+        ),
+        make_meta(
+            b"2",
+            import_table=[("kernel32.dll", ["ExitProcess"])]
+        ),
+        make_meta(b"3"),
+    ]
+    symbol_ids = intern_symbols(engine, entries)
+    session.add_all(entries)
+    add_symbols(session, entries, *symbol_ids)
+
+    assert sorted(
+        session.execute(select(DllName.name)).scalars()
+    ) == ["kernel32.dll", "user32.dll"]
+    exit_process_importers = session.execute(
+        select(MetaImport.meta_id)
+        .join(FunctionName, FunctionName.id == MetaImport.function_id)
+        .where(FunctionName.name == "ExitProcess")
+    ).scalars().all()
+    assert sorted(exit_process_importers) == [entries[0].id, entries[1].id]
+    assert session.execute(
+        select(MetaExport.meta_id)
+    ).scalars().all() == [entries[0].id]
@@ -1,9 +1,17 @@
+import hashlib
+import threading
+import time
 from subprocess import CalledProcessError
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from processors.base import get_arch, get_exports, get_extension, get_imports
+from clients.aws import FileUrl
+from db_models.meta import LABEL_CLEAN, LABEL_MALICIOUS
+from processors.base import (MetaProcessor, calc_digests, calc_imphash,
+                             get_arch, get_export_table, get_exports,
+                             get_extension, get_import_table, get_imports,
+                             get_label)
 
 DUMMY_IMPORTS_RESPONSE1 = (
     """Contents of /tmp/00Nb1Q3mxXNb6fvAp3SrscnVWACdUwpM.exe: 118784 bytes
@@ -118,6 +126,78 @@ def test_get_imports(mocked_stdout, expected_result):
         assert get_imports("dummy_path") == expected_result
 
 
+@pytest.mark.parametrize('mocked_stdout, expected_result', [
+    (
+        "", []
+    ),
+    (
+        CalledProcessError(returncode=1, cmd="dummy_cmd"), None
+    ),
+    (
+        DUMMY_IMPORTS_RESPONSE1, []
+    ),
+    (
+        DUMMY_IMPORTS_RESPONSE2, [
+            ("KERNEL32.dll", ["IsBadWritePtr"]),
+            ("USER32.dll", ["DefWindowProcA"]),
+            ("GDI32.dll", ["RealizePalette", "GetPixel"]),
+        ]
+    ),
+    (
+        DUMMY_IMPORTS_RESPONSE3, None
+    )
+])
+def test_get_import_table(mocked_stdout, expected_result):
+    with patch('processors.base.run_cmd') as mocked_run_cmd:
+        mocked_run_cmd.side_effect = [mocked_stdout]
+        assert get_import_table("dummy_path") == expected_result
+
+
+@pytest.mark.parametrize('import_table, expected_result', [
+    (
+        None, None
+    ),
+    (
+        [], None
+    ),
+    (
+        [
+            ("KERNEL32.dll", ["IsBadWritePtr"]),
+            ("USER32.dll", ["DefWindowProcA"]),
+            ("GDI32.dll", ["RealizePalette", "GetPixel"]),
+            ("msvbvm60", ["ord100"]),
+        ],
+        hashlib.md5(
+            b"kernel32.isbadwriteptr,user32.defwindowproca,"
+            b"gdi32.realizepalette,gdi32.getpixel,msvbvm60.ord100"
+        ).hexdigest()
+    ),
+])
+def test_calc_imphash(import_table, expected_result):
+    assert calc_imphash(import_table) == expected_result
+
+
+@pytest.mark.parametrize('content, chunk_size', [
+    (
+        b"", 4
+    ),
+    (
+        b"MZ" + bytes(range(256)) * 10, 7
+    ),
+])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_calc_digests(tmp_path, content, chunk_size, use_mmap):
+    file_path = tmp_path / "sample.exe"
+    file_path.write_bytes(content)
+    assert calc_digests(
+        str(file_path), ("md5", "sha256"), chunk_size=chunk_size,
+        use_mmap=use_mmap
+        ) == {
+        "md5": hashlib.md5(content).hexdigest(),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
 @pytest.mark.parametrize('mocked_stdout, expected_result', [
     (
         "", []
@@ -141,6 +221,32 @@ def test_get_exports(mocked_stdout, expected_result):
         assert get_exports("dummy_path") == expected_result
 
 
+@pytest.mark.parametrize('mocked_stdout, expected_result', [
+    (
+        "", ([], [])
+    ),
+    (
+        CalledProcessError(returncode=1, cmd="dummy_cmd"), None
+    ),
+    (
+        DUMMY_EXPORTS_RESPONSE2, (
+            ["SensApi.dll"],
+            [
+                "IsDestinationReachableA", "IsDestinationReachableW",
+                "IsNetworkAlive"
+            ]
+        )
+    ),
+    (
+        DUMMY_EXPORTS_RESPONSE3, None
+    )
+])
+def test_get_export_table(mocked_stdout, expected_result):
+    with patch('processors.base.run_cmd') as mocked_run_cmd:
+        mocked_run_cmd.side_effect = [mocked_stdout]
+        assert get_export_table("dummy_path") == expected_result
+
+
 @pytest.mark.parametrize('mocked_stdout, expected_result', [
     (
         "", ""
@@ -155,7 +261,8 @@ def test_get_exports(mocked_stdout, expected_result):
 def test_get_arch(mocked_stdout, expected_result):
     with patch('processors.base.run_cmd') as mocked_run_cmd:
         mocked_run_cmd.side_effect = [mocked_stdout]
-        assert get_arch("dummy_path") == expected_result
+        assert get_arch("dummy path") == expected_result
+        mocked_run_cmd.assert_called_once_with(["objdump", "-f", "dummy path"])
 
 
 @pytest.mark.parametrize('file_path, expected_result', [
@@ -174,3 +281,94 @@ def test_get_arch(mocked_stdout, expected_result):
 ])
 def test_get_extension(file_path, expected_result):
     assert get_extension(file_path) == expected_result
+
+
+@pytest.mark.parametrize('path, expected_result', [
+    ("0/04OedY8viaNBFEDv26n08fU2GnfxxmFv.dll", LABEL_MALICIOUS),
+    ("1/04wwBoUBnPWiKg5eAH2YNtiy6XGjZV3X.exe", LABEL_CLEAN),
+    ("2/04wwBoUBnPWiKg5eAH2YNtiy6XGjZV3X.exe", None),
+    ("", None)
+])
+def test_get_label(path, expected_result):
+    assert get_label(path) == expected_result
+
+
+class SlowProcessor(MetaProcessor):
+    def __init__(self, concurrency):
+        super().__init__(concurrency=concurrency)
+        self.threads = set()
+
+    def analyse_item(self, url):
+        self.threads.add(threading.get_ident())
+        # later items finish first
+        time.sleep(0.01 * (5 - url))
+        return url
+
+
+@pytest.mark.parametrize('concurrency, expected_threads', [(1, 1), (4, 4)])
+def test_analyse_items_keeps_order(concurrency, expected_threads):
+    processor = SlowProcessor(concurrency)
+    assert list(processor.analyse_items(range(5))) == list(range(5))
+    assert len(processor.threads) == expected_threads
+
+
+class FailingProcessor(SlowProcessor):
+    def __init__(self, concurrency, error):
+        super().__init__(concurrency)
+        self.error = error
+
+    def analyse_item(self, url):
+        if url % 2:
+            raise self.error
+        return super().analyse_item(url)
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_analyse_items_skips_permanent_failures(concurrency):
+    processor = FailingProcessor(concurrency, FileNotFoundError("gone"))
+    processor.skip_permanent_failures = True
+    assert list(processor.analyse_items(range(5))) == [0, 2, 4]
+
+
+@pytest.mark.parametrize('skip, error', [
+    (False, FileNotFoundError("gone")),
+    (True, OSError(28, "No space left on device")),
+    (True, ConnectionError("reset")),
+])
+def test_analyse_items_raises_other_failures(skip, error):
+    processor = FailingProcessor(1, error)
+    processor.skip_permanent_failures = skip
+    with pytest.raises(type(error)):
+        list(processor.analyse_items(range(5)))
+
+
+def test_write_partition_reports_written_batches():
+    processor = SlowProcessor(concurrency=1)
+    processor.batch_size = 2
+    sink = MagicMock()
+    written = []
+    with patch.object(processor, "create_sink", return_value=sink):
+        processor.write_partition(range(5), written.append)
+    assert written == [[0, 1], [2, 3], [4]]
+    assert sink.write_batch.call_count == 3
+
+
+def test_stream_jobs_starts_before_listing_ends():
+    processor = MetaProcessor(job_size=10)
+    listed = []
+    jobs = []
+
+    def list_urls():
+        for i in range(35):
+            listed.append(i)
+            yield FileUrl("/data", f"0/{i}.exe", i)
+
+    def run_job(chunks):
+        jobs.append(([len(chunk) for chunk in chunks], len(listed)))
+
+    processor.stream_jobs(list_urls(), run_job, partitions=4)
+    assert [sizes for sizes, _ in jobs] == [
+        [3, 3, 3, 1], [3, 3, 3, 1], [3, 3, 3, 1], [3, 2]
+    ]
+    # first job is submitted while the rest is not listed yet
+    assert jobs[0][1] < 35
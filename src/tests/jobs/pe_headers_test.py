@@ -0,0 +1,112 @@
+import struct
+
+import pytest
+
+from processors.pe_headers import PEHeaderError, PEHeaders, RangeReader
+
+SECTION_RVA = 0x1000
+SECTION_OFFSET = 0x400
+TAIL_SIZE = 1024 * 1024
+
+
+def build_pe(machine, pe32_plus):
+    """Builds minimal PE file with one section holding import table
+    (KERNEL32.dll: CreateFileA, ordinal 17; user32.dll: MessageBoxA) and
+    export table (sample.dll: 'Run' plus unnamed ordinal), followed by
+    large tail of data that should never be read.
+    """
+    section = bytearray(0x1000)
+
+    def put(rva, data):
+        section[rva - SECTION_RVA:rva - SECTION_RVA + len(data)] = data
+
+    thunk_fmt = "<Q" if pe32_plus else "<I"
+    ordinal_flag = 1 << (63 if pe32_plus else 31)
+    # import descriptors at 0x1000, names at 0x1100, thunks at 0x1200
+    put(0x1100, b"KERNEL32.dll\0")
+    put(0x1110, b"user32.dll\0")
+    put(0x1120, b"\0\0CreateFileA\0")
+    put(0x1130, b"\0\0MessageBoxA\0")
+    put(0x1200, b"".join(
+        struct.pack(thunk_fmt, thunk)
+        for thunk in (0x1120, ordinal_flag | 17, 0)
+        ))
+    put(0x1240, b"".join(
+        struct.pack(thunk_fmt, thunk) for thunk in (0x1130, 0)
+        ))
+    put(0x1000, struct.pack("<IIIII", 0x1200, 0, 0, 0x1100, 0x1200))
+    put(0x1014, struct.pack("<IIIII", 0, 0, 0, 0x1110, 0x1240))
+    # export directory at 0x1800: 3 functions (2nd unused), 1 named
+    put(0x1900, b"sample.dll\0")
+    put(0x1910, b"Run\0")
+    put(0x1920, struct.pack("<III", 0x2000, 0, 0x2010))
+    put(0x1930, struct.pack("<I", 0x1910))
+    put(0x1940, struct.pack("<H", 2))
+    put(0x1800, struct.pack(
+        "<IIHHIIIIIII", 0, 0, 0, 0, 0x1900, 5, 3, 1, 0x1920, 0x1930, 0x1940
+        ))
+
+    directories = struct.pack("<II", 0x1800, 0x40)
+    directories += struct.pack("<II", 0x1000, 0x28) + bytes(8 * 14)
+    if pe32_plus:
+        optional_header = struct.pack("<H", 0x20b) + bytes(106)
+    else:
+        optional_header = struct.pack("<H", 0x10b) + bytes(90)
+    optional_header += struct.pack("<I", 16) + directories
+    file_header = struct.pack(
+        "<HHIIIHH", machine, 1, 0, 0, 0, len(optional_header), 0
+        )
+    section_header = b".rdata\0\0" + struct.pack(
+        "<IIII", 0x1000, SECTION_RVA, 0x1000, SECTION_OFFSET
+        ) + bytes(16)
+    data = bytearray(SECTION_OFFSET)
+    data[:2] = b"MZ"
+    data[0x3c:0x40] = struct.pack("<I", 0x80)
+    headers = b"PE\0\0" + file_header + optional_header + section_header
+    data[0x80:0x80 + len(headers)] = headers
+    return bytes(data) + bytes(section) + b"\xcc" * TAIL_SIZE
+
+
+def make_reader(data):
+    def fetch(offset, size):
+        assert offset < len(data)
+        return data[offset:offset + size]
+    return RangeReader(fetch, size=len(data))
+
+
+@pytest.mark.parametrize('machine, pe32_plus, expected_arch', [
+    (
+        0x14c, False, "i386"
+    ),
+    (
+        0x8664, True, "i386:x86-64"
+    ),
+])
+def test_pe_headers(machine, pe32_plus, expected_arch):
+    data = build_pe(machine, pe32_plus)
+    reader = make_reader(data)
+    headers = PEHeaders(reader)
+
+    assert headers.arch == expected_arch
+    assert headers.get_import_table() == [
+        ("KERNEL32.dll", ["CreateFileA", "ord17"]),
+        ("user32.dll", ["MessageBoxA"]),
+    ]
+    assert headers.get_export_table() == (["sample.dll"], ["ord5", "Run"])
+    assert reader.bytes_fetched <= 4 * 4096
+    assert reader.bytes_fetched < len(data) // 64
+
+
+def test_pe_headers_not_pe():
+    with pytest.raises(PEHeaderError):
+        PEHeaders(make_reader(b"ELF" + bytes(100)))
+
+
+def test_range_reader_caches_blocks():
+    data = bytes(range(256)) * 64
+    reader = make_reader(data)
+    assert reader.read(10, 20) == data[10:30]
+    assert reader.read(4000, 200) == data[4000:4200]
+    assert reader.read(0, 100) == data[:100]
+    assert reader.read(len(data) - 5, 100) == data[-5:]
+    assert reader.requests == 3
@@ -0,0 +1,207 @@
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+
+from db_models.meta import LABEL_MALICIOUS, Meta
+from db_models.summary import MetaSummary
+from db_models.symbols import DllName, MetaImport
+from sinks.base import FanOutSink
+from sinks.jsonl import JsonLinesSink
+from sinks.sql import SQLiteSink
+
+
+@pytest.fixture
+def make_meta(make_meta):
+    return lambda hash: make_meta(
+        hash, label=LABEL_MALICIOUS, arch="i386", imports=1, exports=0,
+        import_table=[("KERNEL32.dll", ["ExitProcess"])]
+    )
+
+
+def test_sqlite_sink_skips_known_hashes(tmp_path, make_meta):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    sink.write_batch([make_meta(b"a"), make_meta(b"b"), make_meta(b"a")])
+    sink.write_batch([make_meta(b"b"), make_meta(b"c")])
+    sink.close()
+
+    with sink.session_factory() as session:
+        assert session.execute(
+            select(Meta.hash).order_by(Meta.hash)
+        ).scalars().all() == [b"a", b"b", b"c"]
+        assert session.execute(
+            select(func.count()).select_from(MetaImport)
+        ).scalar() == 3
+    assert sink.stats.batches == 2
+    assert sink.stats.rows == 5
+
+
+def test_sqlite_sink_updates_summary(tmp_path, make_meta):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    no_arch = make_meta(b"c")
+    no_arch.arch = None
+    no_arch.exports = None
+    sink.write_batch([make_meta(b"a"), make_meta(b"b"), make_meta(b"a")])
+    sink.write_batch([make_meta(b"b"), no_arch])
+    sink.close()
+
+    with sink.session_factory() as session:
+        summaries = session.execute(
+            select(MetaSummary).order_by(MetaSummary.arch)
+        ).scalars().all()
+    assert [
+        (
+            s.label, s.extension, s.arch, s.files, s.total_size,
+            s.files_with_imports, s.imports_sum, s.files_with_exports
+        )
+        for s in summaries
+    ] == [
+        (LABEL_MALICIOUS, "dll", "", 1, 10, 1, 1, 0),
+        (LABEL_MALICIOUS, "dll", "i386", 2, 20, 2, 2, 2),
+    ]
+
+
+def test_sqlite_sink_interns_names_committed_by_concurrent_writer(
+        tmp_path, make_meta
+):
+    path = str(tmp_path / "meta.sqlite")
+    sink = SQLiteSink(path)
+    other_sink = SQLiteSink(path)
+    concurrent_writes = []
+
+    @event.listens_for(sink.engine, "before_cursor_execute")
+    def write_concurrently(conn, cursor, statement, *args):
+        # other writer commits the same names between lookup and insert
+        if "INSERT OR IGNORE INTO dll_name" in statement and (
+                not concurrent_writes
+        ):
+            concurrent_writes.append(statement)
+            other_sink.write_batch([make_meta(b"b")])
+
+    sink.write_batch([make_meta(b"a")])
+    sink.close()
+    other_sink.close()
+
+    assert concurrent_writes
+    with sink.session_factory() as session:
+        assert session.execute(
+            select(DllName.name)
+        ).scalars().all() == ["kernel32.dll"]
+        assert session.execute(
+            select(func.count()).select_from(MetaImport)
+        ).scalar() == 2
+
+
+def test_sqlite_sink_deduplicates_headers_only_rows_by_etag(
+        tmp_path, make_meta
+):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    full = make_meta(b"a")
+    full.etag = "e1"
+
+    def headers_only(etag):
+        db_entry = make_meta(b"x")
+        db_entry.hash = None
+        db_entry.etag = etag
+        return db_entry
+
+    sink.write_batch([full, headers_only("e2"), headers_only("e2")])
+    sink.write_batch([
+        headers_only("e1"), headers_only("e2"), headers_only("e3-2"),
+        headers_only(None), headers_only(None)
+    ])
+    sink.close()
+
+    with sink.session_factory() as session:
+        rows = session.execute(
+            select(Meta.hash, Meta.etag).order_by(Meta.id)
+        ).all()
+    assert rows == [
+        (b"a", "e1"), (None, "e2"), (None, "e3-2"), (None, None),
+        (None, None)
+    ]
+
+
+def test_sqlite_sink_completes_headers_only_rows(tmp_path, make_meta):
+    sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+
+    def make_entry(hash, etag):
+        db_entry = make_meta(hash or b"x")
+        db_entry.hash = hash
+        db_entry.etag = etag
+        return db_entry
+
+    sink.write_batch([make_entry(None, "e1"), make_entry(None, "e2")])
+    sink.write_batch([
+        make_entry(b"a", "e1"),
+        # headers only and full entry of the same object in one batch
+        make_entry(None, "e3"), make_entry(b"c", "e3"),
+        make_entry(b"d", "e4"), make_entry(None, "e4"),
+    ])
+    sink.close()
+
+    with sink.session_factory() as session:
+        rows = session.execute(
+            select(Meta.hash, Meta.etag).order_by(Meta.id)
+        ).all()
+        files = session.execute(select(func.sum(MetaSummary.files))).scalar()
+    assert rows == [(b"a", "e1"), (None, "e2"), (b"c", "e3"), (b"d", "e4")]
+    assert files == 4
+
+
+def test_jsonl_sink(tmp_path, make_meta):
+    with JsonLinesSink(str(tmp_path)) as sink:
+        sink.write_batch([make_meta(b"a"), make_meta(b"b")])
+    with open(sink.path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["hash"] for record in records] == ["a", "b"]
+    assert records[0]["import_functions"] == ["kernel32.dll!ExitProcess"]
+
+
+def test_fan_out_sink_writes_same_entries_to_all(tmp_path, make_meta):
+    sqlite_sink = SQLiteSink(str(tmp_path / "meta.sqlite"))
+    jsonl_sink = JsonLinesSink(str(tmp_path))
+    entries = [make_meta(b"a")]
+    with FanOutSink([sqlite_sink, jsonl_sink]) as sink:
+        sink.write_batch(entries)
+        sink.write_batch(entries)
+
+    assert [stats.rows for stats in sink.report()] == [2, 2, 2]
+    with sqlite_sink.session_factory() as session:
+        assert session.execute(
+            select(func.count()).select_from(Meta)
+        ).scalar() == 1
+    # entries passed to sinks are never bound to sink sessions
+    assert entries[0].id is None
+
+
+class FailingSink(JsonLinesSink):
+    name = "failing"
+
+    def _flush(self) -> None:
+        raise OSError("disk full")
+
+
+def test_fan_out_sink_closes_all_when_one_fails(tmp_path, make_meta):
+    failing_sink = FailingSink(str(tmp_path))
+    jsonl_sink = JsonLinesSink(str(tmp_path))
+    sink = FanOutSink([failing_sink, jsonl_sink])
+    sink.write_batch([make_meta(b"a")])
+    with pytest.raises(OSError, match="disk full"):
+        sink.close()
+
+    assert failing_sink._file is None
+    assert jsonl_sink._file is None
+    with open(jsonl_sink.path) as f:
+        assert [json.loads(line)["hash"] for line in f] == ["a"]
+
+
+def test_parquet_sink(tmp_path, make_meta):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from sinks.parquet import ParquetSink
+
+    with ParquetSink(str(tmp_path), row_group_rows=2) as sink:
+        sink.write_batch([make_meta(b"a"), make_meta(b"b"), make_meta(b"c")])
+    table = pq.read_table(str(tmp_path))
+    assert sorted(table.column("hash").to_pylist()) == ["a", "b", "c"]
+    assert set(table.column("arch").to_pylist()) == {"i386"}